@@ -0,0 +1,205 @@
+#!/usr/bin/env python
+# src/core/batch.py
+
+import json
+import sys
+import time
+from dataclasses import replace
+
+from core.impact import CurveCache
+from core.mcts_router import MCTSNode, mcts, simulate
+from core.metrics import time_stage
+from core.pools import as_pool
+
+DEFAULT_REFRESH_INTERVAL = 12.0  # seconds (about one Ethereum block)
+
+class OrderError(ValueError):
+    """Raised for a malformed batch order line."""
+
+# -----------------------------
+# Order Stream
+# -----------------------------
+def parse_order(line, defaults=None):
+    """
+    Parse one JSONL order. Fields missing from the line are taken from `defaults`
+    (e.g. the sender address and key given on the command line).
+
+    :param line: JSON object text with swap_input and optionally chain, from_address,
+                 private_key and id.
+    :param defaults: Optional dict of default order fields.
+    :return: Order dictionary.
+    """
+    try:
+        order = json.loads(line)
+    except json.JSONDecodeError as e:
+        raise OrderError(f"invalid JSON: {e}") from e
+    if not isinstance(order, dict):
+        raise OrderError("order must be a JSON object")
+    order = {**(defaults or {}), **order}
+    swap_input = order.get("swap_input")
+    if isinstance(swap_input, bool) or not isinstance(swap_input, int) or swap_input <= 0:
+        raise OrderError("swap_input must be a positive integer")
+    order.setdefault("chain", "Ethereum")
+    return order
+
+def iter_orders(stream, defaults=None):
+    """
+    Lazily read orders from a text stream, one per line; blank lines are skipped.
+
+    :return: Generator of (line_number, order dict or OrderError).
+    """
+    for line_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield line_number, parse_order(line, defaults)
+        except OrderError as e:
+            yield line_number, e
+
+# -----------------------------
+# Batch Liquidity View
+# -----------------------------
+def _pool_key(pool):
+    return (pool.chain, pool.pool, pool.address)
+
+class BatchLiquidity:
+    """
+    Liquidity snapshot shared by every order of a batch.
+
+    The snapshot is refetched every `refresh_interval` seconds; between refreshes the
+    reserve change of each executed order is applied to a replacement Pool record, so
+    later orders are routed against the liquidity earlier orders left behind.
+    """
+    def __init__(self, fetch, refresh_interval=DEFAULT_REFRESH_INTERVAL, clock=time.monotonic):
+        self._fetch = fetch
+        self.refresh_interval = refresh_interval
+        self._clock = clock
+        self._pools = []
+        self._fetched_at = None
+
+    def pools(self):
+        """
+        :return: Current list of Pool records (refetched when the snapshot is stale).
+        """
+        now = self._clock()
+        if self._fetched_at is None or now - self._fetched_at >= self.refresh_interval:
+            with time_stage("fetch_liquidity"):
+                self._pools = [as_pool(pool) for pool in self._fetch() if pool]
+            self._fetched_at = now
+        return self._pools
+
+    def apply_swap(self, pool, amount_in, amount_out):
+        """
+        Replace `pool` in the snapshot with its post-swap reserves.
+
+        :return: The updated Pool record, or None if the pool is not in the snapshot.
+        """
+        key = _pool_key(pool)
+        for index, current in enumerate(self._pools):
+            if _pool_key(current) == key:
+                if not (isinstance(current.token0, int) and isinstance(current.token1, int)):
+                    return current
+                updated = replace(
+                    current,
+                    token0=current.token0 + amount_in,
+                    token1=max(0, current.token1 - amount_out),
+                )
+                # Copy-on-write: readers holding the previous list keep a consistent view.
+                self._pools = self._pools[:index] + [updated] + self._pools[index + 1:]
+                return updated
+        return None
+
+# -----------------------------
+# Batch Runner
+# -----------------------------
+def route_order(order, liquidity, iterations=1000, curves=None):
+    """
+    :return: Best route for the order as a Pool with expected_output, or None.
+    """
+    pools = [pool for pool in liquidity.pools() if pool.chain == order["chain"]]
+    if not pools:
+        return None
+    root = MCTSNode()
+    with time_stage("mcts"):
+        best_node = mcts(root, iterations=iterations, swap_input=order["swap_input"],
+                         available_pools=pools, curves=curves)
+    if best_node is None or best_node.pool is None:
+        return None
+    with time_stage("simulate"):
+        expected_output = simulate(best_node, order["swap_input"])
+    return best_node.pool.with_expected_output(expected_output)
+
+def run_batch(orders, liquidity, execute=None, out=sys.stdout, iterations=1000, dry_run=False):
+    """
+    Route (and execute) a stream of orders, writing one JSON result line per order
+    as soon as it completes. Nothing is retained per order, so memory use does not
+    grow with the length of the input.
+
+    :param orders: Iterable of (line_number, order or OrderError), e.g. from iter_orders.
+    :param liquidity: BatchLiquidity shared by all orders.
+    :param execute: Callable(route, swap_input, from_address, private_key, chain=...)
+                    returning a tx hash or error message (defaults to execute_swap).
+    :param out: Text stream receiving the JSONL results.
+    :param iterations: MCTS iterations per order.
+    :param dry_run: Route and apply reserve impact without sending transactions.
+    :return: Dict with counts of processed, succeeded and failed orders.
+    """
+    if execute is None and not dry_run:
+        from core.execution import execute_swap as execute
+    curves = CurveCache()
+    summary = {"processed": 0, "succeeded": 0, "failed": 0}
+
+    for line_number, order in orders:
+        summary["processed"] += 1
+        result = {"line": line_number}
+        if isinstance(order, dict) and "id" in order:
+            result["id"] = order["id"]
+
+        if isinstance(order, Exception):
+            result.update(status="error", error=str(order))
+        else:
+            result.update(_process_order(order, liquidity, execute, iterations, dry_run, curves))
+
+        summary["succeeded" if result["status"] == "ok" else "failed"] += 1
+        out.write(json.dumps(result) + "\n")
+        out.flush()
+    return summary
+
+def _process_order(order, liquidity, execute, iterations, dry_run, curves):
+    try:
+        route = route_order(order, liquidity, iterations=iterations, curves=curves)
+    except Exception as e:
+        return {"status": "error", "error": f"routing failed: {e}"}
+    if route is None or not route.expected_output:
+        return {"status": "error", "error": "No valid swap route found"}
+
+    result = {
+        "pool": route.pool,
+        "chain": route.chain,
+        "swap_input": order["swap_input"],
+        "expected_output": route.expected_output,
+    }
+    if not dry_run:
+        if not order.get("from_address") or not order.get("private_key"):
+            return {**result, "status": "error", "error": "from_address and private_key are required"}
+        with time_stage("execute_swap"):
+            tx_result = execute(route, order["swap_input"], order["from_address"],
+                                order["private_key"], chain=order["chain"])
+        result["tx_hash"] = tx_result
+        if not (isinstance(tx_result, str) and tx_result.startswith("0x")):
+            return {**result, "status": "error", "error": tx_result}
+
+    liquidity.apply_swap(route, order["swap_input"], route.expected_output)
+    return {**result, "status": "ok"}
+
+if __name__ == "__main__":
+    import io
+    from core.pools import Pool
+
+    pools = [
+        Pool(pool="Uniswap", chain="Ethereum", token0=10**6, token1=10**6),
+        Pool(pool="SushiSwap", chain="Ethereum", token0=8 * 10**5, token1=8 * 10**5),
+    ]
+    orders = io.StringIO("\n".join(json.dumps({"id": i, "swap_input": 10**5}) for i in range(4)))
+    run_batch(iter_orders(orders), BatchLiquidity(lambda: pools), iterations=200, dry_run=True)
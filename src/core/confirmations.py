@@ -0,0 +1,476 @@
+#!/usr/bin/env python
+# src/core/confirmations.py
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Optional
+
+from core.metrics import time_stage
+
+# Transaction states. PENDING and INCLUDED are transient; the others are final.
+PENDING = "pending"
+INCLUDED = "included"
+CONFIRMED = "confirmed"
+FAILED = "failed"        # Included and confirmed, but the receipt reports a revert
+REPLACED = "replaced"    # Another transaction with the same sender and nonce was mined
+DROPPED = "dropped"      # No longer known to the node and its nonce was never used
+FINAL_STATES = (CONFIRMED, FAILED, REPLACED, DROPPED)
+
+def _hex_int(value):
+    return int(value, 16) if isinstance(value, str) else value
+
+def _hash(value):
+    return value.lower() if isinstance(value, str) else "0x" + bytes(value).hex()
+
+@dataclass(slots=True)
+class TrackedTx:
+    hash: str
+    chain: str
+    status: str = PENDING
+    sender: Optional[str] = None
+    nonce: Optional[int] = None
+    block_number: Optional[int] = None     # Block the transaction was included in
+    block_hash: Optional[str] = None
+    replaced_by: Optional[str] = None      # Hash of the replacing transaction, if known
+    tracked_at_block: Optional[int] = None # Head when tracking started (or last seen by the node)
+
+    @property
+    def done(self):
+        return self.status in FINAL_STATES
+
+    def to_dict(self):
+        return asdict(self)
+
+# -----------------------------
+# Confirmation Tracker
+# -----------------------------
+class ConfirmationTracker:
+    """
+    Follows new blocks of one chain and resolves every tracked transaction from them.
+
+    Each new block is fetched once (with full transactions) and matched against a hash
+    index of pending transactions and a (sender, nonce) index that detects replacements,
+    so the RPC cost is one block fetch per block however many transactions are pending.
+    Per-transaction calls are only made on state changes: one lookup when a transaction
+    is first tracked without its sender/nonce, one receipt when it is included, and a
+    lookup when it has not been seen for `drop_after` blocks.
+
+    `track` is thread-safe. Callers wait with `await tracker.wait(hash)` or pass a
+    callback, which is called with the TrackedTx once it reaches a final state. Final
+    transactions stay queryable with `get` for `finished_ttl` seconds, and at most
+    `max_finished` of them are kept.
+    """
+    def __init__(self, rpc, chain="Ethereum", confirmations=1, poll_interval=2.0, drop_after=25,
+                 max_catch_up=64, max_finished=10000, finished_ttl=3600.0):
+        """
+        :param rpc: Object with call(method, params), e.g. core.transport.HedgedTransport.
+        :param confirmations: Blocks (including the inclusion block) before a transaction is final.
+        :param poll_interval: Seconds between head checks.
+        :param drop_after: Blocks without inclusion after which the node is asked whether the
+            transaction still exists.
+        :param max_catch_up: Largest number of blocks processed per poll after falling behind.
+        :param max_finished: Most final transactions kept for `get` (oldest evicted first).
+        :param finished_ttl: Seconds a final transaction is kept for `get`.
+        """
+        self.rpc = rpc
+        self.chain = chain
+        self.confirmations = max(1, confirmations)
+        self.poll_interval = poll_interval
+        self.drop_after = drop_after
+        self.max_catch_up = max_catch_up
+        self.max_finished = max_finished
+        self.finished_ttl = finished_ttl
+        self._lock = threading.Lock()
+        self._txs = {}          # hash -> TrackedTx (pending and finished)
+        self._finished = OrderedDict()  # hash -> time it became final, oldest first
+        self._pending = {}      # hash -> TrackedTx awaiting inclusion
+        self._included = {}     # hash -> TrackedTx awaiting confirmations
+        self._by_nonce = {}     # (sender, nonce) -> hash of the pending transaction
+        self._waiters = {}      # hash -> [asyncio.Future]
+        self._callbacks = {}    # hash -> [callable]
+        self.last_block = None
+        self._task = None
+        self._starting = False  # start() has scheduled the task but it is not created yet
+        self._stopping = False
+
+    # -- public API -- #
+
+    def track(self, tx_hash, sender=None, nonce=None, callback=None):
+        """
+        Start tracking a submitted transaction. Tracking an already tracked hash only
+        adds the callback.
+
+        :param sender: Sender address; looked up from the node if omitted.
+        :param nonce: Transaction nonce; looked up from the node if omitted.
+        :param callback: Optional callable(TrackedTx) run once the transaction is final.
+        :return: TrackedTx.
+        """
+        tx_hash = _hash(tx_hash)
+        with self._lock:
+            tx = self._txs.get(tx_hash)
+            if tx is None:
+                tx = TrackedTx(tx_hash, self.chain, sender=sender.lower() if sender else None,
+                               nonce=nonce, tracked_at_block=self.last_block)
+                self._txs[tx_hash] = tx
+                self._pending[tx_hash] = tx
+                if tx.sender is not None and tx.nonce is not None:
+                    self._by_nonce[(tx.sender, tx.nonce)] = tx_hash
+            if callback is not None:
+                if tx.done:
+                    finished = True
+                else:
+                    self._callbacks.setdefault(tx_hash, []).append(callback)
+                    finished = False
+        if callback is not None and finished:
+            callback(tx)
+        return tx
+
+    def get(self, tx_hash):
+        """
+        :return: TrackedTx, or None if the hash is not tracked.
+        """
+        return self._txs.get(_hash(tx_hash))
+
+    def forget(self, tx_hash):
+        """
+        Stop tracking a transaction (pending waiters are left unresolved).
+        """
+        tx_hash = _hash(tx_hash)
+        with self._lock:
+            tx = self._txs.pop(tx_hash, None)
+            self._finished.pop(tx_hash, None)
+            self._pending.pop(tx_hash, None)
+            self._included.pop(tx_hash, None)
+            self._callbacks.pop(tx_hash, None)
+            self._waiters.pop(tx_hash, None)
+            if tx is not None and self._by_nonce.get((tx.sender, tx.nonce)) == tx_hash:
+                del self._by_nonce[(tx.sender, tx.nonce)]
+        return tx
+
+    @property
+    def pending_count(self):
+        return len(self._pending) + len(self._included)
+
+    async def wait(self, tx_hash, timeout=None):
+        """
+        Wait until a tracked transaction reaches a final state.
+
+        :return: The final TrackedTx.
+        :raises KeyError: If the hash is not tracked.
+        :raises asyncio.TimeoutError: If `timeout` seconds pass first.
+        """
+        tx_hash = _hash(tx_hash)
+        future = asyncio.get_running_loop().create_future()
+        with self._lock:
+            tx = self._txs.get(tx_hash)
+            if tx is None:
+                raise KeyError(tx_hash)
+            if tx.done:
+                return tx
+            self._waiters.setdefault(tx_hash, []).append(future)
+        return await asyncio.wait_for(future, timeout)
+
+    async def poll_once(self):
+        """
+        Process every block since the last poll (blocking RPC runs in a worker thread).
+
+        :return: Number of blocks processed.
+        """
+        return await asyncio.to_thread(self.poll)
+
+    async def run(self):
+        """
+        Poll for new blocks until stop() is called.
+        """
+        while not self._stopping:
+            if self.pending_count:
+                try:
+                    await self.poll_once()
+                except Exception as e:
+                    print(f"⚠️ Warning: confirmation poll on {self.chain} failed: {e}")
+            else:
+                # Nothing to watch: do not spend RPC calls; resume from the head later.
+                self.last_block = None
+            await asyncio.sleep(self.poll_interval)
+
+    def start(self, loop=None):
+        """
+        Run the poll loop as a task on `loop` (default: the running loop). Safe to call
+        from other threads and more than once.
+        """
+        loop = loop or asyncio.get_running_loop()
+        with self._lock:
+            self._stopping = False  # also revives a scheduled start that stop() cancelled
+            if self._task is not None or self._starting:
+                return
+            self._starting = True
+
+        def create():
+            with self._lock:
+                self._starting = False
+                if self._stopping or self._task is not None:
+                    return  # stop() ran before the loop got here
+                self._task = loop.create_task(self.run())
+
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            create()
+        else:
+            loop.call_soon_threadsafe(create)
+
+    async def stop(self):
+        """
+        Stop the poll loop, including one start() has scheduled but not yet created.
+        """
+        with self._lock:
+            self._stopping = True
+            task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    # -- block processing -- #
+
+    def poll(self):
+        """
+        Synchronous poll: fetch new blocks once each and update every tracked transaction.
+
+        :return: Number of blocks processed.
+        """
+        with time_stage("confirmation_poll"):
+            head = _hex_int(self.rpc.call("eth_blockNumber", []))
+            start = head if self.last_block is None else self.last_block + 1
+            start = max(start, head - self.max_catch_up + 1)
+            self._resolve_unknown(head)
+            processed = 0
+            for number in range(start, head + 1):
+                block = self.rpc.call("eth_getBlockByNumber", [hex(number), True])
+                if block is None:
+                    break
+                self.process_block(block)
+                self.last_block = number
+                processed += 1
+            self._confirm(head)
+            self._check_dropped(head)
+            with self._lock:
+                self._evict_finished()
+        return processed
+
+    def process_block(self, block):
+        """
+        Match one block's transactions against the pending indexes.
+        """
+        number = _hex_int(block["number"])
+        block_hash = _hash(block["hash"])
+        included, replaced = [], []
+        with self._lock:
+            if not self._pending:
+                return
+            for item in block.get("transactions", []):
+                if not isinstance(item, dict):
+                    continue  # block fetched without full transactions
+                tx_hash = _hash(item["hash"])
+                tx = self._pending.get(tx_hash)
+                if tx is not None:
+                    included.append(tx)
+                    continue
+                key = (item.get("from", "").lower(), _hex_int(item.get("nonce")))
+                pending_hash = self._by_nonce.get(key)
+                if pending_hash is not None and pending_hash != tx_hash:
+                    replaced.append((self._pending[pending_hash], tx_hash))
+            for tx in included:
+                self._pending.pop(tx.hash, None)
+                self._by_nonce.pop((tx.sender, tx.nonce), None)
+                tx.status, tx.block_number, tx.block_hash = INCLUDED, number, block_hash
+                self._included[tx.hash] = tx
+        for tx, replaced_by in replaced:
+            self._finish(tx, REPLACED, replaced_by=replaced_by)
+
+    def _resolve_unknown(self, head):
+        # Transactions tracked without sender/nonce are looked up once; this also catches
+        # transactions mined before tracking started.
+        with self._lock:
+            for tx in self._pending.values():
+                if tx.tracked_at_block is None:
+                    tx.tracked_at_block = head
+            unknown = [tx for tx in self._pending.values() if tx.nonce is None]
+        for tx in unknown:
+            data = self.rpc.call("eth_getTransactionByHash", [tx.hash])
+            if data is None:
+                continue
+            with self._lock:
+                if self._pending.get(tx.hash) is not tx:
+                    continue
+                tx.sender = data.get("from", "").lower() or None
+                tx.nonce = _hex_int(data.get("nonce"))
+                self._by_nonce[(tx.sender, tx.nonce)] = tx.hash
+                if data.get("blockNumber") is not None:
+                    self._mark_included(tx, data)
+
+    def _mark_included(self, tx, data):
+        # Move a pending transaction the node reports as mined to the confirmation queue
+        # (caller holds the lock).
+        del self._pending[tx.hash]
+        if self._by_nonce.get((tx.sender, tx.nonce)) == tx.hash:
+            del self._by_nonce[(tx.sender, tx.nonce)]
+        tx.status = INCLUDED
+        tx.block_number = _hex_int(data["blockNumber"])
+        tx.block_hash = _hash(data["blockHash"])
+        self._included[tx.hash] = tx
+
+    def _confirm(self, head):
+        with self._lock:
+            ready = [tx for tx in self._included.values() if head - tx.block_number + 1 >= self.confirmations]
+        canonical = {}
+        for tx in ready:
+            if self.confirmations > 1:
+                # Make sure the inclusion block is still canonical before finalising
+                # (one header fetch per block, however many transactions it holds).
+                if tx.block_number not in canonical:
+                    block = self.rpc.call("eth_getBlockByNumber", [hex(tx.block_number), False])
+                    canonical[tx.block_number] = _hash(block["hash"]) if block else None
+                if canonical[tx.block_number] != tx.block_hash:
+                    self._reorged(tx, head)
+                    continue
+            receipt = self.rpc.call("eth_getTransactionReceipt", [tx.hash])
+            if receipt is None:
+                self._reorged(tx, head)
+                continue
+            self._finish(tx, CONFIRMED if _hex_int(receipt.get("status", 1)) == 1 else FAILED)
+
+    def _reorged(self, tx, head):
+        with self._lock:
+            if self._included.pop(tx.hash, None) is None:
+                return
+            tx.status, tx.block_number, tx.block_hash = PENDING, None, None
+            tx.tracked_at_block = head
+            self._pending[tx.hash] = tx
+            if tx.nonce is not None:
+                self._by_nonce[(tx.sender, tx.nonce)] = tx.hash
+
+    def _check_dropped(self, head):
+        with self._lock:
+            stale = [tx for tx in self._pending.values()
+                     if tx.tracked_at_block is not None and head - tx.tracked_at_block >= self.drop_after]
+        for tx in stale:
+            data = self.rpc.call("eth_getTransactionByHash", [tx.hash])
+            if data is not None:
+                with self._lock:
+                    if self._pending.get(tx.hash) is not tx:
+                        continue
+                    if data.get("blockNumber") is not None:
+                        # Mined in a block the poll skipped (e.g. beyond max_catch_up).
+                        self._mark_included(tx, data)
+                    else:
+                        tx.tracked_at_block = head  # still in the mempool; check again later
+                continue
+            if tx.sender is not None and tx.nonce is not None:
+                account_nonce = _hex_int(self.rpc.call("eth_getTransactionCount", [tx.sender, "latest"]))
+                if account_nonce > tx.nonce:
+                    self._finish(tx, REPLACED)  # nonce used by a transaction we did not see
+                    continue
+            self._finish(tx, DROPPED)
+
+    def _finish(self, tx, status, replaced_by=None):
+        with self._lock:
+            if tx.done:
+                return
+            self._pending.pop(tx.hash, None)
+            self._included.pop(tx.hash, None)
+            if self._by_nonce.get((tx.sender, tx.nonce)) == tx.hash:
+                del self._by_nonce[(tx.sender, tx.nonce)]
+            tx.status = status
+            if replaced_by is not None:
+                tx.replaced_by = replaced_by
+            waiters = self._waiters.pop(tx.hash, [])
+            callbacks = self._callbacks.pop(tx.hash, [])
+            self._finished[tx.hash] = time.monotonic()
+            self._evict_finished()
+        for future in waiters:
+            future.get_loop().call_soon_threadsafe(_set_result, future, tx)
+        for callback in callbacks:
+            try:
+                callback(tx)
+            except Exception as e:
+                print(f"❌ Error in confirmation callback for {tx.hash}: {e}")
+
+    def _evict_finished(self):
+        # Forget final transactions past their TTL or beyond max_finished (caller holds the lock).
+        now = time.monotonic()
+        while self._finished:
+            tx_hash, finished_at = next(iter(self._finished.items()))
+            if len(self._finished) <= self.max_finished and now - finished_at <= self.finished_ttl:
+                break
+            del self._finished[tx_hash]
+            self._txs.pop(tx_hash, None)
+
+def _set_result(future, value):
+    if not future.done():
+        future.set_result(value)
+
+# -----------------------------
+# Shared Trackers
+# -----------------------------
+_trackers = {}
+_trackers_lock = threading.Lock()
+
+def get_tracker(chain, **kwargs):
+    """
+    Return the shared ConfirmationTracker for a chain, using the chain's hedged transport.
+
+    :return: ConfirmationTracker, or None if the chain has no endpoints configured.
+    """
+    with _trackers_lock:
+        tracker = _trackers.get(chain)
+        if tracker is None:
+            from core.transport import get_transport
+            transport = get_transport(chain)
+            if transport is None:
+                return None
+            tracker = ConfirmationTracker(transport, chain=chain, **kwargs)
+            _trackers[chain] = tracker
+        return tracker
+
+def active_trackers():
+    with _trackers_lock:
+        return list(_trackers.values())
+
+def find_transaction(tx_hash):
+    """
+    :return: TrackedTx for `tx_hash` from any chain's tracker, or None.
+    """
+    for tracker in active_trackers():
+        tx = tracker.get(tx_hash)
+        if tx is not None:
+            return tx
+    return None
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Wait for transactions to confirm.")
+    parser.add_argument("hashes", nargs="+")
+    parser.add_argument("--chain", type=str, default="Ethereum")
+    parser.add_argument("--confirmations", type=int, default=1)
+    args = parser.parse_args()
+
+    async def main():
+        tracker = get_tracker(args.chain, confirmations=args.confirmations)
+        if tracker is None:
+            raise SystemExit(f"No RPC endpoint configured for {args.chain}")
+        for tx_hash in args.hashes:
+            tracker.track(tx_hash, callback=lambda tx: print(tx.to_dict()))
+        tracker.start()
+        await asyncio.gather(*(tracker.wait(tx_hash) for tx_hash in args.hashes))
+        await tracker.stop()
+
+    asyncio.run(main())
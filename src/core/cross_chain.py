@@ -0,0 +1,276 @@
+#!/usr/bin/env python
+# src/core/cross_chain.py
+
+import multiprocessing
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Optional
+
+from core.metrics import time_stage
+from core.pools import Pool, as_pool
+from core.quoting import FEE_DENOMINATOR
+
+# -----------------------------
+# Bridge Cost Model
+# -----------------------------
+@dataclass(frozen=True, slots=True)
+class BridgeQuote:
+    source_chain: str
+    target_chain: str
+    amount_in: int          # Amount sent into the bridge
+    amount_out: int         # Amount delivered on the target chain
+    fee: int                # amount_in - amount_out
+    latency: float          # Expected transfer time in seconds
+
+@dataclass(frozen=True, slots=True)
+class BridgeLane:
+    fee_bps: int = 0            # Proportional fee
+    fixed_fee: int = 0          # Flat fee in input-token units
+    latency: float = 0.0        # Seconds
+    capacity: Optional[int] = None  # Largest transfer the lane accepts (None = unbounded)
+
+class BridgeModel(ABC):
+    """
+    Interface of a bridge cost model. Implementations return a BridgeQuote for moving
+    `amount` of the input token from `source_chain` to `target_chain`, or None if the
+    transfer is not possible (no lane, or over capacity).
+    """
+    @abstractmethod
+    def quote(self, source_chain, target_chain, amount):
+        ...
+
+class StaticBridgeModel(BridgeModel):
+    """
+    Bridge model from a fixed table of lanes keyed by (source_chain, target_chain).
+    Staying on the same chain is always free and instant.
+    """
+    def __init__(self, lanes=None):
+        self.lanes = {key: lane if isinstance(lane, BridgeLane) else BridgeLane(**lane)
+                      for key, lane in (lanes or {}).items()}
+
+    def quote(self, source_chain, target_chain, amount):
+        if source_chain == target_chain:
+            return BridgeQuote(source_chain, target_chain, amount, amount, 0, 0.0)
+        lane = self.lanes.get((source_chain, target_chain))
+        if lane is None or (lane.capacity is not None and amount > lane.capacity):
+            return None
+        fee = amount * lane.fee_bps // FEE_DENOMINATOR + lane.fixed_fee
+        if fee >= amount:
+            return None
+        return BridgeQuote(source_chain, target_chain, amount, amount - fee, fee, lane.latency)
+
+# Illustrative defaults; deployments should supply lanes matching the bridges they use.
+DEFAULT_BRIDGE_LANES = {
+    ("Ethereum", "BSC"): BridgeLane(fee_bps=10, latency=600.0),
+    ("BSC", "Ethereum"): BridgeLane(fee_bps=10, latency=900.0),
+    ("Ethereum", "Injective"): BridgeLane(fee_bps=15, latency=1200.0),
+    ("Injective", "Ethereum"): BridgeLane(fee_bps=15, latency=1800.0),
+}
+
+# -----------------------------
+# Cross-chain Route
+# -----------------------------
+@dataclass(frozen=True, slots=True)
+class CrossChainRoute:
+    """
+    End-to-end route: bridge from `source_chain` to `chain` (if different), then swap
+    through `pool`. `chain` is where the swap executes and always equals `pool.chain`.
+    """
+    source_chain: str
+    chain: str
+    pool: Pool                # Pool record with expected_output for amount_in
+    swap_input: int           # Amount held on the source chain
+    amount_in: int            # Amount swapped on `chain` (after bridge fees)
+    bridge_fee: int
+    bridge_latency: float
+    expected_output: int
+    score: float              # expected_output discounted for bridge latency
+
+    @property
+    def requires_bridge(self):
+        return self.source_chain != self.chain
+
+    def to_dict(self):
+        return {
+            "source_chain": self.source_chain,
+            "chain": self.chain,
+            "pool": self.pool.to_dict(),
+            "swap_input": self.swap_input,
+            "amount_in": self.amount_in,
+            "bridge_fee": self.bridge_fee,
+            "bridge_latency": self.bridge_latency,
+            "expected_output": self.expected_output,
+            "score": self.score,
+        }
+
+# -----------------------------
+# Per-chain Solver (runs in worker processes)
+# -----------------------------
+SOLVE_CHUNK = 256  # MCTS iterations between deadline checks
+
+def solve_chain(chain, pools, amount_in, iterations=1000, deadline=None):
+    """
+    Best single-chain route for `amount_in`, found with MCTS over that chain's pools.
+
+    :param deadline: Optional wall-clock time (time.time()) after which the search stops
+        and gives up, so a worker is never kept busy past the planning timeout.
+    :return: Pool with expected_output set, or None.
+    """
+    from core.mcts_router import MCTSNode, mcts, simulate
+
+    pools = [pool for pool in pools if pool.chain == chain and pool.error is None]
+    if not pools:
+        return None
+    root = MCTSNode()
+    best_node = None
+    remaining = iterations
+    while remaining > 0:
+        if deadline is not None and time.time() >= deadline:
+            return None
+        step = min(remaining, SOLVE_CHUNK) if deadline is not None else remaining
+        best_node = mcts(root, iterations=step, swap_input=amount_in, available_pools=pools)
+        remaining -= step
+    if best_node is None or best_node.pool is None:
+        return None
+    expected_output = simulate(best_node, amount_in)
+    if not expected_output:
+        return None
+    return best_node.pool.with_expected_output(expected_output)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def get_planner_executor(max_workers=None):
+    """
+    Shared process pool for per-chain solving. Worker processes are started with
+    "spawn" so they are safe to create from threaded servers, and are reused across
+    plans so start-up cost is paid once.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=max_workers,
+                                            mp_context=multiprocessing.get_context("spawn"))
+        return _executor
+
+def _discard_planner_executor(executor):
+    global _executor
+    with _executor_lock:
+        if _executor is not executor:
+            return  # caller-supplied executors are left to their owner
+        _executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+# -----------------------------
+# Planner
+# -----------------------------
+def plan_routes(pools, swap_input, source_chain, bridge_model=None, chains=None, iterations=1000,
+                latency_weight=1e-6, executor=None, timeout=None):
+    """
+    Solve the best route on every candidate chain in parallel and combine each with the
+    bridge cost of getting there from `source_chain`.
+
+    Each chain is solved independently in its own worker, so planning takes as long as
+    the slowest chain rather than the sum. Chains that do not finish within `timeout`
+    seconds are left out of the plan, and their workers abandon the search at that
+    deadline so they are free for the next plan.
+
+    :param pools: Pool records of all chains (e.g. fetch_all_liquidity()).
+    :param swap_input: Amount held on the source chain.
+    :param source_chain: Chain where the funds are.
+    :param bridge_model: BridgeModel (default: StaticBridgeModel(DEFAULT_BRIDGE_LANES)).
+    :param chains: Candidate execution chains (default: every chain with pools).
+    :param iterations: MCTS iterations per chain.
+    :param latency_weight: Fraction of output given up per second of bridge latency.
+    :param executor: concurrent.futures executor (default: shared process pool).
+    :param timeout: Optional planning deadline in seconds.
+    :return: List of CrossChainRoute, best score first.
+    """
+    bridge_model = bridge_model or StaticBridgeModel(DEFAULT_BRIDGE_LANES)
+    pools = [pool for pool in (as_pool(p) for p in pools) if pool is not None]
+    by_chain = {}
+    for pool in pools:
+        if chains is None or pool.chain in chains:
+            by_chain.setdefault(pool.chain, []).append(pool)
+
+    bridges = {}
+    for chain in by_chain:
+        bridge = bridge_model.quote(source_chain, chain, swap_input)
+        if bridge is not None and bridge.amount_out > 0:
+            bridges[chain] = bridge
+    if not bridges:
+        return []
+
+    # Every solve stops at the deadline itself: a running future cannot be cancelled.
+    deadline = time.time() + timeout if timeout is not None else None
+    with time_stage("cross_chain_plan"):
+        if len(bridges) == 1:
+            # Nothing to parallelise: solve in-process and skip the IPC round trip.
+            (chain, bridge), = bridges.items()
+            solved = {chain: solve_chain(chain, by_chain[chain], bridge.amount_out, iterations, deadline)}
+        else:
+            executor = executor or get_planner_executor()
+            futures = {
+                executor.submit(solve_chain, chain, by_chain[chain], bridge.amount_out, iterations, deadline): chain
+                for chain, bridge in bridges.items()
+            }
+            done, not_done = wait(futures, timeout=timeout)
+            for future in not_done:
+                future.cancel()
+            solved = {}
+            broken = False
+            for future in done:
+                chain = futures[future]
+                try:
+                    solved[chain] = future.result()
+                except BrokenProcessPool:
+                    # A worker died; replace the pool and solve this chain in-process.
+                    broken = True
+                    solved[chain] = solve_chain(chain, by_chain[chain], bridges[chain].amount_out, iterations,
+                                                deadline)
+                except Exception:
+                    solved[chain] = None
+            if broken:
+                _discard_planner_executor(executor)
+
+    routes = []
+    for chain, pool in solved.items():
+        if pool is None:
+            continue
+        bridge = bridges[chain]
+        score = pool.expected_output * max(0.0, 1.0 - latency_weight * bridge.latency)
+        routes.append(CrossChainRoute(
+            source_chain=source_chain,
+            chain=chain,
+            pool=pool,
+            swap_input=swap_input,
+            amount_in=bridge.amount_out,
+            bridge_fee=bridge.fee,
+            bridge_latency=bridge.latency,
+            expected_output=pool.expected_output,
+            score=score,
+        ))
+    routes.sort(key=lambda route: route.score, reverse=True)
+    return routes
+
+def best_route(pools, swap_input, source_chain, **kwargs):
+    """
+    :return: The best CrossChainRoute, or None.
+    """
+    routes = plan_routes(pools, swap_input, source_chain, **kwargs)
+    return routes[0] if routes else None
+
+if __name__ == "__main__":
+    pools = [
+        Pool(pool="Uniswap", chain="Ethereum", token0=10**21, token1=10**21),
+        Pool(pool="PancakeSwap", chain="BSC", token0=5 * 10**21, token1=5 * 10**21),
+        Pool(pool="Helix", chain="Injective", token0=2 * 10**21, token1=2 * 10**21),
+    ]
+    start = time.perf_counter()
+    for route in plan_routes(pools, 10**20, "Ethereum", iterations=2000):
+        print(route.to_dict())
+    print(f"Planned in {time.perf_counter() - start:.2f}s")
@@ -7,6 +7,10 @@ import os
 from web3 import Web3
 from dotenv import load_dotenv
 from core.risk_manager import protect_against_mev
+from core.mev import route_min_output
+from core.metrics import time_stage
+from core.preflight import preflight_transactions, filter_executable
+from core.transport import get_transport, HedgedProvider
 
 # Load environment variables from the .env file
 load_dotenv()
@@ -18,60 +22,116 @@ INJECTIVE_RPC = os.getenv("INJECTIVE_RPC")
 SWAP_ROUTER_ADDRESS = os.getenv("SWAP_ROUTER_ADDRESS")
 SWAP_ROUTER_ABI = json.loads(os.getenv("SWAP_ROUTER_ABI"))
 
-def execute_swap(best_route, swap_input, from_address, private_key, chain="Ethereum"):
+# Routes pre-flighted together per swap: the chosen one plus fallbacks (see
+# core.mcts_router.candidate_routes).
+PREFLIGHT_CANDIDATES = 3
+
+class SubmittedTx(str):
+    """
+    Hash of a sent transaction (the hex string itself) that also carries its nonce, so
+    callers can track replacements without looking the transaction up again.
+    """
+    def __new__(cls, tx_hash, nonce=None):
+        submitted = super().__new__(cls, tx_hash)
+        submitted.nonce = nonce
+        return submitted
+
+def execute_swap(best_route, swap_input, from_address, private_key, chain="Ethereum", gas_token_price=None,
+                 token_in=None, token_out=None, fallback_routes=()):
     """
     Execute a swap transaction using the best route information.
+
+    The transactions for the best route and for `fallback_routes` are pre-flighted in one
+    JSON-RPC batch; the first one that would not revert (in route order) is sent.
     
-    :param best_route: Dictionary with route details (e.g., liquidity pool info, expected output).
+    :param best_route: Pool record (or dictionary) with route details (e.g., liquidity pool info, expected output).
     :param swap_input: The amount of input tokens to swap (as an integer, in smallest unit).
     :param from_address: The sender's blockchain address.
     :param private_key: The private key for signing the transaction.
     :param chain: Blockchain network ("Ethereum", "BSC", or "Injective").
-    :return: Transaction hash string or an error message.
+    :param gas_token_price: Input-token units per wei of gas, used to price sandwich attacks
+        when choosing min_output (default: derived from the route when it trades the
+        chain's native token, else GAS_TOKEN_PRICE; see core.mev.gas_token_price_for).
+    :param token_in: Input token address, used to derive the gas token price.
+    :param token_out: Output token address, used to derive the gas token price.
+    :param fallback_routes: Next-best routes (best first), each with its own expected_output.
+    :return: SubmittedTx (the transaction hash string, with `.nonce`) or an error message.
     """
     # Select the appropriate Web3 provider based on the target chain.
-    if chain == "Ethereum":
-        web3 = Web3(Web3.HTTPProvider(ETH_RPC))
-    elif chain == "BSC":
-        web3 = Web3(Web3.HTTPProvider(BSC_RPC))
-    elif chain == "Injective":
+    if chain == "Injective":
         # For Injective, a different execution method might be needed.
         return "Injective execution not implemented"
-    else:
+    if chain not in ("Ethereum", "BSC"):
         return "Unsupported chain"
+    # Hedged transport over every configured endpoint of the chain (comma-separated *_RPC).
+    transport = get_transport(chain)
+    if transport is None:
+        return f"No RPC endpoint configured for {chain}"
+    web3 = Web3(HedgedProvider(transport))
 
     # Connect to the SwapRouter smart contract.
     contract = web3.eth.contract(address=SWAP_ROUTER_ADDRESS, abi=SWAP_ROUTER_ABI)
 
-    # Determine the minimum acceptable output.
-    min_output = int(best_route.get("expected_output", 0))
-
     # Define a transaction deadline (current time + 300 seconds).
     deadline = int(time.time()) + 300
 
-    # Build the transaction.
-    tx = contract.functions.swapExactTokens(
-        swap_input,
-        min_output,
-        from_address,
-        deadline
-    ).buildTransaction({
-        'chainId': web3.eth.chain_id,
-        'gas': 250000,
-        'gasPrice': web3.eth.gas_price,
-        'nonce': web3.eth.getTransactionCount(from_address)
-    })
+    # Fetch the chain parameters needed to build the transaction.
+    # (RPC call/error counts are recorded per method by the transport.)
+    with time_stage("gas"):
+        chain_id = web3.eth.chain_id
+        gas_price = web3.eth.gas_price
+    with time_stage("nonce"):
+        nonce = web3.eth.getTransactionCount(from_address)
+
+    # Determine the minimum acceptable output of each candidate route: the loosest bound
+    # at which sandwiching this swap in the route's pool is unprofitable.
+    with time_stage("min_output"):
+        min_outputs = []
+        for route in [best_route, *fallback_routes]:
+            min_output = route_min_output(route, swap_input, gas_price=gas_price, gas_token_price=gas_token_price,
+                                          token_in=token_in, token_out=token_out)
+            if min_output not in min_outputs:  # routes with the same bound build the same transaction
+                min_outputs.append(min_output)
+
+    # Build one transaction per candidate.
+    txs = [
+        contract.functions.swapExactTokens(
+            swap_input,
+            min_output,
+            from_address,
+            deadline
+        ).buildTransaction({
+            'chainId': chain_id,
+            'gas': 250000,
+            'gasPrice': gas_price,
+            'nonce': nonce
+        })
+        for min_output in min_outputs
+    ]
+
+    # Pre-flight: simulate every candidate in one batch and size the gas limit from the
+    # estimate, so transactions that would revert are never paid for.
+    with time_stage("preflight"):
+        results = preflight_transactions(transport, [dict(tx, **{"from": from_address}) for tx in txs], chain=chain)
+    executable, dropped = filter_executable(results)
+    if not executable:
+        return f"Transaction failed: pre-flight revert: {dropped[0].error}"
+    tx = executable[0]
+    tx.pop("from", None)
 
     # Apply MEV protection to the transaction.
-    tx = protect_against_mev(tx, chain=chain)
+    with time_stage("mev_protection"):
+        tx = protect_against_mev(tx, chain=chain)
 
     # Sign the transaction.
-    signed_tx = web3.eth.account.sign_transaction(tx, private_key=private_key)
+    with time_stage("sign"):
+        signed_tx = web3.eth.account.sign_transaction(tx, private_key=private_key)
 
     # Send the transaction.
     try:
-        tx_hash = web3.eth.sendRawTransaction(signed_tx.rawTransaction)
-        return web3.toHex(tx_hash)
+        with time_stage("send"):
+            tx_hash = web3.eth.sendRawTransaction(signed_tx.rawTransaction)
+        return SubmittedTx(web3.toHex(tx_hash), nonce)
     except Exception as e:
         return f"Transaction failed: {e}"
 
@@ -3,6 +3,9 @@
 import json
 import requests
 from web3 import Web3
+from core.metrics import rpc_call
+from core.pools import as_pool
+from core.registry import load_registry_from_env
 
 # Constants for blockchain RPC endpoints (replace with actual endpoints or environment variables)
 ETH_RPC = "https://mainnet.infura.io/v3/YOUR_INFURA_PROJECT_ID"
@@ -54,21 +57,65 @@ def fetch_injective_liquidity(pair_id):
     :return: Dictionary containing liquidity information.
     """
     try:
-        response = requests.get(f"{INJECTIVE_RPC}/liquidity/{pair_id}")
-        response.raise_for_status()
-        liquidity_data = response.json()
+        with rpc_call("Injective", "liquidity"):
+            response = requests.get(f"{INJECTIVE_RPC}/liquidity/{pair_id}")
+            response.raise_for_status()
+            liquidity_data = response.json()
     except requests.RequestException as e:
         liquidity_data = {"error": f"Unable to fetch data: {e}"}
     # Normalize the data structure
     liquidity_data.update({"pool": "Injective", "chain": "Injective"})
     return liquidity_data
 
-def fetch_all_liquidity():
+# Reserve fetcher for the pools of each chain (takes a pair address / pair id).
+CHAIN_FETCHERS = {
+    "Ethereum": fetch_uniswap_liquidity,
+    "BSC": fetch_pancakeswap_liquidity,
+    "Injective": fetch_injective_liquidity,
+}
+
+def fetch_pair_liquidity(token_in, token_out, registry, chain=None):
+    """
+    Fetch reserves of only the registry's candidate pools for token_in → token_out.
+
+    :param token_in: Input token address.
+    :param token_out: Output token address.
+    :param registry: core.registry.PoolRegistry.
+    :param chain: Optional chain restriction.
+    :return: List of immutable Pool records, oriented so token0 is the input reserve.
+    """
+    liquidity_pools = []
+    for entry in registry.pools_for_pair(token_in, token_out, chain=chain):
+        fetch = CHAIN_FETCHERS.get(entry.chain)
+        if fetch is None:
+            continue
+        liquidity_data = dict(fetch(entry.address))
+        liquidity_data["address"] = entry.address
+        if entry.dex:
+            liquidity_data["pool"] = entry.dex
+        # Pair reserves come back in (token0, token1) order; Pool.token0 is the input reserve.
+        if token_in.lower() == entry.token1 and "token0" in liquidity_data and "token1" in liquidity_data:
+            liquidity_data["token0"], liquidity_data["token1"] = liquidity_data["token1"], liquidity_data["token0"]
+        liquidity_pools.append(liquidity_data)
+    return [as_pool(pool) for pool in liquidity_pools]
+
+def fetch_all_liquidity(token_in=None, token_out=None, registry=None):
     """
     Aggregates liquidity data from multiple sources across chains.
+
+    When a token pair is given and a pool registry is available (passed in, or loaded
+    from POOL_REGISTRY), only that pair's pools are fetched.
     
-    :return: List of liquidity pools data.
+    :param token_in: Optional input token address.
+    :param token_out: Optional output token address.
+    :param registry: Optional core.registry.PoolRegistry.
+    :return: List of immutable Pool records.
     """
+    if token_in and token_out:
+        registry = registry if registry is not None else load_registry_from_env()
+        if registry is not None:
+            return fetch_pair_liquidity(token_in, token_out, registry)
+
     liquidity_pools = []
 
     # Example addresses/IDs (replace with real ones during integration)
@@ -80,9 +127,9 @@ def fetch_all_liquidity():
     liquidity_pools.append(fetch_pancakeswap_liquidity(pancakeswap_pair_address))
     liquidity_pools.append(fetch_injective_liquidity(injective_pair_id))
 
-    return liquidity_pools
+    return [as_pool(pool) for pool in liquidity_pools]
 
 if __name__ == "__main__":
     # For testing: Print the aggregated liquidity data
     liquidity_data = fetch_all_liquidity()
-    print(json.dumps(liquidity_data, indent=4))
+    print(json.dumps([pool.to_dict() for pool in liquidity_data], indent=4))
@@ -2,28 +2,48 @@
 # src/core/mcts_router.py
 
 import math
+import os
 import random
 import json
+import time
 
 # Import the liquidity aggregation module.
 # Ensure that the liquidity.py file is in the same directory structure (src/core/)
 from core.liquidity import fetch_all_liquidity
+from core.metrics import record_mcts_run
+from core.quoting import get_amount_out
+from core.pools import as_pool, PoolTable
+from core.mev import safe_min_output_batch
+
+# Trained PPO model used for PUCT priors (see models/predict.py).
+DEFAULT_POLICY_MODEL = os.getenv("POLICY_MODEL", "swap_model")
 
 # -----------------------------
 # MCTS Node Definition
 # -----------------------------
 class MCTSNode:
+    __slots__ = ("pool", "parent", "children", "visits", "reward", "prior")
+
     def __init__(self, pool=None, parent=None):
         """
         Each node represents a state in our routing decision.
         For the MVP, a state is simply a liquidity pool (i.e. a potential route).
         The root node will have no pool assigned.
         """
-        self.pool = pool            # Dictionary representing the liquidity pool (from liquidity aggregation)
-        self.parent = parent        # Parent node reference
         self.children = []          # List of child nodes
+        self.reset(pool, parent)
+
+    def reset(self, pool=None, parent=None):
+        """
+        (Re)initialise the node in place so it can be recycled by a NodePool.
+        """
+        self.pool = pool            # Pool record (from liquidity aggregation)
+        self.parent = parent        # Parent node reference
+        self.children.clear()       # List of child nodes
         self.visits = 0             # Number of times node was visited
         self.reward = 0             # Cumulative reward (i.e. estimated output tokens)
+        self.prior = 1.0            # Policy prior P(s, a) used by PUCT search
+        return self
 
 # -----------------------------
 # UCT (Upper Confidence Bound for Trees) Calculation
@@ -55,7 +75,7 @@ def expand(node, available_pools):
     """
     if node.pool is None:
         for pool in available_pools:
-            child = MCTSNode(pool=pool, parent=node)
+            child = MCTSNode(pool=as_pool(pool), parent=node)
             node.children.append(child)
     return node.children
 
@@ -69,15 +89,21 @@ def simulate(node, swap_input):
     Assumes:
       - 'token0' represents the reserve of the input token.
       - 'token1' represents the reserve of the output token.
-    Returns the estimated output tokens (reward).
+    Returns the estimated output tokens (reward). Integer reserves are quoted with the
+    contract's exact uint256 arithmetic, so the result can be used directly as min_output.
     """
-    pool = node.pool
+    pool = as_pool(node.pool)
     # If pool data is invalid or there's an error, yield zero reward.
-    if not pool or "error" in pool:
+    if pool is None or pool.error is not None:
         return 0
     
-    x = pool["token0"]
-    y = pool["token1"]
+    x = pool.token0
+    y = pool.token1
+    if isinstance(x, int) and isinstance(y, int) and isinstance(swap_input, int):
+        try:
+            return get_amount_out(swap_input, x, y)
+        except ValueError:
+            return 0
     # Constant product k = x * y
     k = x * y
     new_x = x + swap_input
@@ -97,27 +123,572 @@ def backpropagate(node, reward):
 # -----------------------------
 # MCTS Algorithm
 # -----------------------------
-def mcts(root, iterations, swap_input, available_pools):
+def mev_safe_outputs(pools, swap_input, gas_cost, outputs=None):
+    """
+    MEV-adjusted reward of each pool: the output the swap is guaranteed when it is sent
+    with its sandwich-safe min_output (core.mev), i.e. what is left after leaving the
+    slippage headroom no attacker paying `gas_cost` can exploit. All pools are scored in
+    one safe_min_output_batch call.
+
+    :param gas_cost: Attacker's sandwich gas in input-token units.
+    :param outputs: Exact outputs of `swap_input` through each pool (computed if omitted);
+        the adjusted reward never exceeds them.
+    :return: List of rewards (0 for unusable pools).
+    """
+    pools = [as_pool(pool) for pool in pools]
+    if outputs is None:
+        outputs = [simulate(MCTSNode(pool=pool), swap_input) for pool in pools]
+    usable = [pool is not None and pool.error is None
+              and isinstance(pool.token0, (int, float)) and isinstance(pool.token1, (int, float))
+              for pool in pools]
+    bounds = safe_min_output_batch([swap_input] * len(pools),
+                                   [pool.token0 if ok else 0 for pool, ok in zip(pools, usable)],
+                                   [pool.token1 if ok else 0 for pool, ok in zip(pools, usable)],
+                                   gas_cost=gas_cost)
+    return [min(output, bound) if ok else 0 for output, bound, ok in zip(outputs, bounds, usable)]
+
+def mcts(root, iterations, swap_input, available_pools, curves=None, gas_cost=None):
     """
     Perform MCTS from the root node for a fixed number of iterations.
     Returns the child of the root with the highest average reward.
+
+    If `curves` (a core.impact.CurveCache) is given, rewards are looked up on each pool's
+    precomputed quote curve instead of recomputing the CPMM formula every iteration.
+    With `gas_cost` (attacker's sandwich gas in input-token units), rewards are
+    MEV-adjusted with mev_safe_outputs.
     """
     # Expand root node if not yet expanded.
     if not root.children:
         expand(root, available_pools)
+    # Resolve each child's quote curve once per search (built once per reserve update).
+    child_curves = {id(child): curves.get(child.pool) for child in root.children} if curves else {}
+    # MEV-adjusted rewards depend only on the pool, so all children are scored in one batch.
+    mev_rewards = {}
+    if gas_cost is not None and root.children:
+        rewards = mev_safe_outputs([child.pool for child in root.children], swap_input, gas_cost)
+        mev_rewards = {id(child): reward for child, reward in zip(root.children, rewards)}
     
+    start = time.perf_counter()
     for _ in range(iterations):
         # Selection: Traverse the tree to select a leaf node.
         node = select(root)
         # Simulation: Evaluate the current node (simulate the swap).
-        reward = simulate(node, swap_input)
+        curve = child_curves.get(id(node))
+        if id(node) in mev_rewards:
+            reward = mev_rewards[id(node)]
+        else:
+            reward = curve.output(swap_input) if curve is not None else simulate(node, swap_input)
         # Backpropagation: Update node statistics along the tree.
         backpropagate(node, reward)
+    record_mcts_run(iterations, time.perf_counter() - start)
     
     # Choose the best route from the root based on highest average reward.
     best_child = max(root.children, key=lambda n: n.reward / n.visits if n.visits > 0 else 0)
     return best_child
 
+def candidate_routes(best_node, swap_input, k=3):
+    """
+    The `k` best routes of a finished search, best first: `best_node` followed by its
+    visited siblings ranked by mean reward, each quoted for `swap_input`. The fallbacks
+    are pre-flighted together with the chosen route (see core.execution.execute_swap).
+
+    :return: List of Pool records with expected_output set (unquotable routes skipped).
+    """
+    parent = best_node.parent
+    siblings = [child for child in (parent.children if parent is not None else [])
+                if child is not best_node and child.pool is not None and child.visits > 0]
+    siblings.sort(key=lambda child: child.reward / child.visits, reverse=True)
+    routes = []
+    for node in [best_node, *siblings]:
+        if len(routes) == k:
+            break
+        expected_output = simulate(node, swap_input)
+        if node.pool is not None and expected_output:
+            routes.append(node.pool.with_expected_output(expected_output))
+    return routes
+
+# -----------------------------
+# PUCT: Policy-prior Guided Search
+# -----------------------------
+class MinMaxStats:
+    """
+    Running bounds of observed values, used to normalise Q into [0, 1] so the PUCT
+    exploration constant is independent of token units (rewards can be ~1e18).
+    """
+    def __init__(self):
+        self.minimum = float("inf")
+        self.maximum = float("-inf")
+
+    def update(self, value):
+        self.minimum = min(self.minimum, value)
+        self.maximum = max(self.maximum, value)
+
+    def normalize(self, value):
+        if self.maximum > self.minimum:
+            return (value - self.minimum) / (self.maximum - self.minimum)
+        return 0.5 if self.maximum == self.minimum else 0.0
+
+def puct_value(parent_visits, node, stats, c_puct=1.5, default_q=0.0):
+    """
+    PUCT score: normalised mean value plus a prior-weighted exploration bonus.
+    Unvisited children are valued at `default_q` (the parent's mean), so the prior
+    decides which of them is tried first instead of UCT visiting every child once.
+    """
+    q = stats.normalize(node.reward / node.visits) if node.visits > 0 else default_q
+    u = c_puct * node.prior * math.sqrt(max(parent_visits, 1)) / (1 + node.visits)
+    return q + u
+
+def select_puct(node, stats, c_puct=1.5):
+    """
+    Descend from `node` to a leaf, picking the child with the highest PUCT score.
+    :return: The selected leaf.
+    """
+    while node.children:
+        parent_visits = node.visits
+        default_q = stats.normalize(node.reward / node.visits) if node.visits > 0 else 0.0
+        node = max(node.children, key=lambda n: puct_value(parent_visits, n, stats, c_puct, default_q))
+    return node
+
+def softmax(values, temperature=1.0):
+    if not values:
+        return []
+    top = max(values)
+    exps = [math.exp((v - top) / temperature) for v in values]
+    total = sum(exps)
+    return [e / total for e in exps]
+
+class QuoteEvaluator:
+    """
+    Batched policy/value evaluator backed by the exact quoting engine.
+
+    All leaves of a batch (and all candidate children of an expanded node) are quoted in
+    a single vectorised `PoolTable.quote` call. Priors are a softmax over each candidate's
+    output relative to the best one, i.e. the prior already contains the answer: this is
+    the quote oracle, used only as an explicit fallback when no trained policy is
+    available (see get_evaluator). Subclasses override `priors`; leaf values are always
+    exact quotes, MEV-adjusted with mev_safe_outputs when `gas_cost` is set.
+    """
+    gas_cost = None  # Attacker's sandwich gas in input-token units (None: no MEV adjustment)
+
+    def __init__(self, temperature=0.05):
+        self.temperature = temperature
+
+    def quote_pools(self, pools, swap_input):
+        """
+        :return: Output of `swap_input` through each pool (0 for unusable pools).
+        """
+        pools = [as_pool(pool) for pool in pools]
+        exact = [
+            pool is not None and pool.error is None
+            and isinstance(pool.token0, int) and isinstance(pool.token1, int) and isinstance(swap_input, int)
+            for pool in pools
+        ]
+        table = PoolTable.from_pools(pool for pool, ok in zip(pools, exact) if ok)
+        quotes = iter(table.quote(swap_input))
+        outputs = [next(quotes) if ok else simulate(MCTSNode(pool=pool), swap_input)
+                   for pool, ok in zip(pools, exact)]
+        if self.gas_cost is not None and pools:
+            outputs = mev_safe_outputs(pools, swap_input, self.gas_cost, outputs)
+        return outputs
+
+    def priors(self, pools, outputs, swap_input):
+        """
+        :param pools: Candidate child pools.
+        :param outputs: Exact output of `swap_input` through each candidate.
+        :return: Prior probability per candidate.
+        """
+        best = max(outputs, default=0)
+        if best <= 0:
+            return [1.0 / len(outputs)] * len(outputs) if outputs else []
+        return softmax([output / best for output in outputs], self.temperature)
+
+    def evaluate(self, nodes, swap_input, candidate_pools=None):
+        """
+        :param nodes: Leaves to evaluate.
+        :param swap_input: Swap amount.
+        :param candidate_pools: Optional per-node lists of child pools to assign priors to.
+        :return: List of (priors, value) per node; value is the expected output.
+        """
+        candidate_pools = candidate_pools or [[] for _ in nodes]
+        flat = [node.pool for node in nodes]
+        for pools in candidate_pools:
+            flat.extend(pools)
+        outputs = self.quote_pools(flat, swap_input)
+        values, rest = outputs[:len(nodes)], outputs[len(nodes):]
+        results = []
+        for node, value, pools in zip(nodes, values, candidate_pools):
+            child_outputs, rest = rest[:len(pools)], rest[len(pools):]
+            if node.pool is None:
+                value = max(child_outputs, default=0)
+            results.append((self.priors(pools, child_outputs, swap_input), value))
+        return results
+
+class UniformEvaluator(QuoteEvaluator):
+    """
+    No prior knowledge: every candidate gets the same prior (baseline for benchmarks).
+    """
+    def priors(self, pools, outputs, swap_input):
+        return [1.0 / len(outputs)] * len(outputs) if outputs else []
+
+class ReserveEvaluator(QuoteEvaluator):
+    """
+    Heuristic prior from each candidate's output-token reserve alone (deeper pools first).
+    It ignores the input reserve and the swap size, so it hints at the answer without
+    containing it.
+    """
+    def __init__(self, temperature=1.0):
+        super().__init__(temperature=temperature)
+
+    def priors(self, pools, outputs, swap_input):
+        depths = []
+        for pool in (as_pool(p) for p in pools):
+            usable = pool is not None and pool.error is None and isinstance(pool.token1, (int, float)) and pool.token1 > 0
+            depths.append(math.log(pool.token1) if usable else float("-inf"))
+        top = max(depths, default=float("-inf"))
+        if top == float("-inf"):
+            return [1.0 / len(pools)] * len(pools) if pools else []
+        return softmax([d - top if d != float("-inf") else -1e9 for d in depths], self.temperature)
+
+def get_evaluator(prior="policy", model_path=DEFAULT_POLICY_MODEL, fallback=True, gas_cost=None):
+    """
+    Build the PUCT evaluator for a prior source.
+
+    :param prior: "policy" (trained PPO model, models.predict.PolicyEvaluator), "reserve",
+        "uniform" or "quote" (exact-quote oracle).
+    :param model_path: Saved PPO model for the policy prior.
+    :param fallback: If the policy cannot be loaded (stable_baselines3 missing, no saved
+        model, or a model not trained in SwapEnv dataset mode), warn and use the quote
+        oracle instead of raising.
+    :param gas_cost: Attacker's sandwich gas in input-token units; when set, leaf values
+        are MEV-adjusted (see mev_safe_outputs).
+    :return: Evaluator for mcts_puct.
+    """
+    evaluators = {"reserve": ReserveEvaluator, "uniform": UniformEvaluator, "quote": QuoteEvaluator}
+    if prior == "policy":
+        try:
+            from models.predict import PolicyEvaluator
+            evaluator = PolicyEvaluator(model_path)
+        except (ImportError, FileNotFoundError, OSError, ValueError) as e:
+            if not fallback:
+                raise
+            print(f"⚠️ Warning: policy prior unavailable ({e}); falling back to exact-quote priors.")
+            evaluator = QuoteEvaluator()
+    elif prior in evaluators:
+        evaluator = evaluators[prior]()
+    else:
+        raise ValueError(f"Unknown prior {prior!r}; expected 'policy' or one of {tuple(evaluators)}")
+    evaluator.gas_cost = gas_cost
+    return evaluator
+
+def mcts_puct(root, iterations, swap_input, available_pools, evaluator, batch_size=8, c_puct=1.5):
+    """
+    PUCT search (AlphaZero-style) guided by a batched policy/value evaluator.
+
+    Each round selects up to `batch_size` leaves, applying a virtual loss along each
+    selected path so the leaves of one batch differ, evaluates them in a single
+    evaluator call and backs the values up. Children are tried in prior order rather
+    than exhaustively, so with an informative prior the best route is found in far
+    fewer iterations than plain UCT.
+
+    :param root: Root MCTSNode.
+    :param iterations: Number of leaf evaluations.
+    :param swap_input: Swap amount.
+    :param available_pools: Candidate pools.
+    :param evaluator: Object with evaluate(nodes, swap_input, candidate_pools), e.g. from get_evaluator.
+    :param batch_size: Leaves evaluated per evaluator call.
+    :param c_puct: Exploration constant.
+    :return: The root child with the most visits (ties broken by mean value), or None.
+    """
+    if not root.children:
+        expand(root, available_pools)
+    if not root.children:
+        return None
+    (priors, _), = evaluator.evaluate([root], swap_input, [[child.pool for child in root.children]])
+    for child, prior in zip(root.children, priors):
+        child.prior = prior
+
+    stats = MinMaxStats()
+    start = time.perf_counter()
+    done = 0
+    while done < iterations:
+        leaves = []
+        for _ in range(min(batch_size, iterations - done)):
+            leaf = select_puct(root, stats, c_puct)
+            # Virtual loss: count a pessimistic visit so the next selection in this batch
+            # prefers other paths; reverted once the real value is known.
+            loss = stats.minimum if stats.minimum != float("inf") else 0
+            backpropagate(leaf, loss)
+            leaves.append((leaf, loss))
+        results = evaluator.evaluate([leaf for leaf, _ in leaves], swap_input)
+        for (leaf, loss), (_, value) in zip(leaves, results):
+            _revert_virtual_loss(leaf, loss)
+            stats.update(value)
+            backpropagate(leaf, value)
+        done += len(leaves)
+    record_mcts_run(iterations, time.perf_counter() - start)
+
+    return max(root.children, key=lambda n: (n.visits, n.reward / n.visits if n.visits > 0 else 0))
+
+def _revert_virtual_loss(node, loss):
+    while node is not None:
+        node.visits -= 1
+        node.reward -= loss
+        node = node.parent
+
+# -----------------------------
+# Memory-bounded Search over Split Routes
+# -----------------------------
+class NodePool:
+    """
+    Free-list allocator for MCTSNode objects with a hard capacity.
+
+    Released nodes are reset and reused instead of being left to the garbage collector,
+    so a search never holds more than `capacity` nodes however long it runs.
+    """
+    def __init__(self, capacity, preallocate=False):
+        self.capacity = capacity
+        self.in_use = 0
+        self.allocated = 0
+        self._free = []
+        if preallocate:
+            self._free = [MCTSNode() for _ in range(capacity)]
+            self.allocated = capacity
+
+    def available(self):
+        return self.capacity - self.in_use
+
+    def acquire(self, pool=None, parent=None):
+        """
+        :return: A reset node, or None if the capacity is exhausted.
+        """
+        if self.in_use >= self.capacity:
+            return None
+        if self._free:
+            node = self._free.pop().reset(pool, parent)
+        else:
+            node = MCTSNode(pool, parent)
+            self.allocated += 1
+        self.in_use += 1
+        return node
+
+    def release(self, node):
+        """
+        Return `node` and its whole subtree to the free list.
+        """
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            stack.extend(current.children)
+            current.reset()
+            self._free.append(current)
+            self.in_use -= 1
+
+    def release_children(self, node):
+        """
+        Collapse `node` back into a leaf (its own statistics are kept).
+        :return: Number of nodes freed.
+        """
+        before = self.in_use
+        for child in node.children:
+            self.release(child)
+        node.children.clear()
+        return before - self.in_use
+
+def prune_low_visit_subtrees(root, node_pool, target, pinned=()):
+    """
+    Free at least `target` nodes by collapsing the least-visited expanded subtrees
+    below the root. Collapsed nodes keep their visit/reward statistics and can be
+    re-expanded later if the search returns to them.
+
+    :param pinned: Nodes that must stay attached (e.g. the current selection path);
+        none of them is collapsed, so none of their descendants on the path is freed.
+    :return: Number of nodes freed.
+    """
+    pinned = {id(node) for node in pinned}
+    internal = []
+    stack = list(root.children)
+    while stack:
+        node = stack.pop()
+        if node.children:
+            internal.append(node)
+            stack.extend(node.children)
+    # Least-visited subtrees are the least likely to contain the best route.
+    internal.sort(key=lambda n: n.visits)
+    freed = 0
+    for node in internal:
+        if freed >= target:
+            break
+        if node.children and id(node) not in pinned:  # may already be gone with a collapsed ancestor
+            freed += node_pool.release_children(node)
+    return freed
+
+def split_amounts(swap_input, splits):
+    """
+    :return: `splits` chunk sizes summing to swap_input (the last takes the remainder).
+    """
+    chunk = swap_input // splits if isinstance(swap_input, int) else swap_input / splits
+    return [chunk] * (splits - 1) + [swap_input - chunk * (splits - 1)]
+
+def allocation_output(allocation):
+    """
+    :param allocation: Iterable of (pool, amount); a pool may appear several times.
+    :return: Total output, quoting each pool once on its aggregated amount.
+    """
+    totals = {}
+    pools = {}
+    for pool, amount in allocation:
+        totals[id(pool)] = totals.get(id(pool), 0) + amount
+        pools[id(pool)] = pool
+    return sum(simulate(MCTSNode(pool=pools[key]), amount) for key, amount in totals.items())
+
+def _aggregate(allocation):
+    merged = {}
+    for pool, amount in allocation:
+        entry = merged.setdefault(id(pool), [pool, 0])
+        entry[1] += amount
+    return [tuple(entry) for entry in merged.values()]
+
+def mcts_bounded(root, iterations, swap_input, available_pools, splits=1, node_budget=10000,
+                 node_pool=None, prune_fraction=0.25, rng=None):
+    """
+    Memory-capped MCTS over split routes: the swap is cut into `splits` equal chunks and
+    each tree level assigns the next chunk to a pool, so the tree is `splits` levels deep.
+
+    Nodes come from a NodePool holding at most `node_budget` nodes. When an expansion
+    would exceed the budget, the least-visited subtrees are collapsed (freeing about
+    `prune_fraction` of the budget) and their nodes recycled, so memory stays constant
+    however many iterations run. Rewards are normalised by the best single-pool output
+    so the UCT exploration term is meaningful in token units.
+
+    :param root: Root MCTSNode (expanded with nodes from the pool).
+    :param iterations: Number of iterations.
+    :param swap_input: Total swap amount.
+    :param available_pools: Candidate pools.
+    :param splits: Number of chunks the amount is split into (1 = single-hop route).
+    :param node_budget: Maximum number of live tree nodes (root excluded).
+    :param node_pool: Optional NodePool to reuse across searches.
+    :param prune_fraction: Fraction of the budget to free per pruning pass.
+    :param rng: Optional random.Random for rollouts.
+    :return: Tuple (allocation as a list of (Pool, amount), expected output), or ([], 0).
+    """
+    pools = [pool for pool in (as_pool(p) for p in available_pools) if pool is not None]
+    if not pools:
+        return [], 0
+    if node_budget < 2 * len(pools):
+        raise ValueError(f"node_budget must be at least {2 * len(pools)} for {len(pools)} pools")
+    node_pool = node_pool or NodePool(node_budget)
+    rng = rng or random.Random()
+    amounts = split_amounts(swap_input, splits)
+    scale = max(simulate(MCTSNode(pool=pool), swap_input) for pool in pools) or 1
+
+    def expand_bounded(node):
+        if node_pool.available() < len(pools):
+            # Pin the node being expanded and its ancestors: releasing any of them would
+            # recycle nodes that are still on the selection path.
+            path_nodes, current = [], node
+            while current is not None:
+                path_nodes.append(current)
+                current = current.parent
+            prune_low_visit_subtrees(root, node_pool, max(len(pools), int(prune_fraction * node_pool.capacity)),
+                                     pinned=path_nodes)
+            if node_pool.available() < len(pools):
+                return False
+        for pool in pools:
+            node.children.append(node_pool.acquire(pool, node))
+        return True
+
+    if not root.children:
+        expand_bounded(root)
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        # Selection (UCT), tracking the chunk assignments on the path.
+        node, path = root, []
+        while node.children:
+            parent = node
+            node = max(node.children, key=lambda n: uct_value(parent.visits, n))
+            path.append(node.pool)
+        # Expansion: grow non-terminal leaves on their second visit.
+        if len(path) < splits and node.visits > 0 and expand_bounded(node):
+            node = node.children[rng.randrange(len(node.children))]
+            path.append(node.pool)
+        # Rollout: assign the remaining chunks uniformly at random.
+        chosen = path + [pools[rng.randrange(len(pools))] for _ in range(splits - len(path))]
+        reward = allocation_output(zip(chosen, amounts)) / scale
+        backpropagate(node, reward)
+    record_mcts_run(iterations, time.perf_counter() - start)
+
+    # Follow the most-visited children; finish unexplored levels greedily.
+    node, chosen = root, []
+    while node.children and len(chosen) < splits:
+        node = max(node.children, key=lambda n: (n.visits, n.reward / n.visits if n.visits else 0))
+        chosen.append(node.pool)
+    for amount in amounts[len(chosen):]:
+        chosen.append(max(pools, key=lambda pool: allocation_output(zip(chosen + [pool], amounts))))
+    allocation = _aggregate(zip(chosen, amounts))
+    return allocation, allocation_output(allocation)
+
+# -----------------------------
+# Convergence Benchmark
+# -----------------------------
+def iterations_to_converge(search, available_pools, swap_input, max_iterations=4096, **kwargs):
+    """
+    Smallest iteration budget on a doubling schedule from which `search` keeps returning
+    the pool with the best exact output: it must be right at that budget and at every
+    larger one up to `max_iterations` (a first lucky hit does not count).
+
+    :param search: mcts or mcts_puct.
+    :return: Iteration count, or None if not converged within max_iterations.
+    """
+    pools = [as_pool(pool) for pool in available_pools]
+    outputs = QuoteEvaluator().quote_pools(pools, swap_input)
+    best_output = max(outputs)
+    converged_at = None
+    iterations = 1
+    while iterations <= max_iterations:
+        best = search(MCTSNode(), iterations, swap_input, pools, **kwargs)
+        if best is not None and simulate(best, swap_input) == best_output:
+            converged_at = converged_at or iterations
+        else:
+            converged_at = None
+        iterations *= 2
+    return converged_at
+
+def benchmark_convergence(available_pools, swap_input, max_iterations=4096, evaluators=None, seeds=8,
+                          **puct_kwargs):
+    """
+    Mean iterations-to-converge (see iterations_to_converge) of plain UCT and of PUCT
+    with each prior, over `seeds` shuffled orders of the candidate pools (the searches
+    are deterministic for a given order, so ties and expansion order are what vary).
+
+    The default priors (uniform, reserve depth) do not contain the exact quotes the
+    search is scored on; pass e.g. {"policy": get_evaluator("policy")} to measure a
+    trained policy.
+
+    :param evaluators: Dict of name -> evaluator (default: uniform and reserve priors).
+    :param seeds: Number of shuffled candidate orders to average over.
+    :return: Dict with "uct" and "puct_<name>" mean iteration counts (None if any order
+        did not converge within max_iterations).
+    """
+    if evaluators is None:
+        evaluators = {"uniform": UniformEvaluator(), "reserve": ReserveEvaluator()}
+    orders = []
+    for seed in range(seeds):
+        pools = list(available_pools)
+        random.Random(seed).shuffle(pools)
+        orders.append(pools)
+
+    def mean(counts):
+        return None if any(count is None for count in counts) else sum(counts) / len(counts)
+
+    result = {"uct": mean([iterations_to_converge(mcts, pools, swap_input, max_iterations) for pools in orders])}
+    for name, evaluator in evaluators.items():
+        result[f"puct_{name}"] = mean([
+            iterations_to_converge(mcts_puct, pools, swap_input, max_iterations, evaluator=evaluator, **puct_kwargs)
+            for pools in orders
+        ])
+    return result
+
 # -----------------------------
 # Main Function for Testing the MCTS Router
 # -----------------------------
@@ -139,8 +710,11 @@ def main():
     
     # Output the selected route and the expected output tokens.
     print("Best route selected:")
-    print(json.dumps(best_node.pool, indent=4))
+    print(json.dumps(best_node.pool.to_dict(), indent=4))
     print("Expected output tokens:", simulate(best_node, swap_input))
 
+    # Compare how many iterations plain UCT and PUCT need to find that route.
+    print("Iterations to converge:", benchmark_convergence(available_pools, swap_input))
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,315 @@
+#!/usr/bin/env python
+# src/core/metrics.py
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Default latency buckets (seconds) covering sub-millisecond MCTS steps up to slow RPC calls.
+DEFAULT_LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+# -----------------------------
+# Metric Types
+# -----------------------------
+class _Metric:
+    """
+    Base class for a labelled metric family.
+    Children (one per label combination) are created lazily and cached, so the
+    hot path is a dict lookup plus a short critical section.
+    """
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children = {}
+        if registry is not None:
+            registry.register(self)
+
+    def labels(self, *values, **kwargs):
+        """
+        Return the child metric for the given label values.
+
+        :param values: Label values in the order of `labelnames`.
+        :param kwargs: Label values by name (alternative to positional values).
+        :return: Child metric supporting inc/set/observe.
+        """
+        if kwargs:
+            values = tuple(str(kwargs[name]) for name in self.labelnames)
+        else:
+            values = tuple(str(v) for v in values)
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    child = self._new_child()
+                    self._children[values] = child
+        return child
+
+    def _label_str(self, values, extra=()):
+        pairs = list(zip(self.labelnames, values)) + list(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+    def collect(self):
+        """Yield Prometheus text exposition lines for this metric family."""
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.kind}"
+        for values, child in sorted(self._children.items()):
+            yield from self._collect_child(values, child)
+
+
+class _ValueChild:
+    __slots__ = ("_lock", "value")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def set(self, value):
+        self.value = value
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _ValueChild()
+
+    def inc(self, amount=1, **labels):
+        self.labels(**labels).inc(amount)
+
+    def _collect_child(self, values, child):
+        yield f"{self.name}{self._label_str(values)} {_format(child.value)}"
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _ValueChild()
+
+    def set(self, value, **labels):
+        self.labels(**labels).set(value)
+
+    def _collect_child(self, values, child):
+        yield f"{self.name}{self._label_str(values)} {_format(child.value)}"
+
+
+class _HistogramChild:
+    __slots__ = ("_lock", "_buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self._lock = threading.Lock()
+        self._buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        index = bisect.bisect_left(self._buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), registry=None, buckets=DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value, **labels):
+        self.labels(**labels).observe(value)
+
+    def _collect_child(self, values, child):
+        with child._lock:
+            counts = list(child.counts)
+            total, count = child.sum, child.count
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            yield f"{self.name}_bucket{self._label_str(values, [('le', _format(bound))])} {cumulative}"
+        yield f"{self.name}_bucket{self._label_str(values, [('le', '+Inf')])} {count}"
+        yield f"{self.name}_sum{self._label_str(values)} {_format(total)}"
+        yield f"{self.name}_count{self._label_str(values)} {count}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format(value):
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+# -----------------------------
+# Registry
+# -----------------------------
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+
+    def render(self):
+        """
+        Render all registered metrics in the Prometheus text exposition format.
+
+        :return: String suitable for a /metrics endpoint.
+        """
+        lines = []
+        for metric in list(self._metrics):
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+# Content type expected by Prometheus scrapers.
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+REGISTRY = MetricsRegistry()
+
+# -----------------------------
+# Application Metrics
+# -----------------------------
+STAGE_LATENCY = Histogram(
+    "defai_stage_latency_seconds",
+    "Latency of each swap pipeline stage.",
+    ["stage"],
+    registry=REGISTRY,
+)
+RPC_CALLS = Counter(
+    "defai_rpc_calls_total",
+    "RPC calls issued, by chain and method.",
+    ["chain", "method"],
+    registry=REGISTRY,
+)
+RPC_ERRORS = Counter(
+    "defai_rpc_errors_total",
+    "RPC calls that raised an error, by chain and method.",
+    ["chain", "method"],
+    registry=REGISTRY,
+)
+RPC_HEDGES = Counter(
+    "defai_rpc_hedged_requests_total",
+    "Duplicate RPC requests sent to a backup endpoint after the hedge delay.",
+    ["chain"],
+    registry=REGISTRY,
+)
+MCTS_ITERATIONS = Counter(
+    "defai_mcts_iterations_total",
+    "Total MCTS iterations executed.",
+    registry=REGISTRY,
+)
+MCTS_SECONDS = Counter(
+    "defai_mcts_seconds_total",
+    "Total wall time spent inside MCTS searches.",
+    registry=REGISTRY,
+)
+MCTS_ITERATIONS_PER_SECOND = Gauge(
+    "defai_mcts_iterations_per_second",
+    "MCTS throughput of the most recent search.",
+    registry=REGISTRY,
+)
+CACHE_REQUESTS = Counter(
+    "defai_cache_requests_total",
+    "Cache lookups by cache name and result (hit/miss).",
+    ["cache", "result"],
+    registry=REGISTRY,
+)
+
+# -----------------------------
+# Instrumentation Helpers
+# -----------------------------
+@contextmanager
+def time_stage(stage):
+    """
+    Record the wall time of a pipeline stage in the stage latency histogram.
+
+    :param stage: Stage name (e.g. "fetch_liquidity", "mcts", "sign").
+    """
+    child = STAGE_LATENCY.labels(stage)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        child.observe(time.perf_counter() - start)
+
+
+@contextmanager
+def rpc_call(chain, method):
+    """
+    Count an RPC call (and its failure, if it raises) for the given chain and method.
+
+    :param chain: Blockchain network.
+    :param method: RPC method name (e.g. "eth_gasPrice").
+    """
+    RPC_CALLS.labels(chain, method).inc()
+    try:
+        yield
+    except Exception:
+        RPC_ERRORS.labels(chain, method).inc()
+        raise
+
+
+def record_mcts_run(iterations, elapsed):
+    """
+    Record the throughput of a completed MCTS search.
+
+    :param iterations: Number of iterations executed.
+    :param elapsed: Wall time of the search in seconds.
+    """
+    MCTS_ITERATIONS.labels().inc(iterations)
+    MCTS_SECONDS.labels().inc(elapsed)
+    if elapsed > 0:
+        MCTS_ITERATIONS_PER_SECOND.labels().set(iterations / elapsed)
+
+
+def record_cache(cache, hit):
+    """
+    Record a cache lookup result.
+
+    :param cache: Cache name.
+    :param hit: True for a hit, False for a miss.
+    """
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def render_metrics():
+    """
+    :return: All application metrics in Prometheus text format.
+    """
+    return REGISTRY.render()
+
+
+if __name__ == "__main__":
+    with time_stage("demo"):
+        time.sleep(0.01)
+    with rpc_call("Ethereum", "eth_gasPrice"):
+        pass
+    record_mcts_run(1000, 0.05)
+    record_cache("liquidity", True)
+    print(render_metrics())
@@ -0,0 +1,216 @@
+#!/usr/bin/env python
+# src/core/mev.py
+
+import logging
+import os
+
+import numpy as np
+
+from core.quoting import FEE_DENOMINATOR
+
+# Fractions of the largest feasible front-run at which sandwich profit is evaluated.
+# Profit is usually maximal at the largest feasible front-run (fraction 1.0); the other
+# points bracket the unconstrained optimum when it is smaller, and golden-section search
+# then refines it between the best point's neighbours (profit is unimodal in the front-run).
+FRONT_RUN_FRACTIONS = np.array([1 / 64, 1 / 32, 1 / 16, 1 / 8, 1 / 4, 3 / 8, 1 / 2, 5 / 8, 3 / 4, 7 / 8, 15 / 16, 1.0])
+_BRACKETS = np.concatenate(([0.0], FRONT_RUN_FRACTIONS, [1.0]))
+GOLDEN_SECTION_STEPS = 40
+_INV_PHI = (np.sqrt(5) - 1) / 2
+BISECTION_STEPS = 48
+SANDWICH_GAS = 2 * 120_000  # gas units of a front-run plus back-run swap
+# Wrapped native (gas) token per chain; both have 18 decimals, so one smallest unit = one wei.
+WRAPPED_NATIVE = {
+    "Ethereum": "0xc02aaa39b223fe8d0a0e5c4f27ead9083c756cc2",  # WETH
+    "BSC": "0xbb4cdb9cbd36b01bd1cbaebf2de08d9173bc095c",       # WBNB
+}
+# Fallback input-token units per wei of gas for routes that do not trade the native token.
+DEFAULT_GAS_TOKEN_PRICE = float(os.getenv("GAS_TOKEN_PRICE") or 0) or None
+
+logger = logging.getLogger(__name__)
+
+def _arrays(*values):
+    return np.broadcast_arrays(*(np.asarray(v, dtype=np.float64) for v in values))
+
+def _amount_out(amount_in, reserve_in, reserve_out, gamma):
+    effective = gamma * amount_in
+    return effective * reserve_out / (reserve_in + effective)
+
+# -----------------------------
+# Closed-form Sandwich Model (CPMM)
+# -----------------------------
+def max_front_run(amount_in, reserve_in, reserve_out, min_output, fee_bps=0):
+    """
+    Largest front-run (in input tokens) after which the victim's swap of `amount_in`
+    still returns at least `min_output`.
+
+    With fee factor g, a front-run `a` leaves reserves (x + a, x*y / (x + g*a)) and the
+    victim's output condition g*v*x*y >= m*(x + g*a)*(x + a + g*v) is a quadratic in a:
+        g*m*a^2 + m*(x*(1 + g) + g^2*v)*a + m*x*(x + g*v) - g*v*x*y <= 0
+    whose positive root is the answer. Vectorised over all arguments.
+
+    :return: float64 array (0 where min_output already exceeds the unattacked output).
+    """
+    v, x, y, m = _arrays(amount_in, reserve_in, reserve_out, min_output)
+    g = (FEE_DENOMINATOR - np.asarray(fee_bps, dtype=np.float64)) / FEE_DENOMINATOR
+    a2 = g * m
+    b = m * (x * (1 + g) + g * g * v)
+    c = m * x * (x + g * v) - g * v * x * y
+    disc = np.maximum(b * b - 4 * a2 * c, 0.0)
+    # -2c / (b + sqrt(disc)) is the positive root without catastrophic cancellation.
+    with np.errstate(divide="ignore", invalid="ignore"):
+        root = np.where(c < 0, -2 * c / (b + np.sqrt(disc)), 0.0)
+    return np.where(np.isfinite(root) & (root > 0), root, 0.0)
+
+def sandwich_profit(front_run, amount_in, reserve_in, reserve_out, fee_bps=0, gas_cost=0):
+    """
+    Attacker profit (input-token units) of front-running with `front_run`, letting the
+    victim swap `amount_in`, then selling the bought tokens back. Vectorised.
+    """
+    a, v, x, y, gas = _arrays(front_run, amount_in, reserve_in, reserve_out, gas_cost)
+    g = (FEE_DENOMINATOR - np.asarray(fee_bps, dtype=np.float64)) / FEE_DENOMINATOR
+    bought = _amount_out(a, x, y, g)
+    x1, y1 = x + a, y - bought
+    victim_out = _amount_out(v, x1, y1, g)
+    x2, y2 = x1 + v, y1 - victim_out
+    proceeds = _amount_out(bought, y2, x2, g)
+    return proceeds - a - gas
+
+def max_extractable_value(amount_in, reserve_in, reserve_out, min_output, fee_bps=0, gas_cost=0):
+    """
+    Best sandwich profit available against a swap protected by `min_output`
+    (negative when no sandwich pays for its gas). Vectorised over all arguments.
+
+    The front-run is bounded by max_front_run; profit is evaluated on a grid of fractions
+    of that bound, then the optimum is refined by golden-section search between the
+    neighbours of the best grid point, so interior optima are found to ~1e-8 of the bound.
+
+    :param gas_cost: Attacker's gas for the two sandwich transactions, in input-token units.
+    :return: float64 array of profits.
+    """
+    v, x, y, m, gas = _arrays(amount_in, reserve_in, reserve_out, min_output, gas_cost)
+    a_max = max_front_run(v, x, y, m, fee_bps)
+    fee = np.asarray(fee_bps, dtype=np.float64)
+    if fee.ndim:
+        fee = np.broadcast_to(fee, a_max.shape)
+
+    def profit_at(fronts):
+        return sandwich_profit(fronts, v, x, y, fee, gas)
+
+    grid = sandwich_profit(a_max[..., None] * FRONT_RUN_FRACTIONS, v[..., None], x[..., None], y[..., None],
+                           fee[..., None] if fee.ndim else fee, gas[..., None])
+    best_index = grid.argmax(axis=-1)
+    best = grid.max(axis=-1)
+    lo, hi = a_max * _BRACKETS[best_index], a_max * _BRACKETS[best_index + 2]
+    c, d = hi - _INV_PHI * (hi - lo), lo + _INV_PHI * (hi - lo)
+    fc, fd = profit_at(c), profit_at(d)
+    for _ in range(GOLDEN_SECTION_STEPS):
+        left = fc >= fd  # maximum lies in [lo, d]
+        lo, hi = np.where(left, lo, c), np.where(left, d, hi)
+        probe = np.where(left, hi - _INV_PHI * (hi - lo), lo + _INV_PHI * (hi - lo))
+        fp = profit_at(probe)
+        c, d, fc, fd = (np.where(left, probe, d), np.where(left, c, probe),
+                        np.where(left, fp, fd), np.where(left, fc, fp))
+    best = np.maximum(best, np.maximum(fc, fd))
+    return np.where(a_max > 0, best, -gas)
+
+# -----------------------------
+# Adaptive min_output
+# -----------------------------
+def safe_min_output_batch(amounts_in, reserves_in, reserves_out, fee_bps=0, gas_cost=0,
+                          max_slippage_bps=None):
+    """
+    Loosest `min_output` (i.e. the most slippage headroom, fewest reverts) at which no
+    sandwich is profitable, for many swaps at once.
+
+    Extractable value falls as min_output rises, so the threshold is found by a
+    vectorised bisection between 0 and the unattacked output. With `max_slippage_bps`
+    the result is never looser than that tolerance.
+
+    :return: List of integer min_output values (0 for unquotable swaps).
+    """
+    v, x, y, gas = _arrays(amounts_in, reserves_in, reserves_out, gas_cost)
+    g = (FEE_DENOMINATOR - np.asarray(fee_bps, dtype=np.float64)) / FEE_DENOMINATOR
+    valid = (v > 0) & (x > 0) & (y > 0)
+    v, x, y = np.where(valid, v, 0.0), np.where(valid, x, 1.0), np.where(valid, y, 1.0)
+    expected = _amount_out(v, x, y, g)
+
+    lo = np.zeros_like(expected)
+    hi = expected.copy()
+    for _ in range(BISECTION_STEPS):
+        mid = (lo + hi) / 2
+        safe = max_extractable_value(v, x, y, mid, fee_bps, gas) <= 0
+        hi = np.where(safe, mid, hi)
+        lo = np.where(safe, lo, mid)
+    if max_slippage_bps is not None:
+        hi = np.maximum(hi, expected * (1 - max_slippage_bps / FEE_DENOMINATOR))
+    hi = np.minimum(np.ceil(hi), np.floor(expected))
+    return [int(value) if ok else 0 for value, ok in zip(np.atleast_1d(hi).tolist(), np.atleast_1d(valid).tolist())]
+
+def safe_min_output(amount_in, reserve_in, reserve_out, fee_bps=0, gas_cost=0, max_slippage_bps=None):
+    """
+    Scalar form of safe_min_output_batch.
+    """
+    return safe_min_output_batch([amount_in], [reserve_in], [reserve_out], fee_bps, gas_cost, max_slippage_bps)[0]
+
+def gas_token_price_for(route, token_in=None, token_out=None):
+    """
+    Input-token units per wei of gas, derived from the route itself where possible.
+
+    If the input token is the chain's wrapped native token, one input unit is one wei.
+    If the output token is, the route's own pool prices it (input reserve per output
+    reserve). Otherwise GAS_TOKEN_PRICE is used, if configured.
+
+    :param route: Pool record (or dictionary) with chain and token0/token1 reserves.
+    :param token_in: Input token address, if known.
+    :param token_out: Output token address, if known.
+    :return: Price, or None if it cannot be determined.
+    """
+    native = WRAPPED_NATIVE.get(route.get("chain"))
+    if native is not None and isinstance(token_in, str) and token_in.lower() == native:
+        return 1.0
+    reserve_in, reserve_out = route.get("token0"), route.get("token1")
+    if (native is not None and isinstance(token_out, str) and token_out.lower() == native
+            and isinstance(reserve_in, (int, float)) and isinstance(reserve_out, (int, float)) and reserve_out > 0):
+        return reserve_in / reserve_out
+    return DEFAULT_GAS_TOKEN_PRICE
+
+def route_min_output(route, swap_input, gas_price=0, gas_token_price=None, fee_bps=0, max_slippage_bps=None,
+                     token_in=None, token_out=None):
+    """
+    Adaptive min_output for executing `route`: the loosest bound no sandwich can profit
+    from, never above the route's expected_output.
+
+    :param route: Pool record (or dictionary) with token0/token1 reserves and expected_output.
+    :param gas_price: Gas price in wei the attacker would have to pay.
+    :param gas_token_price: Input-token units per wei of gas. Defaults to
+        gas_token_price_for(route, token_in, token_out); if no price is known either way,
+        the attacker's gas is treated as free, which yields the strictest (safest) bound,
+        typically expected_output itself, so any price movement reverts the swap. A
+        warning is logged in that case; configure GAS_TOKEN_PRICE to avoid it.
+    :param token_in: Input token address, used to derive the gas token price.
+    :param token_out: Output token address, used to derive the gas token price.
+    :return: Integer min_output.
+    """
+    expected_output = int(route.get("expected_output", 0) or 0)
+    reserve_in, reserve_out = route.get("token0"), route.get("token1")
+    if not isinstance(reserve_in, int) or not isinstance(reserve_out, int):
+        return expected_output
+    if gas_token_price is None:
+        gas_token_price = gas_token_price_for(route, token_in, token_out)
+    if not gas_token_price and gas_price:
+        logger.warning("No gas token price for %s route; pricing sandwich gas as free, so min_output "
+                       "leaves no slippage headroom. Set GAS_TOKEN_PRICE or pass gas_token_price.",
+                       route.get("chain"))
+    gas_cost = SANDWICH_GAS * gas_price * gas_token_price if gas_token_price else 0
+    bound = safe_min_output(swap_input, reserve_in, reserve_out, fee_bps, gas_cost, max_slippage_bps)
+    return min(bound, expected_output) if expected_output else bound
+
+if __name__ == "__main__":
+    x, y = 1000 * 10**18, 3_000_000 * 10**18   # 1000 ETH / 3M USDC
+    v = 10 * 10**18
+    gas = 0.005 * 10**18                       # sandwich gas in input-token units
+    print(f"Unattacked output: {_amount_out(v, x, y, 1.0):.4e}")
+    for slippage_bps in (10, 50, 100, 300):
+        m = _amount_out(v, x, y, 1.0) * (1 - slippage_bps / FEE_DENOMINATOR)
+        print(f"{slippage_bps / 100:.1f}% tolerance -> MEV {float(max_extractable_value(v, x, y, m, gas_cost=gas)) / 1e18:.4f}")
+    print(f"Safe min_output: {safe_min_output(v, x, y, gas_cost=gas)}")
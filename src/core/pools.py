@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+# src/core/pools.py
+
+import json
+from dataclasses import dataclass, fields, replace
+from typing import Optional, Any
+
+from core.quoting import quote_batch
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the standard library encoder.
+    orjson = None
+
+# -----------------------------
+# Pool Record
+# -----------------------------
+@dataclass(frozen=True, slots=True)
+class Pool:
+    """
+    Immutable liquidity pool record passed between liquidity → router → API.
+
+    Field names mirror the historical dict keys ("token0"/"token1" hold the input and
+    output token reserves), and read-only mapping access (pool["token0"], pool.get(...),
+    "error" in pool) is supported so dict-shaped callers keep working. Derived values
+    are attached with `with_expected_output`, which returns a new record instead of
+    mutating the shared one.
+    """
+    pool: str                              # DEX name (e.g. "Uniswap")
+    chain: str                             # Blockchain network
+    token0: Any = 0                        # Reserve of the input token
+    token1: Any = 0                        # Reserve of the output token
+    address: Optional[str] = None          # Pair contract address / pair id, if known
+    error: Optional[str] = None            # Set when the pool could not be fetched
+    expected_output: Optional[int] = None  # Quoted output for a specific swap
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Build a Pool from a liquidity dictionary; unknown keys are ignored.
+        """
+        return cls(**{name: data[name] for name in _FIELD_NAMES if name in data})
+
+    def to_dict(self):
+        """
+        :return: Plain dictionary, omitting optional fields that are unset.
+        """
+        return {name: getattr(self, name) for name in _FIELD_NAMES
+                if name in _REQUIRED_FIELDS or getattr(self, name) is not None}
+
+    def with_expected_output(self, expected_output):
+        return replace(self, expected_output=expected_output)
+
+    # -- read-only mapping compatibility -- #
+
+    def __getitem__(self, key):
+        if key not in _FIELD_NAMES:
+            raise KeyError(key)
+        value = getattr(self, key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        return key in _FIELD_NAMES and getattr(self, key) is not None
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+_FIELD_NAMES = tuple(f.name for f in fields(Pool))
+_REQUIRED_FIELDS = ("pool", "chain", "token0", "token1")
+
+def as_pool(data):
+    """
+    Coerce a liquidity dictionary (or an existing Pool) into a Pool.
+
+    :param data: Pool, dict or None.
+    :return: Pool, or None for empty input.
+    """
+    if data is None or isinstance(data, Pool):
+        return data
+    if not data:
+        return None
+    return Pool.from_dict(data)
+
+# -----------------------------
+# Columnar Pool Table
+# -----------------------------
+class PoolTable:
+    """
+    Column-oriented storage for bulk pool sets: one list per field instead of one
+    object per pool, so whole-table operations (quoting every pool, filtering by
+    chain) run over flat arrays. Rows are materialised as Pool records on access.
+    """
+    __slots__ = ("names", "chains", "reserves0", "reserves1", "addresses", "errors")
+
+    def __init__(self):
+        self.names = []
+        self.chains = []
+        self.reserves0 = []
+        self.reserves1 = []
+        self.addresses = []
+        self.errors = []
+
+    @classmethod
+    def from_pools(cls, pools):
+        table = cls()
+        for pool in pools:
+            table.append(pool)
+        return table
+
+    def append(self, pool):
+        pool = as_pool(pool)
+        self.names.append(pool.pool)
+        self.chains.append(pool.chain)
+        self.reserves0.append(pool.token0)
+        self.reserves1.append(pool.token1)
+        self.addresses.append(pool.address)
+        self.errors.append(pool.error)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getitem__(self, index):
+        return Pool(
+            pool=self.names[index],
+            chain=self.chains[index],
+            token0=self.reserves0[index],
+            token1=self.reserves1[index],
+            address=self.addresses[index],
+            error=self.errors[index],
+        )
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def where_chain(self, chain):
+        """
+        :return: New PoolTable containing only the pools of `chain`.
+        """
+        table = PoolTable()
+        for index, pool_chain in enumerate(self.chains):
+            if pool_chain == chain:
+                table.append(self[index])
+        return table
+
+    def quote(self, amount_in, fee_bps=0):
+        """
+        Exact output of swapping `amount_in` through every pool in the table.
+        Pools with errors or non-integer reserves quote as 0.
+
+        :return: List of integer outputs aligned with the table rows.
+        """
+        valid = [
+            error is None and isinstance(r0, int) and isinstance(r1, int)
+            for error, r0, r1 in zip(self.errors, self.reserves0, self.reserves1)
+        ]
+        reserves_in = [r0 if ok else 0 for ok, r0 in zip(valid, self.reserves0)]
+        reserves_out = [r1 if ok else 0 for ok, r1 in zip(valid, self.reserves1)]
+        return quote_batch(amount_in, reserves_in, reserves_out, fee_bps=fee_bps)
+
+    def best(self, amount_in, fee_bps=0):
+        """
+        :return: Tuple (Pool, output) of the pool with the highest exact output, or (None, 0).
+        """
+        outputs = self.quote(amount_in, fee_bps=fee_bps)
+        if not outputs:
+            return None, 0
+        index = max(range(len(outputs)), key=outputs.__getitem__)
+        return self[index].with_expected_output(outputs[index]), outputs[index]
+
+# -----------------------------
+# JSON Encoding
+# -----------------------------
+def _default(obj):
+    if isinstance(obj, Pool):
+        return obj.to_dict()
+    if isinstance(obj, PoolTable):
+        return [pool.to_dict() for pool in obj]
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def encode_json(obj):
+    """
+    Serialise API payloads containing Pool / PoolTable values to JSON bytes.
+    Uses orjson when available; integers wider than 64 bits (e.g. 18-decimal reserves)
+    are not supported by orjson, so such payloads fall back to the stdlib encoder.
+
+    :return: UTF-8 encoded JSON.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, default=_default, option=orjson.OPT_PASSTHROUGH_DATACLASS)
+        except TypeError:
+            pass
+    return json.dumps(obj, default=_default, separators=(",", ":")).encode("utf-8")
+
+if __name__ == "__main__":
+    pools = [
+        Pool(pool="Uniswap", chain="Ethereum", token0=100, token1=100),
+        Pool(pool="PancakeSwap", chain="BSC", token0=150, token1=150),
+    ]
+    table = PoolTable.from_pools(pools)
+    print("Quotes for 10 input tokens:", table.quote(10))
+    print("Best pool:", table.best(10))
+    print(encode_json({"liquidity": table}).decode())
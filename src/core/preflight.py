@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+# src/core/preflight.py
+
+import requests
+from eth_abi import encode, decode
+from eth_utils import function_signature_to_4byte_selector, to_checksum_address
+from core.metrics import rpc_call
+
+# SwapRouter.swapExactTokens(inputToken, outputToken, inputAmount, minOutput, recipient, deadline)
+SWAP_EXACT_TOKENS_SIGNATURE = "swapExactTokens(address,address,uint256,uint256,address,uint256)"
+SWAP_EXACT_TOKENS_SELECTOR = function_signature_to_4byte_selector(SWAP_EXACT_TOKENS_SIGNATURE)
+
+# Selector of Solidity's Error(string), used by require(..., "reason") reverts.
+ERROR_STRING_SELECTOR = function_signature_to_4byte_selector("Error(string)")
+
+DEFAULT_GAS_MARGIN = 0.1      # 10% headroom over eth_estimateGas
+DEFAULT_RPC_TIMEOUT = 10      # seconds
+
+# -----------------------------
+# Calldata Helpers
+# -----------------------------
+def encode_swap_exact_tokens(input_token, output_token, input_amount, min_output, recipient, deadline):
+    """
+    ABI-encode a call to SwapRouter.swapExactTokens.
+
+    :return: Hex-encoded calldata ("0x...").
+    """
+    args = encode(
+        ["address", "address", "uint256", "uint256", "address", "uint256"],
+        [
+            to_checksum_address(input_token),
+            to_checksum_address(output_token),
+            int(input_amount),
+            int(min_output),
+            to_checksum_address(recipient),
+            int(deadline),
+        ],
+    )
+    return "0x" + (SWAP_EXACT_TOKENS_SELECTOR + args).hex()
+
+def decode_revert_reason(error):
+    """
+    Extract a human-readable revert reason from a JSON-RPC error object.
+
+    :param error: The "error" member of a JSON-RPC response.
+    :return: Revert reason string.
+    """
+    data = error.get("data")
+    if isinstance(data, dict):
+        # Some nodes (e.g. Ganache, Hardhat) nest the revert data one level deeper.
+        data = data.get("data") or data.get("result")
+    if isinstance(data, str) and data.startswith("0x"):
+        raw = bytes.fromhex(data[2:])
+        if raw[:4] == ERROR_STRING_SELECTOR:
+            try:
+                return decode(["string"], raw[4:])[0]
+            except Exception:
+                pass
+    return error.get("message", "execution reverted")
+
+def _to_call_object(tx):
+    call = {"to": tx["to"], "data": tx.get("data", "0x")}
+    if tx.get("from"):
+        call["from"] = tx["from"]
+    value = tx.get("value", 0)
+    call["value"] = value if isinstance(value, str) else hex(value)
+    return call
+
+# -----------------------------
+# Pre-flight Simulation
+# -----------------------------
+class PreflightResult:
+    __slots__ = ("tx", "ok", "gas_limit", "output_amount", "error")
+
+    def __init__(self, tx, ok, gas_limit=None, output_amount=None, error=None):
+        self.tx = tx                        # The original transaction dictionary
+        self.ok = ok                        # False if the transaction would revert
+        self.gas_limit = gas_limit          # Estimated gas plus margin
+        self.output_amount = output_amount  # Decoded uint256 return value of the call, if any
+        self.error = error                  # Revert reason for dropped transactions
+
+    def __repr__(self):
+        return f"PreflightResult(ok={self.ok}, gas_limit={self.gas_limit}, output_amount={self.output_amount}, error={self.error!r})"
+
+def _default_post(rpc_url, payload):
+    response = requests.post(rpc_url, json=payload, timeout=DEFAULT_RPC_TIMEOUT)
+    response.raise_for_status()
+    return response.json()
+
+def preflight_transactions(rpc, txs, block="latest", gas_margin=DEFAULT_GAS_MARGIN, chain="Ethereum"):
+    """
+    Simulate a batch of transactions with eth_call and eth_estimateGas in ONE JSON-RPC batch.
+
+    :param rpc: JSON-RPC endpoint URL of the target chain, or a transport exposing post(payload)
+                (e.g. core.transport.HedgedTransport).
+    :param txs: List of transaction dictionaries (needs "to" and "data"; "from"/"value" optional).
+    :param block: Block tag the calls are simulated against.
+    :param gas_margin: Fractional headroom added to each gas estimate.
+    :param chain: Chain name (used for metrics).
+    :return: List of PreflightResult, aligned with `txs`.
+    """
+    if not txs:
+        return []
+    payload = []
+    for i, tx in enumerate(txs):
+        call = _to_call_object(tx)
+        payload.append({"jsonrpc": "2.0", "id": 2 * i, "method": "eth_call", "params": [call, block]})
+        payload.append({"jsonrpc": "2.0", "id": 2 * i + 1, "method": "eth_estimateGas", "params": [call]})
+
+    with rpc_call(chain, "preflight_batch"):
+        responses = rpc.post(payload) if hasattr(rpc, "post") else _default_post(rpc, payload)
+    if isinstance(responses, dict):
+        # A node that rejects the whole batch answers with a single error object.
+        raise RuntimeError(f"Pre-flight batch rejected: {responses.get('error', responses)}")
+    by_id = {response.get("id"): response for response in responses}
+
+    results = []
+    for i, tx in enumerate(txs):
+        call_response = by_id.get(2 * i, {"error": {"message": "missing eth_call response"}})
+        gas_response = by_id.get(2 * i + 1, {"error": {"message": "missing eth_estimateGas response"}})
+        if "error" in call_response:
+            results.append(PreflightResult(tx, False, error=decode_revert_reason(call_response["error"])))
+            continue
+        if "error" in gas_response:
+            results.append(PreflightResult(tx, False, error=decode_revert_reason(gas_response["error"])))
+            continue
+
+        output_amount = None
+        returned = call_response.get("result") or "0x"
+        if len(returned) == 66:  # a single 32-byte word: swapExactTokens' uint256 outputAmount
+            output_amount = int(returned, 16)
+        estimate = int(gas_response["result"], 16)
+        gas_limit = estimate + round(estimate * gas_margin)
+        results.append(PreflightResult(tx, True, gas_limit=gas_limit, output_amount=output_amount))
+    return results
+
+def filter_executable(results):
+    """
+    Split pre-flight results into transactions worth sending and those that would revert.
+
+    :param results: List of PreflightResult.
+    :return: Tuple (executable, dropped). Executable transactions have "gas" set to the estimate.
+    """
+    executable, dropped = [], []
+    for result in results:
+        if result.ok:
+            executable.append(dict(result.tx, gas=result.gas_limit))
+        else:
+            dropped.append(result)
+    return executable, dropped
+
+if __name__ == "__main__":
+    import os
+    import time
+
+    rpc_url = os.getenv("ETH_RPC", "http://127.0.0.1:8545")
+    router = os.getenv("SWAP_ROUTER_ADDRESS", "0x0000000000000000000000000000000000000000")
+    zero = "0x0000000000000000000000000000000000000000"
+    # A swap with an expired deadline should be dropped by the pre-flight stage.
+    data = encode_swap_exact_tokens(zero, zero, 10, 9, zero, int(time.time()) - 60)
+    for result in preflight_transactions(rpc_url, [{"to": router, "data": data}]):
+        print(result)
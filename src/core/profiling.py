@@ -0,0 +1,276 @@
+#!/usr/bin/env python
+# src/core/profiling.py
+
+import itertools
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+# Supported on-demand profiling modes:
+#   - "sample": statistical sampling of the profiled thread's stack (low overhead).
+#   - "trace":  deterministic tracing of every call/return (exact, higher overhead).
+PROFILE_MODES = ("sample", "trace")
+
+DEFAULT_PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+DEFAULT_SAMPLE_INTERVAL = 0.001  # seconds between samples for on-demand sampling
+
+# Distinguishes profiles written by the same thread within one clock tick.
+_profile_ids = itertools.count()
+
+# -----------------------------
+# Collapsed-stack Helpers
+# -----------------------------
+def _frame_name(code):
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+def fold_frame(frame):
+    """
+    Convert a frame into a collapsed stack string ("outer;...;inner").
+
+    :param frame: Innermost Python frame.
+    :return: Semicolon-separated stack, outermost frame first.
+    """
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame.f_code))
+        frame = frame.f_back
+    names.reverse()
+    return ";".join(names)
+
+def write_collapsed(stacks, path):
+    """
+    Write stacks in the collapsed format consumed by flamegraph.pl / speedscope / inferno.
+
+    :param stacks: Mapping of collapsed stack string to weight (samples or microseconds).
+    :param path: Output file path.
+    :return: The output path.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as f:
+        for stack, weight in sorted(stacks.items()):
+            if weight > 0:
+                f.write(f"{stack} {int(weight)}\n")
+    return path
+
+# -----------------------------
+# Sampling Profiler
+# -----------------------------
+class StackSampler:
+    """
+    Periodically samples Python stacks from a background thread.
+    When `thread_id` is given only that thread is sampled, otherwise every thread
+    except the sampler itself.
+    """
+    def __init__(self, interval=DEFAULT_SAMPLE_INTERVAL, thread_id=None):
+        self.interval = interval
+        self.thread_id = thread_id
+        self.stacks = Counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def take(self):
+        """
+        Return the collected stacks and reset the sampler's counters.
+        """
+        with self._lock:
+            stacks, self.stacks = self.stacks, Counter()
+        return stacks
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            with self._lock:
+                for tid, frame in frames.items():
+                    if tid == own_id or (self.thread_id is not None and tid != self.thread_id):
+                        continue
+                    self.stacks[fold_frame(frame)] += 1
+
+# -----------------------------
+# Deterministic Tracing Profiler
+# -----------------------------
+class TracingProfiler:
+    """
+    Deterministic profiler built on sys.setprofile for the calling thread.
+    Self time of every call is attributed to its full stack, in microseconds,
+    so the output can be rendered directly as a flamegraph.
+    """
+    def __init__(self):
+        self.stacks = Counter()
+        self._stack = []  # entries: [collapsed_stack, start_time, child_time]
+
+    def start(self):
+        sys.setprofile(self._callback)
+        return self
+
+    def stop(self):
+        sys.setprofile(None)
+        now = time.perf_counter()
+        # Close frames still open when profiling stopped.
+        while self._stack:
+            self._pop(now)
+
+    def _callback(self, frame, event, arg):
+        now = time.perf_counter()
+        if event == "call":
+            self._push(_frame_name(frame.f_code), now)
+        elif event == "c_call":
+            self._push(f"<builtin>:{getattr(arg, '__qualname__', getattr(arg, '__name__', 'c_function'))}", now)
+        elif event in ("return", "c_return", "c_exception"):
+            # Returns from frames entered before profiling started are ignored.
+            if self._stack:
+                self._pop(now)
+
+    def _push(self, name, now):
+        parent = self._stack[-1][0] if self._stack else None
+        self._stack.append([f"{parent};{name}" if parent else name, now, 0.0])
+
+    def _pop(self, now):
+        stack, start, child_time = self._stack.pop()
+        elapsed = now - start
+        self.stacks[stack] += (elapsed - child_time) * 1e6
+        if self._stack:
+            self._stack[-1][2] += elapsed
+
+# -----------------------------
+# On-demand Request Profiling
+# -----------------------------
+class ProfileResult:
+    def __init__(self, mode):
+        self.mode = mode
+        self.path = None
+
+@contextmanager
+def profile_request(mode, output_dir=DEFAULT_PROFILE_DIR, label="request", interval=DEFAULT_SAMPLE_INTERVAL):
+    """
+    Profile the enclosed block on the calling thread and dump a collapsed-stack file.
+
+    :param mode: One of PROFILE_MODES ("sample" or "trace"), or None to disable profiling.
+    :param output_dir: Directory receiving the .folded profile.
+    :param label: Prefix used in the output file name.
+    :param interval: Sampling interval in seconds (sample mode only).
+    :return: ProfileResult whose `path` is set once the block exits.
+    """
+    result = ProfileResult(mode)
+    if mode is None:
+        yield result
+        return
+    if mode not in PROFILE_MODES:
+        raise ValueError(f"Unknown profiling mode {mode!r}; expected one of {PROFILE_MODES}")
+
+    if mode == "sample":
+        profiler = StackSampler(interval=interval, thread_id=threading.get_ident()).start()
+    else:
+        profiler = TracingProfiler().start()
+    try:
+        yield result
+    finally:
+        profiler.stop()
+        filename = (f"{label}-{mode}-{time.strftime('%Y%m%d-%H%M%S')}-{time.time_ns()}"
+                    f"-{os.getpid()}-{next(_profile_ids)}.folded")
+        result.path = write_collapsed(profiler.stacks, os.path.join(output_dir, filename))
+
+# -----------------------------
+# Continuous Low-rate Sampling
+# -----------------------------
+class ContinuousSampler:
+    """
+    Low-rate sampler for production use. Every `window` seconds the collected stacks
+    are written to `output_dir`, keeping only the newest `max_files` profiles (a
+    bounded on-disk ring).
+    """
+    def __init__(self, output_dir, hz=19, window=60.0, max_files=60):
+        self.output_dir = output_dir
+        self.window = window
+        self.max_files = max_files
+        self._sampler = StackSampler(interval=1.0 / hz)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        self._sampler.start()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="continuous-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._sampler.stop()
+        self.flush()
+
+    def flush(self):
+        """
+        Write the stacks collected since the last flush and trim the ring.
+
+        :return: Path of the written profile, or None if nothing was sampled.
+        """
+        stacks = self._sampler.take()
+        if not stacks:
+            return None
+        filename = f"continuous-{time.strftime('%Y%m%d-%H%M%S')}-{time.time_ns()}.folded"
+        path = write_collapsed(stacks, os.path.join(self.output_dir, filename))
+        self._trim()
+        return path
+
+    def _trim(self):
+        profiles = sorted(
+            f for f in os.listdir(self.output_dir)
+            if f.startswith("continuous-") and f.endswith(".folded")
+        )
+        for old in profiles[:-self.max_files] if self.max_files > 0 else profiles:
+            try:
+                os.remove(os.path.join(self.output_dir, old))
+            except OSError:
+                pass
+
+    def _run(self):
+        while not self._stop.wait(self.window):
+            self.flush()
+
+def continuous_sampler_from_env():
+    """
+    Build a ContinuousSampler from PROFILE_CONTINUOUS_* environment variables.
+
+    :return: An unstarted ContinuousSampler, or None if PROFILE_CONTINUOUS_DIR is unset.
+    """
+    output_dir = os.getenv("PROFILE_CONTINUOUS_DIR")
+    if not output_dir:
+        return None
+    return ContinuousSampler(
+        output_dir,
+        hz=float(os.getenv("PROFILE_CONTINUOUS_HZ", "19")),
+        window=float(os.getenv("PROFILE_CONTINUOUS_WINDOW", "60")),
+        max_files=int(os.getenv("PROFILE_CONTINUOUS_MAX_FILES", "60")),
+    )
+
+if __name__ == "__main__":
+    def busy(n):
+        return sum(i * i for i in range(n))
+
+    for mode in PROFILE_MODES:
+        with profile_request(mode, label="demo") as profile:
+            busy(200000)
+        print(f"{mode} profile written to {profile.path}")
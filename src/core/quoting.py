@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+# src/core/quoting.py
+
+import numpy as np
+
+# Fee amounts are expressed in basis points of the input amount.
+FEE_DENOMINATOR = 10000
+UINT256_MAX = 2**256 - 1
+
+# Fee models:
+#   - "aggregator": the fee (if any) is deducted from the input with truncating division,
+#     then LiquidityAggregator.executeSwap arithmetic is applied. With fee_bps=0 this is
+#     exactly the deployed contract.
+#   - "uniswap_v2": UniswapV2Library.getAmountOut, generalised to any fee in basis points.
+FEE_MODELS = ("aggregator", "uniswap_v2")
+
+# Largest operands for which every intermediate product of the fast path fits in int64
+# (the uniswap_v2 numerator also carries the 10000x fee scaling).
+_INT64_SAFE = {"aggregator": 2**31 - 1, "uniswap_v2": 2**24 - 1}
+
+# -----------------------------
+# Single Exact Quote
+# -----------------------------
+def get_amount_out(amount_in, reserve_in, reserve_out, fee_bps=0, fee_model="aggregator"):
+    """
+    Compute the exact output of a swap using the contract's truncating uint256 arithmetic.
+
+    :param amount_in: Amount of input tokens (integer, smallest unit).
+    :param reserve_in: Reserve of the input token (integer).
+    :param reserve_out: Reserve of the output token (integer).
+    :param fee_bps: Swap fee in basis points (default: 0, as in LiquidityAggregator).
+    :param fee_model: One of FEE_MODELS.
+    :return: Integer output amount, identical to what the contract would transfer.
+    :raises ValueError: If the contract would revert (no liquidity, uint256 overflow).
+    """
+    amount_in, reserve_in, reserve_out = int(amount_in), int(reserve_in), int(reserve_out)
+    if amount_in < 0 or not 0 <= fee_bps < FEE_DENOMINATOR:
+        raise ValueError("amount_in must be non-negative and fee_bps within [0, 10000)")
+    if reserve_in <= 0 or reserve_out <= 0:
+        raise ValueError("insufficient liquidity")
+
+    if fee_model == "aggregator":
+        if fee_bps:
+            amount_in = amount_in * (FEE_DENOMINATOR - fee_bps) // FEE_DENOMINATOR
+        new_reserve_in = reserve_in + amount_in
+        product = reserve_in * reserve_out
+        if new_reserve_in > UINT256_MAX or product > UINT256_MAX:
+            raise ValueError("uint256 overflow")
+        # output = reserveOut - (reserveIn * reserveOut / (reserveIn + inputAmount))
+        return reserve_out - product // new_reserve_in
+    if fee_model == "uniswap_v2":
+        amount_in_with_fee = amount_in * (FEE_DENOMINATOR - fee_bps)
+        numerator = amount_in_with_fee * reserve_out
+        denominator = reserve_in * FEE_DENOMINATOR + amount_in_with_fee
+        if numerator > UINT256_MAX or denominator > UINT256_MAX:
+            raise ValueError("uint256 overflow")
+        return numerator // denominator
+    raise ValueError(f"Unknown fee model {fee_model!r}; expected one of {FEE_MODELS}")
+
+# -----------------------------
+# Batched Exact Quotes
+# -----------------------------
+def quote_batch(amount_in, reserves_in, reserves_out, fee_bps=0, fee_model="aggregator"):
+    """
+    Exact outputs for many pools (or many amounts) at once.
+
+    Small operands are quoted with vectorised int64 numpy arithmetic; anything that could
+    overflow int64 (e.g. 18-decimal reserves) falls back to a tight loop over Python ints,
+    which are exact at any width. Pools the contract would reject quote as 0.
+
+    :param amount_in: Input amount, either a scalar or a sequence aligned with the reserves.
+    :param reserves_in: Sequence of input-token reserves.
+    :param reserves_out: Sequence of output-token reserves.
+    :param fee_bps: Swap fee in basis points.
+    :param fee_model: One of FEE_MODELS.
+    :return: List of integer outputs.
+    :raises ValueError: On a negative amount or fee_bps outside [0, 10000), as get_amount_out.
+    """
+    if fee_model not in FEE_MODELS:
+        raise ValueError(f"Unknown fee model {fee_model!r}; expected one of {FEE_MODELS}")
+    if not 0 <= fee_bps < FEE_DENOMINATOR:
+        raise ValueError("amount_in must be non-negative and fee_bps within [0, 10000)")
+    reserves_in = list(reserves_in)
+    reserves_out = list(reserves_out)
+    if len(reserves_in) != len(reserves_out):
+        raise ValueError("reserves_in and reserves_out must have the same length")
+    n = len(reserves_in)
+    if n == 0:
+        return []
+    amounts = [int(amount_in)] * n if np.isscalar(amount_in) else [int(a) for a in amount_in]
+    if len(amounts) != n:
+        raise ValueError("amount_in must be a scalar or match the number of reserves")
+    if min(amounts) < 0:
+        raise ValueError("amount_in must be non-negative and fee_bps within [0, 10000)")
+
+    if _fits_int64(_INT64_SAFE[fee_model], amounts, reserves_in, reserves_out):
+        return _quote_batch_int64(amounts, reserves_in, reserves_out, fee_bps, fee_model)
+    return _quote_batch_bigint(amounts, reserves_in, reserves_out, fee_bps, fee_model)
+
+def _fits_int64(limit, *columns):
+    for column in columns:
+        if max(column) > limit or min(column) < 0:
+            return False
+    return True
+
+def _quote_batch_int64(amounts, reserves_in, reserves_out, fee_bps, fee_model):
+    a = np.asarray(amounts, dtype=np.int64)
+    r_in = np.asarray(reserves_in, dtype=np.int64)
+    r_out = np.asarray(reserves_out, dtype=np.int64)
+    valid = (r_in > 0) & (r_out > 0)
+    safe_in = np.where(valid, r_in, 1)
+    if fee_model == "aggregator":
+        if fee_bps:
+            a = a * (FEE_DENOMINATOR - fee_bps) // FEE_DENOMINATOR
+        out = r_out - (safe_in * r_out) // (safe_in + a)
+    else:
+        a_fee = a * (FEE_DENOMINATOR - fee_bps)
+        out = (a_fee * r_out) // (safe_in * FEE_DENOMINATOR + a_fee)
+    return np.where(valid, out, 0).tolist()
+
+def _quote_batch_bigint(amounts, reserves_in, reserves_out, fee_bps, fee_model):
+    keep = FEE_DENOMINATOR - fee_bps
+    outputs = []
+    append = outputs.append
+    if fee_model == "aggregator":
+        for a, x, y in zip(amounts, reserves_in, reserves_out):
+            if x <= 0 or y <= 0:
+                append(0)
+                continue
+            if fee_bps:
+                a = a * keep // FEE_DENOMINATOR
+            product = x * y
+            new_x = x + a
+            append(0 if product > UINT256_MAX or new_x > UINT256_MAX else y - product // new_x)
+    else:
+        for a, x, y in zip(amounts, reserves_in, reserves_out):
+            if x <= 0 or y <= 0:
+                append(0)
+                continue
+            a_fee = a * keep
+            numerator = a_fee * y
+            denominator = x * FEE_DENOMINATOR + a_fee
+            append(0 if numerator > UINT256_MAX or denominator > UINT256_MAX else numerator // denominator)
+    return outputs
+
+if __name__ == "__main__":
+    # Contract-exact quote vs. the float CPMM estimate.
+    reserve_in, reserve_out, amount = 10**21 + 7, 3 * 10**21 + 11, 10**18 + 3
+    exact = get_amount_out(amount, reserve_in, reserve_out)
+    approx = reserve_out - (reserve_in * reserve_out) / (reserve_in + amount)
+    print(f"Exact output: {exact}")
+    print(f"Float output: {approx:.0f} (difference: {approx - exact:.0f})")
+    print("Batched quotes:", quote_batch(10, [100, 150, 0], [100, 150, 10]))
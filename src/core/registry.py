@@ -0,0 +1,404 @@
+#!/usr/bin/env python
+# src/core/registry.py
+
+import argparse
+import json
+import os
+import sqlite3
+import threading
+from contextlib import closing
+from dataclasses import dataclass, asdict, replace
+from typing import Optional
+
+# keccak256("PairCreated(address,address,address,uint256)") emitted by Uniswap V2-style factories.
+PAIR_CREATED_TOPIC = "0x0d3648bd0f6ba80134a33ba9275ac585d9d315f0ad8355cddefde31afa28d0e9"
+GET_RESERVES_SELECTOR = "0x0902f1ac"  # getReserves() of Uniswap V2-style pairs
+DEFAULT_LOG_CHUNK = 5000  # blocks per eth_getLogs request
+DEFAULT_REGISTRY_PATH = os.getenv("POOL_REGISTRY", "")
+SQLITE_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+
+def _normalize(token):
+    return token.lower() if isinstance(token, str) else token
+
+def pair_key(token_a, token_b):
+    """
+    :return: Order-independent key for a token pair.
+    """
+    a, b = _normalize(token_a), _normalize(token_b)
+    return (a, b) if a <= b else (b, a)
+
+# -----------------------------
+# Registry Entry
+# -----------------------------
+@dataclass(frozen=True, slots=True)
+class PoolEntry:
+    chain: str                      # Blockchain network
+    address: str                    # Pair contract address
+    token0: str                     # Pair's token0 address
+    token1: str                     # Pair's token1 address
+    dex: str = ""                   # DEX name (e.g. "Uniswap")
+    tvl: Optional[float] = None     # Total value locked (as last measured; None = never measured)
+    block: Optional[int] = None     # Block the pair was created in
+
+    @property
+    def key(self):
+        return (self.chain, self.address)
+
+# -----------------------------
+# Pool Registry
+# -----------------------------
+class PoolRegistry:
+    """
+    In-memory index of known pools, persisted to JSON or SQLite.
+
+    Pools are indexed by (chain, address), by (chain, unordered token pair) and by
+    (chain, token), so candidate pools for a swap are found with dictionary lookups
+    instead of scanning every pool.
+    """
+    def __init__(self, entries=()):
+        self._lock = threading.RLock()
+        self._entries = {}
+        self._by_pair = {}
+        self._by_token = {}
+        self.chains = set()
+        self.scan_cursors = {}   # (chain, factory) -> last scanned block
+        for entry in entries:
+            self.add(entry)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __iter__(self):
+        return iter(list(self._entries.values()))
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, chain, address):
+        return self._entries.get((chain, _normalize(address)))
+
+    def add(self, entry):
+        """
+        Insert or replace a pool.
+        """
+        entry = replace(entry, address=_normalize(entry.address),
+                        token0=_normalize(entry.token0), token1=_normalize(entry.token1))
+        with self._lock:
+            if entry.key in self._entries:
+                self._unindex(self._entries[entry.key])
+            self._entries[entry.key] = entry
+            self._by_pair.setdefault((entry.chain, pair_key(entry.token0, entry.token1)), {})[entry.key] = entry
+            for token in (entry.token0, entry.token1):
+                self._by_token.setdefault((entry.chain, token), {})[entry.key] = entry
+            self.chains.add(entry.chain)
+        return entry
+
+    def remove(self, chain, address):
+        with self._lock:
+            entry = self._entries.pop((chain, _normalize(address)), None)
+            if entry is not None:
+                self._unindex(entry)
+            return entry
+
+    def _unindex(self, entry):
+        for index, key in ((self._by_pair, (entry.chain, pair_key(entry.token0, entry.token1))),
+                           (self._by_token, (entry.chain, entry.token0)),
+                           (self._by_token, (entry.chain, entry.token1))):
+            bucket = index.get(key)
+            if bucket is not None:
+                bucket.pop(entry.key, None)
+                if not bucket:
+                    del index[key]
+
+    def pools_for_pair(self, token_a, token_b, chain=None):
+        """
+        :return: Pools trading token_a against token_b (in either order), optionally on one chain.
+        """
+        key = pair_key(token_a, token_b)
+        chains = [chain] if chain is not None else sorted(self.chains)
+        return [entry for c in chains for entry in self._by_pair.get((c, key), {}).values()]
+
+    def pools_for_token(self, token, chain=None):
+        """
+        :return: Pools containing `token`, optionally on one chain.
+        """
+        token = _normalize(token)
+        chains = [chain] if chain is not None else sorted(self.chains)
+        return [entry for c in chains for entry in self._by_token.get((c, token), {}).values()]
+
+    def set_tvl(self, chain, address, tvl):
+        entry = self.get(chain, address)
+        if entry is not None:
+            self.add(replace(entry, tvl=None if tvl is None else float(tvl)))
+
+    def prune(self, min_tvl, tvl_of=None):
+        """
+        Drop dust pools whose TVL is below `min_tvl`. Pools whose TVL has never been
+        measured (e.g. freshly scanned ones) are kept.
+
+        :param min_tvl: Threshold in the same unit as PoolEntry.tvl.
+        :param tvl_of: Optional callable(entry) -> TVL (or None if unknown) used to refresh
+            each entry first.
+        :return: Number of pools removed.
+        """
+        removed = 0
+        with self._lock:
+            for entry in list(self._entries.values()):
+                if tvl_of is not None:
+                    tvl = tvl_of(entry)
+                    if tvl is not None:
+                        entry = self.add(replace(entry, tvl=float(tvl)))
+                if entry.tvl is not None and entry.tvl < min_tvl:
+                    self.remove(entry.chain, entry.address)
+                    removed += 1
+        return removed
+
+    # -- persistence -- #
+
+    def save(self, path):
+        """
+        Write the registry to `path` (SQLite for .db/.sqlite/.sqlite3, JSON otherwise).
+        """
+        with self._lock:
+            if str(path).endswith(SQLITE_SUFFIXES):
+                _save_sqlite(path, self)
+            else:
+                tmp = f"{path}.tmp"
+                with open(tmp, "w") as f:
+                    json.dump({
+                        "pools": [asdict(entry) for entry in self._entries.values()],
+                        "scan_cursors": [[c, f_, b] for (c, f_), b in self.scan_cursors.items()],
+                    }, f)
+                os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load a registry saved with `save`; a missing file yields an empty registry.
+        """
+        registry = cls()
+        if not os.path.exists(path):
+            return registry
+        if str(path).endswith(SQLITE_SUFFIXES):
+            _load_sqlite(path, registry)
+        else:
+            with open(path) as f:
+                data = json.load(f)
+            for row in data.get("pools", []):
+                registry.add(PoolEntry(**row))
+            registry.scan_cursors = {(c, f_): b for c, f_, b in data.get("scan_cursors", [])}
+        return registry
+
+def _save_sqlite(path, registry):
+    # closing() closes the connection; the inner context manager only commits.
+    with closing(sqlite3.connect(path)) as conn, conn:
+        conn.execute("""CREATE TABLE IF NOT EXISTS pools (
+            chain TEXT NOT NULL, address TEXT NOT NULL, token0 TEXT NOT NULL, token1 TEXT NOT NULL,
+            dex TEXT, tvl REAL, block INTEGER, PRIMARY KEY (chain, address))""")
+        conn.execute("""CREATE TABLE IF NOT EXISTS scan_cursors (
+            chain TEXT NOT NULL, factory TEXT NOT NULL, block INTEGER, PRIMARY KEY (chain, factory))""")
+        conn.execute("DELETE FROM pools")
+        conn.executemany(
+            "INSERT INTO pools VALUES (?, ?, ?, ?, ?, ?, ?)",
+            ((e.chain, e.address, e.token0, e.token1, e.dex, e.tvl, e.block) for e in registry._entries.values()),
+        )
+        conn.executemany("INSERT OR REPLACE INTO scan_cursors VALUES (?, ?, ?)",
+                         ((c, f, b) for (c, f), b in registry.scan_cursors.items()))
+
+def _load_sqlite(path, registry):
+    with closing(sqlite3.connect(path)) as conn:
+        for row in conn.execute("SELECT chain, address, token0, token1, dex, tvl, block FROM pools"):
+            registry.add(PoolEntry(*row))
+        try:
+            registry.scan_cursors = {(c, f): b for c, f, b in conn.execute("SELECT chain, factory, block FROM scan_cursors")}
+        except sqlite3.OperationalError:
+            pass
+
+_default_registry = None
+_default_registry_lock = threading.Lock()
+
+def load_registry_from_env():
+    """
+    :return: The registry at POOL_REGISTRY (loaded once), or None if unset.
+    """
+    global _default_registry
+    if not DEFAULT_REGISTRY_PATH:
+        return None
+    with _default_registry_lock:
+        if _default_registry is None:
+            _default_registry = PoolRegistry.load(DEFAULT_REGISTRY_PATH)
+        return _default_registry
+
+# -----------------------------
+# Factory Log Scanning
+# -----------------------------
+def _topic_address(topic):
+    return "0x" + topic[-40:].lower()
+
+def decode_pair_created(log, chain, dex=""):
+    """
+    Decode a PairCreated(token0 indexed, token1 indexed, pair, allPairsLength) log.
+
+    :return: PoolEntry.
+    """
+    data = log["data"][2:] if log["data"].startswith("0x") else log["data"]
+    block = log.get("blockNumber")
+    return PoolEntry(
+        chain=chain,
+        address="0x" + data[24:64].lower(),
+        token0=_topic_address(log["topics"][1]),
+        token1=_topic_address(log["topics"][2]),
+        dex=dex,
+        block=int(block, 16) if isinstance(block, str) else block,
+    )
+
+def scan_pair_created(registry, rpc, chain, factory, from_block, to_block, dex="", chunk=DEFAULT_LOG_CHUNK):
+    """
+    Add every pair created by `factory` in [from_block, to_block] to the registry.
+
+    Ranges are fetched `chunk` blocks at a time; a failing range (e.g. a provider's
+    result-size limit) is retried in halves. The last scanned block is recorded in
+    `registry.scan_cursors` so later scans can resume from it.
+
+    :param rpc: Object with call(method, params), e.g. core.transport.HedgedTransport.
+    :return: Number of pools added.
+    """
+    factory = factory.lower()
+    added = 0
+    start = from_block
+    size = chunk
+    while start <= to_block:
+        end = min(start + size - 1, to_block)
+        try:
+            logs = rpc.call("eth_getLogs", [{
+                "address": factory,
+                "topics": [PAIR_CREATED_TOPIC],
+                "fromBlock": hex(start),
+                "toBlock": hex(end),
+            }])
+        except Exception:
+            if size == 1:
+                raise
+            size = max(1, size // 2)
+            continue
+        for log in logs or []:
+            registry.add(decode_pair_created(log, chain, dex))
+            added += 1
+        registry.scan_cursors[(chain, factory)] = end
+        start = end + 1
+        size = chunk
+    return added
+
+# -----------------------------
+# TVL Measurement
+# -----------------------------
+# Stablecoins TVL is measured against by default: address -> (decimals, USD price).
+DEFAULT_QUOTE_TOKENS = {
+    "Ethereum": {
+        "0xa0b86991c6218b36c1d19d4a2e9eb0ce3606eb48": (6, 1.0),   # USDC
+        "0xdac17f958d2ee523a2206206994597c13d831ec7": (6, 1.0),   # USDT
+        "0x6b175474e89094c44da98b954eedeac495271d0f": (18, 1.0),  # DAI
+    },
+    "BSC": {
+        "0x55d398326f99059ff775485246999027b3197955": (18, 1.0),  # USDT
+        "0xe9e7cea3dedca5984780bafc599bd69add087d56": (18, 1.0),  # BUSD
+        "0x8ac76a51cc950d9822d68b83fe1ad97b32cd580d": (18, 1.0),  # USDC
+    },
+}
+
+def fetch_reserves(rpc, address):
+    """
+    Call getReserves() on a Uniswap V2-style pair.
+
+    :return: Tuple (reserve0, reserve1) in the pair's token order.
+    """
+    result = rpc.call("eth_call", [{"to": address, "data": GET_RESERVES_SELECTOR}, "latest"])
+    data = result[2:] if result.startswith("0x") else result
+    if len(data) < 128:
+        raise ValueError(f"Unexpected getReserves() result from {address}: {result!r}")
+    return int(data[0:64], 16), int(data[64:128], 16)
+
+def reserve_tvl(rpc_for, quote_tokens=None):
+    """
+    Build a `tvl_of` callable for PoolRegistry.prune that measures each pool's TVL from
+    its on-chain reserves, priced through a quote token it holds: a constant-product
+    pool holds equal value on both sides, so TVL = 2 × quote reserve × quote price.
+
+    :param rpc_for: Callable(chain) -> object with call(method, params), or None.
+    :param quote_tokens: Dict chain -> {token address: (decimals, price)} (default:
+        DEFAULT_QUOTE_TOKENS, i.e. TVL in USD).
+    :return: Callable(entry) -> TVL, or None when the pool holds no quote token or its
+        reserves cannot be read (such pools are kept by prune).
+    """
+    quote_tokens = DEFAULT_QUOTE_TOKENS if quote_tokens is None else quote_tokens
+
+    def tvl_of(entry):
+        quotes = {_normalize(token): value for token, value in quote_tokens.get(entry.chain, {}).items()}
+        side = 0 if entry.token0 in quotes else 1 if entry.token1 in quotes else None
+        rpc = rpc_for(entry.chain) if side is not None else None
+        if rpc is None:
+            return None
+        try:
+            reserves = fetch_reserves(rpc, entry.address)
+        except Exception as e:
+            print(f"⚠️ Warning: could not read reserves of {entry.address} on {entry.chain}: {e}")
+            return None
+        decimals, price = quotes[(entry.token0, entry.token1)[side]]
+        return 2 * reserves[side] / 10**decimals * price
+
+    return tvl_of
+
+def _parse_quote_token(value):
+    # ADDRESS:DECIMALS[:PRICE]
+    parts = value.split(":")
+    if len(parts) not in (2, 3):
+        raise argparse.ArgumentTypeError("expected ADDRESS:DECIMALS[:PRICE]")
+    return _normalize(parts[0]), (int(parts[1]), float(parts[2]) if len(parts) == 3 else 1.0)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Maintain the local pool registry.")
+    parser.add_argument("--registry", type=str, default=DEFAULT_REGISTRY_PATH or "pools.db", help="Registry file (.db or .json)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    scan = sub.add_parser("scan", help="Scan a factory's PairCreated logs")
+    scan.add_argument("--chain", type=str, default="Ethereum")
+    scan.add_argument("--factory", type=str, required=True)
+    scan.add_argument("--dex", type=str, default="")
+    scan.add_argument("--from_block", type=int, default=None, help="Defaults to the saved cursor + 1")
+    scan.add_argument("--to_block", type=int, required=True)
+    prune = sub.add_parser("prune", help="Measure TVL from on-chain reserves and drop pools below a threshold")
+    prune.add_argument("--min_tvl", type=float, required=True, help="Threshold in quote-token value (USD by default)")
+    prune.add_argument("--quote_token", type=_parse_quote_token, action="append", default=None,
+                       metavar="ADDRESS:DECIMALS[:PRICE]",
+                       help="Price TVL through this token (repeatable; default: USD stablecoins of each chain)")
+    prune.add_argument("--no_measure", action="store_true", help="Prune on the stored TVL without RPC calls")
+    lookup = sub.add_parser("lookup", help="List pools for a token pair")
+    lookup.add_argument("token_a")
+    lookup.add_argument("token_b")
+    args = parser.parse_args(argv)
+
+    from core.transport import get_transport
+    registry = PoolRegistry.load(args.registry)
+    if args.command == "scan":
+        transport = get_transport(args.chain)
+        if transport is None:
+            raise SystemExit(f"No RPC endpoint configured for {args.chain}")
+        from_block = args.from_block
+        if from_block is None:
+            from_block = registry.scan_cursors.get((args.chain, args.factory.lower()), -1) + 1
+        added = scan_pair_created(registry, transport, args.chain, args.factory, from_block, args.to_block, dex=args.dex)
+        registry.save(args.registry)
+        print(f"Added {added} pools; registry holds {len(registry)}")
+    elif args.command == "prune":
+        quote_tokens = None
+        if args.quote_token:
+            quote_tokens = {chain: dict(args.quote_token) for chain in registry.chains}
+        tvl_of = None if args.no_measure else reserve_tvl(get_transport, quote_tokens)
+        removed = registry.prune(args.min_tvl, tvl_of=tvl_of)
+        registry.save(args.registry)
+        print(f"Removed {removed} pools; registry holds {len(registry)}")
+    else:
+        for entry in registry.pools_for_pair(args.token_a, args.token_b):
+            print(json.dumps(asdict(entry)))
+
+if __name__ == "__main__":
+    main()
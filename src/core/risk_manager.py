@@ -4,6 +4,7 @@
 import os
 from web3 import Web3
 from dotenv import load_dotenv
+from core.transport import get_transport, HedgedProvider
 
 # Load environment variables
 load_dotenv()
@@ -12,10 +13,10 @@ ETH_RPC = os.getenv("ETH_RPC")
 BSC_RPC = os.getenv("BSC_RPC")
 INJECTIVE_RPC = os.getenv("INJECTIVE_RPC")  # Injective is not EVM, special handling needed
 
-# Set up Web3 providers for EVM-compatible chains.
+# Set up Web3 providers for EVM-compatible chains, hedged across all configured endpoints.
 web3_providers = {
-    "Ethereum": Web3(Web3.HTTPProvider(ETH_RPC)) if ETH_RPC else None,
-    "BSC": Web3(Web3.HTTPProvider(BSC_RPC)) if BSC_RPC else None,
+    "Ethereum": Web3(HedgedProvider(get_transport("Ethereum"))) if ETH_RPC else None,
+    "BSC": Web3(HedgedProvider(get_transport("BSC"))) if BSC_RPC else None,
 }
 
 def check_slippage(expected_output, actual_output, max_slippage_percent=1.0):
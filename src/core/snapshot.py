@@ -0,0 +1,296 @@
+#!/usr/bin/env python
+# src/core/snapshot.py
+
+import argparse
+import mmap
+import os
+import struct
+import sys
+import time
+from multiprocessing import shared_memory
+
+from core.pools import Pool, as_pool
+
+# -----------------------------
+# Segment Layout
+# -----------------------------
+# Header: magic, sequence (seqlock: odd while a write is in progress), capacity,
+# record count, publish timestamp. Padded to 64 bytes.
+MAGIC = b"DEFAILIQ"
+HEADER = struct.Struct("<8sQQQd")
+HEADER_SIZE = 64
+SEQUENCE_OFFSET = 8
+SEQUENCE = struct.Struct("<Q")
+
+# Record: pool name, chain, address, flags, reserve0 and reserve1 as 256-bit big-endian
+# integers (the same width as the on-chain uint256 reserves). Padded to 176 bytes.
+RECORD = struct.Struct("<32s16s48sB32s32s15x")
+RECORD_SIZE = RECORD.size
+FLAG_ERROR = 0x01
+
+DEFAULT_CAPACITY = 4096
+SHM_DIR = "/dev/shm"  # where Linux exposes POSIX shared memory segments as files
+DEFAULT_SNAPSHOT_NAME = os.getenv("LIQUIDITY_SNAPSHOT", "")
+
+class SnapshotError(Exception):
+    """Raised when a consistent snapshot cannot be read."""
+
+def segment_size(capacity):
+    return HEADER_SIZE + capacity * RECORD_SIZE
+
+def _encode_text(value, width):
+    return (value or "").encode("utf-8")[:width]
+
+def _decode_text(raw):
+    return raw.rstrip(b"\x00").decode("utf-8", errors="replace") or None
+
+def _encode_reserve(value):
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return None
+    if value < 0 or value >= 2**256:
+        return None
+    return value.to_bytes(32, "big")
+
+class _ReadOnlySegment:
+    """
+    Read-only mapping of an existing POSIX shared memory segment, opened through its
+    file under /dev/shm. Unlike SharedMemory(name=...) before Python 3.13, it does not
+    register the segment with this process's resource tracker.
+    """
+    def __init__(self, name):
+        fd = os.open(os.path.join(SHM_DIR, name.lstrip("/")), os.O_RDONLY)
+        try:
+            self._mmap = mmap.mmap(fd, os.fstat(fd).st_size, access=mmap.ACCESS_READ)
+        finally:
+            os.close(fd)
+        self.name = name
+        self.buf = memoryview(self._mmap)
+
+    def close(self):
+        if self.buf is not None:
+            self.buf.release()
+            self.buf = None
+            self._mmap.close()
+
+def _attach(name):
+    """
+    Attach to an existing segment without handing its lifetime to this process.
+    Before Python 3.13 every SharedMemory that attaches registers the segment with its
+    process's resource tracker, which would unlink it when any worker exits.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    if os.path.isdir(SHM_DIR):
+        return _ReadOnlySegment(name)
+    # Windows has no resource tracker; other POSIX systems without /dev/shm (e.g. macOS)
+    # need Python 3.13+ to attach untracked.
+    return shared_memory.SharedMemory(name=name)
+
+# -----------------------------
+# Publisher (single writer)
+# -----------------------------
+class SnapshotPublisher:
+    """
+    Owns the shared-memory segment and publishes reserve tables into it.
+    Exactly one publisher (the ingestion process) may exist per segment.
+    """
+    def __init__(self, name, capacity=DEFAULT_CAPACITY):
+        self.name = name
+        self.capacity = capacity
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=segment_size(capacity))
+        except FileExistsError:
+            # A previous ingestion process died without unlinking; take the segment over.
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=segment_size(capacity))
+        HEADER.pack_into(self.shm.buf, 0, MAGIC, 0, capacity, 0, 0.0)
+
+    @property
+    def sequence(self):
+        return SEQUENCE.unpack_from(self.shm.buf, SEQUENCE_OFFSET)[0]
+
+    def publish(self, pools):
+        """
+        Write a new reserve table. Readers never block; they retry if they observe a
+        write in progress (odd sequence) or a sequence change during their copy.
+
+        :param pools: Iterable of Pool records or liquidity dicts.
+        :return: The new (even) version number.
+        """
+        pools = [as_pool(pool) for pool in pools if pool]
+        if len(pools) > self.capacity:
+            raise ValueError(f"{len(pools)} pools exceed snapshot capacity {self.capacity}")
+        buf = self.shm.buf
+        sequence = self.sequence
+        SEQUENCE.pack_into(buf, SEQUENCE_OFFSET, sequence + 1)  # begin write (odd)
+        offset = HEADER_SIZE
+        for pool in pools:
+            reserve0 = _encode_reserve(pool.token0)
+            reserve1 = _encode_reserve(pool.token1)
+            flags = FLAG_ERROR if pool.error is not None or reserve0 is None or reserve1 is None else 0
+            RECORD.pack_into(
+                buf, offset,
+                _encode_text(pool.pool, 32),
+                _encode_text(pool.chain, 16),
+                _encode_text(pool.address, 48),
+                flags,
+                reserve0 or bytes(32),
+                reserve1 or bytes(32),
+            )
+            offset += RECORD_SIZE
+        HEADER.pack_into(buf, 0, MAGIC, sequence + 1, self.capacity, len(pools), time.time())
+        SEQUENCE.pack_into(buf, SEQUENCE_OFFSET, sequence + 2)  # end write (even)
+        return sequence + 2
+
+    def close(self, unlink=True):
+        self.shm.close()
+        if unlink:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+# -----------------------------
+# Reader (any number of workers)
+# -----------------------------
+class SnapshotReader:
+    """
+    Maps the segment read-only and decodes the reserve table at most once per version:
+    a read of an unchanged snapshot costs one 8-byte sequence load.
+    """
+    def __init__(self, name, max_retries=1000):
+        self.name = name
+        self.max_retries = max_retries
+        self.shm = _attach(name)
+        if bytes(self.shm.buf[:8]) != MAGIC:
+            self.shm.close()
+            raise SnapshotError(f"Shared memory segment {name!r} is not a liquidity snapshot")
+        self._version = None
+        self._pools = []
+        self._published_at = 0.0
+
+    def read(self):
+        """
+        :return: Tuple (version, published_at, list of Pool) for a consistent snapshot.
+        """
+        buf = self.shm.buf
+        for _ in range(self.max_retries):
+            before = SEQUENCE.unpack_from(buf, SEQUENCE_OFFSET)[0]
+            if before & 1:
+                continue  # writer in progress
+            if before == self._version:
+                return self._version, self._published_at, self._pools
+            _, _, _, count, published_at = HEADER.unpack_from(buf, 0)
+            raw = bytes(buf[HEADER_SIZE:HEADER_SIZE + count * RECORD_SIZE])
+            if SEQUENCE.unpack_from(buf, SEQUENCE_OFFSET)[0] != before:
+                continue  # torn read: the table changed while copying
+            self._pools = [self._decode(raw, i * RECORD_SIZE) for i in range(count)]
+            self._version, self._published_at = before, published_at
+            return self._version, self._published_at, self._pools
+        raise SnapshotError(f"Could not read a consistent snapshot from {self.name!r}")
+
+    def pools(self):
+        return self.read()[2]
+
+    @staticmethod
+    def _decode(raw, offset):
+        name, chain, address, flags, reserve0, reserve1 = RECORD.unpack_from(raw, offset)
+        return Pool(
+            pool=_decode_text(name),
+            chain=_decode_text(chain),
+            token0=int.from_bytes(reserve0, "big"),
+            token1=int.from_bytes(reserve1, "big"),
+            address=_decode_text(address),
+            error="unavailable" if flags & FLAG_ERROR else None,
+        )
+
+    def close(self):
+        self.shm.close()
+
+class SnapshotSource:
+    """
+    Long-lived view of a named snapshot for API workers: attaches lazily and re-attaches
+    after a failed or stale read. An ingestion process unlinks its segment on exit and a
+    restarted one publishes into a new segment under the same name, so a reader kept on
+    the old mapping would only ever see the last snapshot before the restart.
+    """
+    def __init__(self, name, max_age=30.0):
+        self.name = name
+        self.max_age = max_age
+        self._reader = None
+
+    def pools(self):
+        """
+        :return: List of Pool records, or None if the snapshot is unavailable or stale.
+        """
+        reader = self._reader
+        if reader is None:
+            try:
+                reader = SnapshotReader(self.name)
+            except (FileNotFoundError, SnapshotError, ValueError):
+                return None
+            self._reader = reader
+        try:
+            version, published_at, pools = reader.read()
+        except (SnapshotError, ValueError):
+            version, published_at, pools = 0, 0.0, None
+        if version == 0 or time.time() - published_at > self.max_age:
+            # Drop the reader (released once unreferenced, so concurrent reads are not cut
+            # off) and attach to whatever segment holds the name on the next call.
+            self._reader = None
+            return None
+        return pools
+
+def open_reader_from_env():
+    """
+    :return: SnapshotReader for the LIQUIDITY_SNAPSHOT segment, or None if unset/unavailable.
+    """
+    if not DEFAULT_SNAPSHOT_NAME:
+        return None
+    try:
+        return SnapshotReader(DEFAULT_SNAPSHOT_NAME)
+    except (FileNotFoundError, SnapshotError):
+        return None
+
+# -----------------------------
+# Ingestion Process
+# -----------------------------
+def run_ingestion(name, interval=3.0, capacity=DEFAULT_CAPACITY, fetch=None, iterations=None):
+    """
+    Fetch liquidity every `interval` seconds and publish it to the shared segment.
+
+    :param name: Shared memory segment name.
+    :param interval: Seconds between refreshes.
+    :param capacity: Maximum number of pools in the segment.
+    :param fetch: Callable returning pools (defaults to core.liquidity.fetch_all_liquidity).
+    :param iterations: Stop after this many publishes (None = run forever).
+    """
+    if fetch is None:
+        from core.liquidity import fetch_all_liquidity as fetch
+    publisher = SnapshotPublisher(name, capacity=capacity)
+    try:
+        count = 0
+        while iterations is None or count < iterations:
+            started = time.monotonic()
+            try:
+                version = publisher.publish(fetch())
+                print(f"Published liquidity snapshot version {version} to {name}")
+            except Exception as e:
+                print(f"❌ Error refreshing liquidity snapshot: {e}")
+            count += 1
+            if iterations is None or count < iterations:
+                time.sleep(max(0.0, interval - (time.monotonic() - started)))
+    finally:
+        publisher.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Publish liquidity into a shared-memory snapshot for API workers.")
+    parser.add_argument("--name", type=str, default=DEFAULT_SNAPSHOT_NAME or "defai_liquidity", help="Segment name")
+    parser.add_argument("--interval", type=float, default=3.0, help="Refresh interval in seconds")
+    parser.add_argument("--capacity", type=int, default=DEFAULT_CAPACITY, help="Maximum number of pools")
+    args = parser.parse_args()
+    run_ingestion(args.name, interval=args.interval, capacity=args.capacity)
@@ -0,0 +1,389 @@
+#!/usr/bin/env python
+# src/core/transport.py
+
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import requests
+from dotenv import load_dotenv
+from web3.providers.base import JSONBaseProvider
+from core.metrics import RPC_HEDGES, rpc_call
+
+# Load environment variables from the .env file
+load_dotenv()
+
+# Each chain accepts a comma-separated list of endpoints, e.g. ETH_RPC=https://a,https://b
+CHAIN_RPC_ENV = {
+    "Ethereum": "ETH_RPC",
+    "BSC": "BSC_RPC",
+}
+
+# Methods that submit state changes and are therefore broadcast to every endpoint.
+SUBMISSION_METHODS = {"eth_sendRawTransaction"}
+
+DEFAULT_RPC_TIMEOUT = 10  # seconds
+
+class RpcTransportError(Exception):
+    """Raised when no endpoint returned a usable response."""
+
+class CircuitOpenError(RpcTransportError):
+    """Raised when an endpoint's breaker refuses a request (open, or its probe is in flight)."""
+
+# -----------------------------
+# Circuit Breaker
+# -----------------------------
+class CircuitBreaker:
+    """
+    Classic closed → open → half-open breaker.
+    After `failure_threshold` consecutive failures the endpoint is skipped for
+    `reset_timeout` seconds, then a single probe request is let through (concurrent
+    callers are refused until it completes): its success closes the breaker again, its
+    failure re-opens it. A probe whose result is never recorded is given up after
+    another `reset_timeout`.
+    """
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_started = None   # Time the in-flight half-open probe was admitted
+
+    def _probe_free(self, now):
+        return self.probe_started is None or now - self.probe_started >= self.reset_timeout
+
+    def available(self):
+        """
+        :return: True if a request could be admitted now (does not claim the probe).
+        """
+        with self._lock:
+            now = self._clock()
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                return now - self.opened_at >= self.reset_timeout
+            return self._probe_free(now)
+
+    def allow(self):
+        """
+        Admit a request: always while closed; once the open period has elapsed, exactly
+        one probe at a time.
+
+        :return: True if the request may be sent.
+        """
+        with self._lock:
+            now = self._clock()
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if now - self.opened_at < self.reset_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+            if not self._probe_free(now):
+                return False
+            self.probe_started = now
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self.probe_started = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self.probe_started = None
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = self._clock()
+
+# -----------------------------
+# Endpoint with Rolling Latency Score
+# -----------------------------
+class Endpoint:
+    def __init__(self, url, window=200, ewma_alpha=0.2, breaker=None):
+        self.url = url
+        self.breaker = breaker or CircuitBreaker()
+        self.ewma_alpha = ewma_alpha
+        self.ewma_latency = None
+        self.latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, latency, ok):
+        with self._lock:
+            if ok:
+                self.latencies.append(latency)
+                if self.ewma_latency is None:
+                    self.ewma_latency = latency
+                else:
+                    self.ewma_latency += self.ewma_alpha * (latency - self.ewma_latency)
+        if ok:
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+
+    def score(self):
+        """
+        Lower is better. Unmeasured endpoints score 0 so they get probed; recent
+        failures inflate the score of an endpoint whose breaker is still closed.
+        """
+        if self.ewma_latency is None:
+            return 0.0
+        return self.ewma_latency * (1 + self.breaker.failures)
+
+    def percentile(self, q):
+        """
+        :param q: Quantile in [0, 1].
+        :return: The q-quantile of recent successful latencies, or None without samples.
+        """
+        with self._lock:
+            samples = sorted(self.latencies)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def __repr__(self):
+        return f"Endpoint({self.url!r}, score={self.score():.4f}, breaker={self.breaker.state})"
+
+def _default_send(url, payload, timeout=DEFAULT_RPC_TIMEOUT):
+    response = requests.post(url, json=payload, timeout=timeout)
+    response.raise_for_status()
+    return response.json()
+
+# -----------------------------
+# Hedged Transport
+# -----------------------------
+class HedgedTransport:
+    """
+    JSON-RPC transport over several redundant endpoints of one chain.
+
+    Reads go to the healthiest, fastest endpoint (lowest rolling latency score). If no
+    answer arrives within the primary's `hedge_percentile` latency, a duplicate request
+    is sent to the next endpoint and the first success wins. Submissions are broadcast
+    to all endpoints. Transport failures (timeouts, HTTP errors) feed each endpoint's
+    circuit breaker; JSON-RPC error responses are valid answers and do not.
+    """
+    def __init__(self, urls, chain="Ethereum", send=None, hedge_percentile=0.9, max_hedges=1,
+                 initial_hedge_delay=0.25, min_hedge_delay=0.005, max_hedge_delay=2.0,
+                 min_samples=10, executor=None):
+        if not urls:
+            raise ValueError(f"No RPC endpoints configured for {chain}")
+        self.chain = chain
+        self.endpoints = [url if isinstance(url, Endpoint) else Endpoint(url) for url in urls]
+        self.hedge_percentile = hedge_percentile
+        self.max_hedges = max_hedges
+        self.initial_hedge_delay = initial_hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.max_hedge_delay = max_hedge_delay
+        self.min_samples = min_samples
+        self._send_fn = send or _default_send
+        self._executor = executor or ThreadPoolExecutor(
+            max_workers=max(4, 4 * len(self.endpoints)), thread_name_prefix=f"rpc-{chain}"
+        )
+        self._ids = itertools.count(1)
+
+    # -- public API -- #
+
+    def request(self, method, params=None):
+        """
+        Issue a single JSON-RPC call and return its full response dictionary.
+        """
+        payload = {"jsonrpc": "2.0", "id": next(self._ids), "method": method, "params": params or []}
+        with rpc_call(self.chain, method):
+            if method in SUBMISSION_METHODS:
+                return self.broadcast(payload)
+            return self.post(payload)
+
+    def call(self, method, params=None):
+        """
+        Issue a single JSON-RPC call and return its result, raising on JSON-RPC errors.
+        """
+        response = self.request(method, params)
+        if "error" in response:
+            raise RpcTransportError(f"{method} failed: {response['error']}")
+        return response.get("result")
+
+    def post(self, payload):
+        """
+        Send a raw JSON-RPC payload (single request or batch) with hedging.
+
+        :param payload: JSON-serialisable request object or list of request objects.
+        :return: Decoded JSON response.
+        """
+        candidates = self.ranked_endpoints()
+        if not candidates:
+            raise RpcTransportError(f"All {self.chain} endpoints are unavailable (circuit open)")
+
+        pending = {}
+        launched = 0
+        hedges = 0
+        last_error = None
+
+        def launch():
+            nonlocal launched
+            endpoint = candidates[launched]
+            launched += 1
+            pending[self._executor.submit(self._send, endpoint, payload)] = endpoint
+
+        launch()
+        while pending:
+            can_hedge = launched < len(candidates) and hedges < self.max_hedges
+            timeout = self.hedge_delay(candidates[0]) if can_hedge else None
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                # The primary is slower than its usual tail: hedge with the next endpoint.
+                hedges += 1
+                RPC_HEDGES.labels(self.chain).inc()
+                launch()
+                continue
+            for future in done:
+                pending.pop(future)
+                try:
+                    return future.result()
+                except Exception as e:
+                    last_error = e
+            # Every finished request failed: fail over immediately if endpoints remain.
+            if launched < len(candidates):
+                launch()
+        raise RpcTransportError(f"All {self.chain} endpoints failed: {last_error}") from last_error
+
+    def broadcast(self, payload):
+        """
+        Send a payload to every available endpoint; return the first successful response.
+        Remaining requests keep running in the background so every endpoint sees it.
+        """
+        candidates = [e for e in self.endpoints if e.breaker.available()]
+        force = not candidates  # every breaker open: try all endpoints anyway
+        pending = [self._executor.submit(self._send, endpoint, payload, force)
+                   for endpoint in candidates or self.endpoints]
+        first_error_response = None
+        last_error = None
+        while pending:
+            done, not_done = wait(pending, return_when=FIRST_COMPLETED)
+            pending = list(not_done)
+            for future in done:
+                try:
+                    response = future.result()
+                except Exception as e:
+                    last_error = e
+                    continue
+                if isinstance(response, dict) and "error" in response:
+                    # e.g. "already known" from a node that heard the tx from a peer first.
+                    first_error_response = first_error_response or response
+                    continue
+                return response
+        if first_error_response is not None:
+            return first_error_response
+        raise RpcTransportError(f"Broadcast to {self.chain} failed: {last_error}") from last_error
+
+    def ranked_endpoints(self):
+        """
+        :return: Endpoints whose breaker allows traffic, best score first.
+        """
+        return sorted((e for e in self.endpoints if e.breaker.available()), key=lambda e: e.score())
+
+    def hedge_delay(self, endpoint):
+        """
+        How long to wait on `endpoint` before sending a hedged duplicate.
+        """
+        if len(endpoint.latencies) < self.min_samples:
+            delay = self.initial_hedge_delay
+        else:
+            delay = endpoint.percentile(self.hedge_percentile)
+        return min(self.max_hedge_delay, max(self.min_hedge_delay, delay))
+
+    # -- internals -- #
+
+    def _send(self, endpoint, payload, force=False):
+        # Admission is decided at send time, so only one probe reaches a half-open endpoint.
+        if not force and not endpoint.breaker.allow():
+            raise CircuitOpenError(f"{endpoint.url} circuit is open")
+        start = time.perf_counter()
+        try:
+            response = self._send_fn(endpoint.url, payload)
+        except Exception:
+            endpoint.record(time.perf_counter() - start, ok=False)
+            raise
+        endpoint.record(time.perf_counter() - start, ok=True)
+        return response
+
+# -----------------------------
+# Web3 Provider
+# -----------------------------
+class HedgedProvider(JSONBaseProvider):
+    """
+    Web3 provider backed by a HedgedTransport, so web3.eth.* calls benefit from
+    endpoint scoring, hedging, broadcast submissions and circuit breakers.
+    """
+    def __init__(self, transport, **kwargs):
+        super().__init__(**kwargs)
+        self.transport = transport
+
+    def make_request(self, method, params):
+        return self.transport.request(method, params)
+
+    def make_batch_request(self, requests_):
+        payload = [
+            {"jsonrpc": "2.0", "id": i, "method": method, "params": params or []}
+            for i, (method, params) in enumerate(requests_)
+        ]
+        responses = self.transport.post(payload)
+        if isinstance(responses, dict):
+            return responses
+        return sorted(responses, key=lambda r: r.get("id", 0))
+
+    def is_connected(self, show_traceback=False):
+        try:
+            return "result" in self.transport.request("web3_clientVersion", [])
+        except Exception:
+            if show_traceback:
+                raise
+            return False
+
+# -----------------------------
+# Per-chain Registry
+# -----------------------------
+_transports = {}
+_transports_lock = threading.Lock()
+
+def parse_endpoints(value):
+    """
+    :param value: Comma-separated endpoint list (e.g. the ETH_RPC environment variable).
+    :return: List of endpoint URLs.
+    """
+    return [url.strip() for url in (value or "").split(",") if url.strip()]
+
+def get_transport(chain):
+    """
+    Return the shared HedgedTransport for a chain, built from its *_RPC environment variable.
+
+    :param chain: Blockchain network ("Ethereum" or "BSC").
+    :return: HedgedTransport, or None if the chain has no endpoints configured.
+    """
+    with _transports_lock:
+        transport = _transports.get(chain)
+        if transport is None:
+            urls = parse_endpoints(os.getenv(CHAIN_RPC_ENV.get(chain, ""), ""))
+            if not urls:
+                return None
+            transport = HedgedTransport(urls, chain=chain)
+            _transports[chain] = transport
+        return transport
+
+if __name__ == "__main__":
+    transport = get_transport("Ethereum")
+    if transport is None:
+        print("Set ETH_RPC to one or more comma-separated endpoints.")
+    else:
+        for _ in range(5):
+            print(transport.call("eth_blockNumber"))
+        print(transport.endpoints)
@@ -5,19 +5,20 @@ import logging
 import sys
 from decimal import Decimal
 
-def setup_logger(name=__name__, level=logging.INFO):
+def setup_logger(name=__name__, level=logging.INFO, stream=None):
     """
     Set up and return a logger with the given name and logging level.
     
     :param name: Name of the logger.
     :param level: Logging level (default: INFO).
+    :param stream: Output stream for log lines (default: sys.stdout).
     :return: Configured logger.
     """
     logger = logging.getLogger(name)
     logger.setLevel(level)
     
     # Create a console handler and set the logging format.
-    ch = logging.StreamHandler(sys.stdout)
+    ch = logging.StreamHandler(stream or sys.stdout)
     ch.setLevel(level)
     formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
     ch.setFormatter(formatter)
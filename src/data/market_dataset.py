@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+# src/data/market_dataset.py
+
+import json
+import os
+import queue
+import threading
+
+import numpy as np
+
+# On-disk layout (one directory per dataset):
+#   reserves.npy    float64 (steps, routes, 2)  reserve_in / reserve_out of each route
+#   volatility.npy  float32 (steps,)            market volatility
+#   slippage.npy    float32 (steps, routes)     realized slippage (%) of each route
+#   meta.json       {"steps": ..., "routes": ...}
+ARRAYS = {
+    "reserves": np.float64,
+    "volatility": np.float32,
+    "slippage": np.float32,
+}
+
+def write_dataset(path, reserves, volatility, slippage):
+    """
+    Write a market dataset as .npy files that can be memory-mapped.
+
+    :param path: Target directory (created if missing).
+    :param reserves: Array-like of shape (steps, routes, 2).
+    :param volatility: Array-like of shape (steps,).
+    :param slippage: Array-like of shape (steps, routes), in percent.
+    :return: The dataset path.
+    """
+    reserves = np.asarray(reserves, dtype=ARRAYS["reserves"])
+    volatility = np.asarray(volatility, dtype=ARRAYS["volatility"])
+    slippage = np.asarray(slippage, dtype=ARRAYS["slippage"])
+    steps, routes = slippage.shape
+    if reserves.shape != (steps, routes, 2) or volatility.shape != (steps,):
+        raise ValueError("reserves must be (steps, routes, 2), volatility (steps,), slippage (steps, routes)")
+    os.makedirs(path, exist_ok=True)
+    for name, array in (("reserves", reserves), ("volatility", volatility), ("slippage", slippage)):
+        out = np.lib.format.open_memmap(os.path.join(path, f"{name}.npy"), mode="w+",
+                                        dtype=array.dtype, shape=array.shape)
+        out[:] = array
+        out.flush()
+        del out
+    with open(os.path.join(path, "meta.json"), "w") as f:
+        json.dump({"steps": int(steps), "routes": int(routes)}, f)
+    return path
+
+# -----------------------------
+# Memory-mapped Dataset
+# -----------------------------
+class MarketDataset:
+    """
+    Read-only, memory-mapped view of a dataset written by `write_dataset`. Opening it
+    costs no I/O; pages are read from disk only when a chunk is copied out.
+    """
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        self.steps = meta["steps"]
+        self.routes = meta["routes"]
+        self.reserves = np.load(os.path.join(path, "reserves.npy"), mmap_mode="r")
+        self.volatility = np.load(os.path.join(path, "volatility.npy"), mmap_mode="r")
+        self.slippage = np.load(os.path.join(path, "slippage.npy"), mmap_mode="r")
+
+    def read(self, start, length, routes=None):
+        """
+        Copy a contiguous window of steps into memory.
+
+        :param start: First step.
+        :param length: Number of steps.
+        :param routes: Optional number of leading routes to keep.
+        :return: Dict of in-memory arrays (reserves, volatility, slippage).
+        """
+        stop = min(start + length, self.steps)
+        routes = routes or self.routes
+        return {
+            "reserves": np.array(self.reserves[start:stop, :routes]),
+            "volatility": np.array(self.volatility[start:stop]),
+            "slippage": np.array(self.slippage[start:stop, :routes]),
+        }
+
+# -----------------------------
+# Chunked Episode Prefetcher
+# -----------------------------
+class EpisodePrefetcher:
+    """
+    Background thread that reads large random chunks of the dataset and cuts them into
+    episodes, keeping up to `prefetch` episodes queued. Disk reads happen off the
+    training thread in big sequential slices, so env.reset() is a queue pop.
+    """
+    def __init__(self, dataset, episode_length, routes=None, chunk_episodes=64, prefetch=256, seed=None):
+        window = episode_length + 1  # one extra step for the first observation
+        if dataset.steps < window:
+            raise ValueError(f"Dataset has {dataset.steps} steps; episodes need {window}")
+        self.dataset = dataset
+        self.episode_length = episode_length
+        self.routes = routes
+        self.chunk_steps = min(dataset.steps, window * chunk_episodes)
+        self._window = window
+        self._rng = np.random.default_rng(seed)
+        self._queue = queue.Queue(maxsize=prefetch)
+        self._stop = threading.Event()
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name="episode-prefetch", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        try:
+            while not self._stop.is_set():
+                start = int(self._rng.integers(0, self.dataset.steps - self.chunk_steps + 1))
+                chunk = self.dataset.read(start, self.chunk_steps, self.routes)
+                for offset in range(0, self.chunk_steps - self._window + 1, self._window):
+                    episode = {name: array[offset:offset + self._window] for name, array in chunk.items()}
+                    while not self._stop.is_set():
+                        try:
+                            self._queue.put(episode, timeout=0.1)
+                            break
+                        except queue.Full:
+                            continue
+        except Exception as e:
+            self._error = e
+
+    def next_episode(self, timeout=30.0):
+        """
+        :return: Dict of arrays covering episode_length + 1 steps.
+        """
+        while True:
+            try:
+                return self._queue.get(timeout=min(timeout, 0.5))
+            except queue.Empty:
+                if self._error is not None:
+                    raise RuntimeError(f"Episode prefetcher failed: {self._error}") from self._error
+                timeout -= 0.5
+                if timeout <= 0:
+                    raise TimeoutError("No episode prefetched in time")
+
+    def close(self):
+        self._stop.set()
+        self._thread.join(timeout=5)
+
+# -----------------------------
+# Synthetic Data (for smoke tests / demos)
+# -----------------------------
+def generate_synthetic_dataset(path, steps=100_000, routes=3, trade_size=0.01, seed=0):
+    """
+    Write a synthetic dataset: random-walk reserves per route and the CPMM slippage of a
+    trade of `trade_size` × the smallest reserve_in, plus noise.
+    """
+    rng = np.random.default_rng(seed)
+    base = rng.uniform(1e5, 1e7, size=routes)
+    log_depth = np.cumsum(rng.normal(0, 0.01, size=(steps, routes)), axis=0)
+    reserve_in = base * np.exp(log_depth)
+    price = np.exp(np.cumsum(rng.normal(0, 0.002, size=steps)))
+    reserve_out = reserve_in * price[:, None]
+    volatility = np.clip(np.abs(rng.normal(0.3, 0.15, size=steps)), 0, 1)
+    amount = trade_size * reserve_in.min(axis=1, keepdims=True)
+    # CPMM slippage of `amount`: 1 - (x / (x + a)) expressed in percent.
+    slippage = 100 * amount / (reserve_in + amount) * (1 + volatility[:, None] * rng.uniform(0, 0.5, (steps, routes)))
+    reserves = np.stack([reserve_in, reserve_out], axis=-1)
+    return write_dataset(path, reserves, volatility, np.clip(slippage, 0, 100))
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    path = sys.argv[1] if len(sys.argv) > 1 else "market_data"
+    generate_synthetic_dataset(path)
+    dataset = MarketDataset(path)
+    prefetcher = EpisodePrefetcher(dataset, episode_length=50, seed=0)
+    start = time.perf_counter()
+    for _ in range(1000):
+        prefetcher.next_episode()
+    print(f"{dataset.steps} steps x {dataset.routes} routes; "
+          f"1000 episodes in {time.perf_counter() - start:.3f}s")
+    prefetcher.close()
@@ -1,21 +1,65 @@
 #!/usr/bin/env python
 # src/interfaces/api.py
 
-from fastapi import FastAPI, HTTPException
+import asyncio
+import hmac
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+from fastapi import FastAPI, HTTPException, Response, Header
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 import uvicorn
 
 # Import necessary modules from our core package.
 from core.liquidity import fetch_all_liquidity
-from core.mcts_router import mcts, MCTSNode, simulate
-from core.execution import execute_swap
+from core.mcts_router import mcts, mcts_puct, MCTSNode, simulate, get_evaluator, candidate_routes
+from core.execution import execute_swap, PREFLIGHT_CANDIDATES
+from core.metrics import time_stage, render_metrics, CONTENT_TYPE_LATEST
+from core.profiling import profile_request, continuous_sampler_from_env, PROFILE_MODES
+from core.pools import encode_json
+from core.singleflight import SingleFlight, amount_bucket, block_epoch
+from core.impact import CurveCache
+from core.snapshot import SnapshotSource, DEFAULT_SNAPSHOT_NAME
+from core.cross_chain import plan_routes
+from core.registry import load_registry_from_env
+from core.confirmations import get_tracker, active_trackers, find_transaction
+
+_event_loop = None
+
+@asynccontextmanager
+async def lifespan(app):
+    global _event_loop
+    # Confirmation trackers run on the server's event loop (see track_submitted).
+    _event_loop = asyncio.get_running_loop()
+    # Optional low-rate continuous profiler (enabled via PROFILE_CONTINUOUS_DIR).
+    sampler = continuous_sampler_from_env()
+    if sampler is not None:
+        sampler.start()
+    try:
+        yield
+    finally:
+        if sampler is not None:
+            sampler.stop()
+        for tracker in active_trackers():
+            await tracker.stop()
+        _event_loop = None
 
 app = FastAPI(
     title="DeFAI Terminal API",
     description="API for cross-chain transaction optimization and swap execution",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
+class PoolJSONResponse(JSONResponse):
+    """
+    JSON response that serialises Pool records with the fast pool encoder.
+    """
+    def render(self, content):
+        return encode_json(content)
+
 # -----------------------------
 # Pydantic models for request/response
 # -----------------------------
@@ -24,10 +68,116 @@ class SwapRequest(BaseModel):
     from_address: str       # Sender's blockchain address
     private_key: str        # Private key for signing (caution: use secure storage in production)
     chain: str = "Ethereum" # Target chain ("Ethereum", "BSC", or "Injective")
+    token_in: Optional[str] = None   # Input token address (selects registry pools, coalesces identical quotes)
+    token_out: Optional[str] = None  # Output token address (selects registry pools, coalesces identical quotes)
 
 class SwapResponse(BaseModel):
     tx_hash: str            # Transaction hash or error message
 
+class PlanRequest(BaseModel):
+    swap_input: int         # Amount of input tokens held on the source chain
+    chain: str = "Ethereum" # Source chain holding the funds
+    iterations: int = 1000  # MCTS iterations per chain
+
+# -----------------------------
+# Request Coalescing
+# -----------------------------
+# Concurrent identical liquidity fetches and route searches run once per block; every
+# waiting request receives the shared (immutable) result.
+liquidity_flight = SingleFlight("liquidity")
+route_flight = SingleFlight("route")
+
+# Per-pool precomputed quote curves, rebuilt only when a pool's reserves change.
+curve_cache = CurveCache()
+
+# When an ingestion process publishes liquidity to shared memory (LIQUIDITY_SNAPSHOT,
+# see core/snapshot.py), workers read the shared reserve table instead of each fetching
+# their own; a missing or stale snapshot falls back to a direct (coalesced) fetch.
+SNAPSHOT_MAX_AGE = float(os.getenv("LIQUIDITY_SNAPSHOT_MAX_AGE", "30"))
+_snapshot_source = SnapshotSource(DEFAULT_SNAPSHOT_NAME, SNAPSHOT_MAX_AGE) if DEFAULT_SNAPSHOT_NAME else None
+
+def read_liquidity_snapshot():
+    """
+    :return: List of Pool records from the shared snapshot, or None if unavailable or stale
+        (the worker re-attaches on the next request, e.g. after an ingestion restart).
+    """
+    if _snapshot_source is None:
+        return None
+    return _snapshot_source.pools()
+
+def fetch_liquidity_coalesced(token_in=None, token_out=None):
+    # With a pool registry configured, a pair-specific request fetches only that pair's pools.
+    if token_in and token_out and load_registry_from_env() is not None:
+        def fetch_pair():
+            with time_stage("fetch_liquidity"):
+                return fetch_all_liquidity(token_in, token_out)
+        # Reserves are oriented by swap direction, so the key is the ordered pair.
+        return liquidity_flight.do(("liquidity", token_in.lower(), token_out.lower(), block_epoch()), fetch_pair)
+
+    pools = read_liquidity_snapshot()
+    if pools is not None:
+        return pools
+
+    def fetch():
+        with time_stage("fetch_liquidity"):
+            return fetch_all_liquidity()
+    return liquidity_flight.do(("liquidity", block_epoch()), fetch)
+
+# Route search used by /swap: "uct" (default) or "puct" with priors from ROUTER_PRIOR
+# ("policy" = trained PPO model at POLICY_MODEL, falling back to exact quotes).
+ROUTER_SEARCH = os.getenv("ROUTER_SEARCH", "uct")
+ROUTER_PRIOR = os.getenv("ROUTER_PRIOR", "policy")
+# Attacker's sandwich gas in input-token units; when set, routes are scored by their
+# MEV-safe output (core.mcts_router.mev_safe_outputs).
+ROUTER_MEV_GAS_COST = float(os.getenv("ROUTER_MEV_GAS_COST") or 0) or None
+_route_evaluator = None
+
+def route_evaluator():
+    global _route_evaluator
+    if _route_evaluator is None:
+        _route_evaluator = get_evaluator(ROUTER_PRIOR, gas_cost=ROUTER_MEV_GAS_COST)
+    return _route_evaluator
+
+def find_best_route_coalesced(request):
+    key = (
+        request.token_in,
+        request.token_out,
+        request.chain,
+        amount_bucket(request.swap_input),
+        block_epoch(request.chain),
+    )
+
+    def search():
+        # Only pools on the execution chain are candidates, so the chosen route can be
+        # executed where the funds are; see /plan for cross-chain routes.
+        liquidity_data = [pool for pool in fetch_liquidity_coalesced(request.token_in, request.token_out)
+                          if pool.chain == request.chain]
+        if not liquidity_data:
+            return None
+        root = MCTSNode()
+        with time_stage("mcts"):
+            if ROUTER_SEARCH == "puct":
+                return mcts_puct(root, iterations=1000, swap_input=request.swap_input,
+                                 available_pools=liquidity_data, evaluator=route_evaluator())
+            return mcts(root, iterations=1000, swap_input=request.swap_input,
+                        available_pools=liquidity_data, curves=curve_cache, gas_cost=ROUTER_MEV_GAS_COST)
+    return route_flight.do(key, search)
+
+def track_submitted(tx_result, chain, sender):
+    """
+    Hand a submitted transaction to the chain's confirmation tracker (one shared
+    new-block loop per chain) so its status is available from /tx/{tx_hash}. The nonce
+    execute_swap sent it with is passed along, so replacements are detected without a
+    per-transaction lookup.
+    """
+    if _event_loop is None or not (isinstance(tx_result, str) and tx_result.startswith("0x") and len(tx_result) == 66):
+        return
+    tracker = get_tracker(chain)
+    if tracker is None:
+        return
+    tracker.track(tx_result, sender=sender, nonce=getattr(tx_result, "nonce", None))
+    tracker.start(_event_loop)
+
 # -----------------------------
 # API Endpoints
 # -----------------------------
@@ -37,38 +187,118 @@ def get_liquidity():
     Endpoint to return aggregated liquidity data from all supported sources.
     """
     try:
-        data = fetch_all_liquidity()
-        return {"liquidity": data}
+        data = fetch_liquidity_coalesced()
+        return PoolJSONResponse({"liquidity": data})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/depth")
+def get_depth(max_impact_percent: float = 1.0, chain: Optional[str] = None):
+    """
+    Endpoint reporting how much can be traded in each pool within `max_impact_percent`
+    price impact, answered from the precomputed quote curves.
+    """
+    if not 0 < max_impact_percent < 100:
+        raise HTTPException(status_code=400, detail="max_impact_percent must be within (0, 100).")
+    try:
+        pools = [pool for pool in fetch_liquidity_coalesced() if chain is None or pool.chain == chain]
+        depth = curve_cache.depth_report(pools, max_impact_percent / 100)
+        return PoolJSONResponse({
+            "max_impact_percent": max_impact_percent,
+            "total_depth": sum(entry["depth"] for entry in depth),
+            "pools": depth,
+        })
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/plan")
+def plan_cross_chain(request: PlanRequest):
+    """
+    Endpoint returning end-to-end routes for funds held on `chain`: the best route on
+    every chain (solved in parallel), net of the bridge fee and latency to reach it.
+    """
+    try:
+        routes = plan_routes(fetch_liquidity_coalesced(), request.swap_input, request.chain,
+                             iterations=request.iterations)
+        return PoolJSONResponse({"routes": [route.to_dict() for route in routes]})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# On-demand request profiling is off unless PROFILE_TOKEN is set; requests must then
+# present the same value in X-Profile-Token.
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+
+def _check_profile_access(x_profile, x_profile_token):
+    if x_profile is None:
+        return
+    if not PROFILE_TOKEN or not hmac.compare_digest(x_profile_token or "", PROFILE_TOKEN):
+        raise HTTPException(status_code=403, detail="Request profiling is not enabled for this client.")
+    if x_profile not in PROFILE_MODES:
+        raise HTTPException(status_code=400, detail=f"X-Profile must be one of {PROFILE_MODES}.")
+
 @app.post("/swap", response_model=SwapResponse)
-def swap_tokens(request: SwapRequest):
+def swap_tokens(request: SwapRequest, response: Response, x_profile: Optional[str] = Header(default=None),
+                x_profile_token: Optional[str] = Header(default=None)):
     """
     Endpoint to execute a swap transaction using the best route determined via MCTS.
+
+    With PROFILE_TOKEN configured, sending `X-Profile: sample` or `X-Profile: trace` together
+    with a matching `X-Profile-Token` header profiles this request; the name of the
+    collapsed-stack file (inside PROFILE_DIR) is returned in the `X-Profile-File` header.
     """
-    try:
-        # 1. Fetch aggregated liquidity data.
-        liquidity_data = fetch_all_liquidity()
+    _check_profile_access(x_profile, x_profile_token)
 
-        # 2. Create the root MCTS node and run the algorithm to select the best route.
-        root = MCTSNode()
-        best_node = mcts(root, iterations=1000, swap_input=request.swap_input, available_pools=liquidity_data)
+    with profile_request(x_profile, label="swap") as profile:
+        result = _execute_swap_request(request)
+    if profile.path:
+        response.headers["X-Profile-File"] = os.path.basename(profile.path)
+    return result
+
+def _execute_swap_request(request):
+    try:
+        # 1-2. Fetch aggregated liquidity data and run MCTS to select the best route
+        #      (shared with concurrent requests for the same pair, chain, size and block).
+        best_node = find_best_route_coalesced(request)
 
         if best_node is None or best_node.pool is None:
             raise HTTPException(status_code=400, detail="No valid route found for the swap.")
 
-        best_route = best_node.pool
-        # Add expected_output from simulation (used for slippage estimation).
-        best_route["expected_output"] = simulate(best_node, request.swap_input)
+        # Attach expected_output from simulation (used for slippage estimation) to a copy
+        # of the route, quoted for this request's exact amount; the pool record itself is
+        # shared and immutable.
+        with time_stage("simulate"):
+            best_route = best_node.pool.with_expected_output(simulate(best_node, request.swap_input))
 
         # 3. Execute the swap transaction.
-        tx_result = execute_swap(best_route, request.swap_input, request.from_address, request.private_key, chain=request.chain)
+        with time_stage("execute_swap"):
+            fallback_routes = candidate_routes(best_node, request.swap_input, PREFLIGHT_CANDIDATES)[1:]
+            tx_result = execute_swap(best_route, request.swap_input, request.from_address, request.private_key,
+                                     chain=best_route.chain, token_in=request.token_in, token_out=request.token_out,
+                                     fallback_routes=fallback_routes)
+        track_submitted(tx_result, best_route.chain, request.from_address)
 
         return SwapResponse(tx_hash=tx_result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/tx/{tx_hash}")
+def get_transaction_status(tx_hash: str):
+    """
+    Endpoint reporting the confirmation status of a transaction submitted through /swap
+    (pending, included, confirmed, failed, replaced or dropped).
+    """
+    tx = find_transaction(tx_hash)
+    if tx is None:
+        raise HTTPException(status_code=404, detail="Transaction is not tracked.")
+    return tx.to_dict()
+
+@app.get("/metrics")
+def get_metrics():
+    """
+    Endpoint exposing pipeline latency, RPC and MCTS metrics in Prometheus text format.
+    """
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE_LATEST)
+
 if __name__ == "__main__":
     # Run the FastAPI app on host 0.0.0.0:8000 using uvicorn.
     uvicorn.run(app, host="0.0.0.0", port=8000)
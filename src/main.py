@@ -5,14 +5,16 @@ import argparse
 import sys
 import json
 from core.liquidity import fetch_all_liquidity
-from core.mcts_router import MCTSNode, mcts, simulate
-from core.execution import execute_swap
+from core.mcts_router import (MCTSNode, mcts, mcts_puct, mcts_bounded, simulate, get_evaluator,
+                              candidate_routes, DEFAULT_POLICY_MODEL)
+from core.execution import execute_swap, PREFLIGHT_CANDIDATES
 from core.utils import setup_logger
+from core.metrics import time_stage
+from core.profiling import profile_request, PROFILE_MODES, DEFAULT_PROFILE_DIR
+from core.cross_chain import plan_routes
+from core.batch import BatchLiquidity, iter_orders, run_batch, DEFAULT_REFRESH_INTERVAL
 
 def main():
-    # Set up a logger for informative logging.
-    logger = setup_logger("DeFAI-Terminal")
-
     # Parse command-line arguments.
     parser = argparse.ArgumentParser(
         description="DeFAI Terminal CLI for executing swaps based on optimized routes."
@@ -26,57 +28,249 @@ def main():
     parser.add_argument(
         "--swap_input",
         type=int,
-        required=True,
-        help="Amount of input tokens to swap (in smallest unit)"
+        help="Amount of input tokens to swap (in smallest unit); required unless --batch is given"
     )
     parser.add_argument(
         "--from_address",
         type=str,
-        required=True,
-        help="Sender's blockchain address"
+        help="Sender's blockchain address (default sender for --batch orders)"
     )
     parser.add_argument(
         "--private_key",
         type=str,
-        required=True,
         help="Sender's private key for signing the transaction (handle securely!)"
     )
+    parser.add_argument(
+        "--profile",
+        type=str,
+        choices=PROFILE_MODES,
+        default=None,
+        help="Profile this run ('sample' or 'trace') and dump a collapsed-stack flamegraph file"
+    )
+    parser.add_argument(
+        "--profile_dir",
+        type=str,
+        default=DEFAULT_PROFILE_DIR,
+        help="Directory for profile output files"
+    )
+
+    parser.add_argument(
+        "--token_in",
+        type=str,
+        default=None,
+        help="Input token address (prices the sandwich attacker's gas when it is the chain's wrapped native token)"
+    )
+    parser.add_argument(
+        "--token_out",
+        type=str,
+        default=None,
+        help="Output token address (prices the sandwich attacker's gas when it is the chain's wrapped native token)"
+    )
+    parser.add_argument(
+        "--gas_token_price",
+        type=float,
+        default=None,
+        help="Input-token units per wei of gas for min_output (default: derived from the route, else GAS_TOKEN_PRICE)"
+    )
+    parser.add_argument(
+        "--mev_gas_cost",
+        type=float,
+        default=None,
+        help="Attacker's sandwich gas in input-token units; when set, routes are scored by their MEV-safe output"
+    )
+    parser.add_argument(
+        "--search",
+        type=str,
+        choices=("uct", "puct"),
+        default="uct",
+        help="Route search: plain UCT, or PUCT guided by a batched policy/value evaluator"
+    )
+    parser.add_argument(
+        "--prior",
+        type=str,
+        choices=("policy", "reserve", "uniform", "quote"),
+        default="policy",
+        help="PUCT prior source: the trained PPO policy (falls back to exact quotes if it cannot be loaded), "
+             "reserve depth, uniform, or exact quotes"
+    )
+    parser.add_argument(
+        "--policy_model",
+        type=str,
+        default=DEFAULT_POLICY_MODEL,
+        help="Saved PPO model used for --prior policy"
+    )
+    parser.add_argument(
+        "--splits",
+        type=int,
+        default=1,
+        help="Split the swap into this many equal chunks routed across pools (memory-bounded MCTS); "
+             "one transaction is sent per pool used"
+    )
+    parser.add_argument(
+        "--node_budget",
+        type=int,
+        default=10000,
+        help="Maximum number of live search-tree nodes for --splits > 1"
+    )
+    parser.add_argument(
+        "--plan",
+        action="store_true",
+        help="Print end-to-end cross-chain routes for funds on --chain (bridge costs included) and exit"
+    )
+    parser.add_argument(
+        "--batch",
+        type=str,
+        default=None,
+        help="Read JSONL orders from this file ('-' for stdin) and stream one JSON result per line to stdout"
+    )
+    parser.add_argument(
+        "--refresh_interval",
+        type=float,
+        default=DEFAULT_REFRESH_INTERVAL,
+        help="Seconds between liquidity refreshes in batch mode"
+    )
+    parser.add_argument(
+        "--dry_run",
+        action="store_true",
+        help="Route orders (applying their reserve impact) without sending transactions"
+    )
 
     args = parser.parse_args()
+    if args.batch is None:
+        required = ("swap_input",) if args.plan else ("swap_input", "from_address", "private_key")
+        missing = [name for name in required if getattr(args, name) is None]
+        if missing:
+            parser.error("the following arguments are required: " + ", ".join(f"--{name}" for name in missing))
+
+    # Set up a logger for informative logging; in batch mode stdout carries the results.
+    logger = setup_logger("DeFAI-Terminal", stream=sys.stderr if args.batch else None)
+
+    run = run_batch_orders if args.batch else run_plan if args.plan else run_swap
+    with profile_request(args.profile, output_dir=args.profile_dir, label="cli") as profile:
+        run(args, logger)
+    if profile.path:
+        logger.info(f"Profile written to {profile.path}")
 
+def run_plan(args, logger):
+    """
+    Solve the best route on every chain in parallel and print the end-to-end routes
+    (including bridge fee and latency from --chain), best first.
+    """
     logger.info("Fetching aggregated liquidity data...")
-    liquidity_data = fetch_all_liquidity()
+    with time_stage("fetch_liquidity"):
+        liquidity_data = fetch_all_liquidity()
+    routes = plan_routes(liquidity_data, args.swap_input, args.chain)
+    if not routes:
+        logger.error("No cross-chain route found. Exiting.")
+        sys.exit(1)
+    for route in routes:
+        logger.info(json.dumps(route.to_dict(), indent=4))
+
+def run_batch_orders(args, logger):
+    """
+    Route and execute a stream of JSONL orders against one shared, refreshing
+    liquidity snapshot, writing results to stdout as each order completes.
+    """
+    defaults = {"chain": args.chain}
+    if args.from_address:
+        defaults["from_address"] = args.from_address
+    if args.private_key:
+        defaults["private_key"] = args.private_key
+    liquidity = BatchLiquidity(fetch_all_liquidity, refresh_interval=args.refresh_interval)
+
+    stream = sys.stdin if args.batch == "-" else open(args.batch, "r")
+    try:
+        summary = run_batch(iter_orders(stream, defaults), liquidity, out=sys.stdout, dry_run=args.dry_run)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+    logger.info(f"Batch complete: {summary['processed']} orders, {summary['succeeded']} succeeded, "
+                f"{summary['failed']} failed")
+
+def run_swap(args, logger):
+    """
+    Fetch liquidity, select the best route via MCTS and execute a single swap.
+    """
+    logger.info("Fetching aggregated liquidity data...")
+    with time_stage("fetch_liquidity"):
+        liquidity_data = fetch_all_liquidity()
     if not liquidity_data:
         logger.error("No liquidity data available. Exiting.")
         sys.exit(1)
 
+    # Only pools on the execution chain can be executed from this wallet.
+    liquidity_data = [pool for pool in liquidity_data if pool.chain == args.chain]
+    if not liquidity_data:
+        logger.error(f"No liquidity available on {args.chain}. Exiting.")
+        sys.exit(1)
+
+    if args.splits > 1:
+        return run_split_swap(args, logger, liquidity_data)
+
     logger.info("Running MCTS routing algorithm to select the best route...")
     # Create a root node (with no pool assigned)
     root = MCTSNode()
-    best_node = mcts(root, iterations=1000, swap_input=args.swap_input, available_pools=liquidity_data)
+    with time_stage("mcts"):
+        if args.search == "puct":
+            evaluator = get_evaluator(args.prior, model_path=args.policy_model, gas_cost=args.mev_gas_cost)
+            logger.info(f"PUCT priors from {type(evaluator).__name__}")
+            best_node = mcts_puct(root, iterations=1000, swap_input=args.swap_input,
+                                  available_pools=liquidity_data, evaluator=evaluator)
+        else:
+            best_node = mcts(root, iterations=1000, swap_input=args.swap_input, available_pools=liquidity_data,
+                             gas_cost=args.mev_gas_cost)
     if best_node is None or best_node.pool is None:
         logger.error("No valid swap route found. Exiting.")
         sys.exit(1)
 
-    best_route = best_node.pool
     # Use simulation to estimate expected output (for slippage checking)
-    expected_output = simulate(best_node, args.swap_input)
-    best_route["expected_output"] = expected_output
+    with time_stage("simulate"):
+        expected_output = simulate(best_node, args.swap_input)
+    best_route = best_node.pool.with_expected_output(expected_output)
 
     logger.info("Best route selected:")
-    logger.info(json.dumps(best_route, indent=4))
+    logger.info(json.dumps(best_route.to_dict(), indent=4))
     logger.info(f"Expected output tokens: {expected_output}")
 
     logger.info("Executing swap transaction...")
-    tx_result = execute_swap(
-        best_route,
-        args.swap_input,
-        args.from_address,
-        args.private_key,
-        chain=args.chain
-    )
+    with time_stage("execute_swap"):
+        tx_result = execute_swap(
+            best_route,
+            args.swap_input,
+            args.from_address,
+            args.private_key,
+            chain=best_route.chain,
+            gas_token_price=args.gas_token_price,
+            token_in=args.token_in,
+            token_out=args.token_out,
+            fallback_routes=candidate_routes(best_node, args.swap_input, PREFLIGHT_CANDIDATES)[1:]
+        )
 
     logger.info(f"Transaction result: {tx_result}")
 
+def run_split_swap(args, logger, liquidity_data):
+    """
+    Split the swap into --splits chunks with the memory-bounded MCTS and send one swap
+    per pool with the chunks assigned to it.
+    """
+    logger.info(f"Running memory-bounded MCTS over {args.splits} chunks (node budget {args.node_budget})...")
+    with time_stage("mcts"):
+        allocation, expected_output = mcts_bounded(MCTSNode(), 1000, args.swap_input, liquidity_data,
+                                                   splits=args.splits, node_budget=args.node_budget)
+    if not allocation:
+        logger.error("No valid swap route found. Exiting.")
+        sys.exit(1)
+    logger.info(f"Expected output tokens (all legs): {expected_output}")
+
+    for pool, amount in allocation:
+        with time_stage("simulate"):
+            route = pool.with_expected_output(simulate(MCTSNode(pool=pool), amount))
+        logger.info(f"Leg: {amount} via {json.dumps(route.to_dict())}")
+        with time_stage("execute_swap"):
+            tx_result = execute_swap(route, amount, args.from_address, args.private_key, chain=route.chain,
+                                     gas_token_price=args.gas_token_price, token_in=args.token_in,
+                                     token_out=args.token_out)
+        logger.info(f"Transaction result: {tx_result}")
+
 if __name__ == "__main__":
     main()
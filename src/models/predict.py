@@ -1,9 +1,12 @@
 #!/usr/bin/env python
 # src/models/predict.py
 
+import math
 import numpy as np
 from stable_baselines3 import PPO
-from train_model import SwapEnv  # Import our custom environment
+from models.train_model import SwapEnv  # Import our custom environment
+from core.mcts_router import QuoteEvaluator, DEFAULT_POLICY_MODEL, softmax
+from core.pools import as_pool
 
 def predict_best_route(observation):
     """
@@ -13,12 +16,72 @@ def predict_best_route(observation):
     :return: The predicted action (route index).
     """
     # Load the trained model.
-    model = PPO.load("swap_model")
+    model = PPO.load(DEFAULT_POLICY_MODEL)
     
     # Predict the best action for the given observation.
     action, _ = model.predict(observation, deterministic=True)
     return action
 
+class PolicyEvaluator(QuoteEvaluator):
+    """
+    Batched MCTS evaluator (see core.mcts_router.mcts_puct) using a PPO policy trained in
+    SwapEnv's dataset mode, whose actions choose one of `n_routes` routes.
+
+    Candidate pools are laid out as routes: every group of up to `n_routes` candidates
+    becomes one dataset-mode observation (volatility, previous slippage, each route's
+    input reserve relative to the deepest, each route's slippage for this swap), all
+    groups go through a single forward pass, and a candidate's prior is the policy's
+    probability of choosing its route. Leaf values remain exact quotes.
+    """
+    def __init__(self, model_path=DEFAULT_POLICY_MODEL, volatility=0.5, temperature=1.0):
+        super().__init__(temperature=temperature)
+        self.model = PPO.load(model_path)
+        self.volatility = volatility
+        self.n_routes = getattr(self.model.action_space, "n", None)
+        shape = tuple(self.model.observation_space.shape)
+        if self.n_routes is None or shape != (2 + 2 * self.n_routes,):
+            raise ValueError(f"Policy {model_path!r} was not trained in SwapEnv dataset mode "
+                             f"(observation shape {shape}); its actions do not map to pools.")
+
+    def observations(self, pools, outputs, swap_input):
+        """
+        :return: float32 array of dataset-mode SwapEnv observations; candidate i is route
+            i % n_routes of row i // n_routes (unused route slots are empty: depth 0,
+            slippage 100).
+        """
+        pools = [as_pool(pool) for pool in pools]
+        rows = []
+        for start in range(0, len(pools), self.n_routes):
+            depth = np.zeros(self.n_routes)
+            slippage = np.full(self.n_routes, 100.0)
+            group = zip(pools[start:start + self.n_routes], outputs[start:start + self.n_routes])
+            for route, (pool, output) in enumerate(group):
+                if pool is None or pool.error is not None or not pool.token0 or not pool.token1:
+                    continue
+                depth[route] = float(pool.token0)
+                spot_output = swap_input * float(pool.token1) / float(pool.token0)
+                if spot_output > 0:
+                    slippage[route] = min(max(100.0 * (1 - output / spot_output), 0.0), 100.0)
+            if depth.max() > 0:
+                depth /= depth.max()
+            rows.append(np.concatenate([[min(self.volatility, 1.0), 0.0], depth, slippage]))
+        return np.asarray(rows, dtype=np.float32)
+
+    def priors(self, pools, outputs, swap_input):
+        if not outputs:
+            return []
+        import torch
+        observations = self.observations(pools, outputs, swap_input)
+        with torch.no_grad():
+            tensor, _ = self.model.policy.obs_to_tensor(observations)
+            probs = self.model.policy.get_distribution(tensor).distribution.probs.cpu().numpy()
+        logits = []
+        for i in range(len(outputs)):
+            row, route = divmod(i, self.n_routes)
+            usable = observations[row, 2 + route] > 0 and probs[row, route] > 0
+            logits.append(math.log(probs[row, route]) if usable else -1e9)
+        return softmax(logits, self.temperature)
+
 if __name__ == "__main__":
     # Create the environment and reset to get an initial observation.
     env = SwapEnv()
@@ -1,11 +1,13 @@
 #!/usr/bin/env python
 # src/models/train_model.py
 
+import argparse
 import gym
 import numpy as np
 from gym import spaces
 from stable_baselines3 import PPO
 from stable_baselines3.common.env_checker import check_env
+from data.market_dataset import MarketDataset, EpisodePrefetcher
 
 class SwapEnv(gym.Env):
     """
@@ -22,22 +24,66 @@ class SwapEnv(gym.Env):
     
     Reward:
       Negative slippage. Lower slippage (i.e. higher reward) is desired.
+
+    Dataset mode (dataset_path set):
+      Episodes replay consecutive steps of a memory-mapped market dataset (see
+      data/market_dataset.py), prefetched in chunks by a background thread.
+      Observation: [volatility, previous_slippage, liquidity_1..n, last_slippage_1..n]
+      where liquidity_i is route i's input reserve relative to the deepest route and
+      last_slippage_i the realized slippage of route i on the previous step.
+      Action: one of `n_routes` routes (default: all routes in the dataset).
+      Reward: negative realized slippage of the chosen route.
     """
     metadata = {'render.modes': ['human']}
 
-    def __init__(self):
+    def __init__(self, dataset_path=None, n_routes=None, episode_length=50, seed=None):
         super(SwapEnv, self).__init__()
-        # Define observation space: [liquidity, volatility, previous_slippage]
-        self.observation_space = spaces.Box(low=np.array([0, 0, 0]),
-                                            high=np.array([1000, 1, 100]),
-                                            dtype=np.float32)
-        # Define a discrete action space: 3 possible routes.
-        self.action_space = spaces.Discrete(3)
         self.state = None
         self.step_count = 0
-        self.max_steps = 50
+        self.max_steps = episode_length
+        self.dataset = None
+        self.prefetcher = None
+
+        if dataset_path is None:
+            if n_routes not in (None, 3):
+                raise ValueError("The synthetic environment has exactly 3 routes; use dataset_path for more.")
+            self.n_routes = 3
+            # Define observation space: [liquidity, volatility, previous_slippage]
+            self.observation_space = spaces.Box(low=np.array([0, 0, 0]),
+                                                high=np.array([1000, 1, 100]),
+                                                dtype=np.float32)
+        else:
+            self.dataset = MarketDataset(dataset_path)
+            self.n_routes = n_routes or self.dataset.routes
+            if self.n_routes > self.dataset.routes:
+                raise ValueError(f"Dataset has {self.dataset.routes} routes; {self.n_routes} requested.")
+            self.prefetcher = EpisodePrefetcher(self.dataset, episode_length, routes=self.n_routes, seed=seed)
+            size = 2 + 2 * self.n_routes
+            high = np.concatenate([[1, 100], np.ones(self.n_routes), np.full(self.n_routes, 100)])
+            self.observation_space = spaces.Box(low=np.zeros(size), high=high, dtype=np.float32)
+            self.episode = None
+            self.previous_slippage = 0.0
+        # Define a discrete action space: one action per route.
+        self.action_space = spaces.Discrete(self.n_routes)
+
+    def _dataset_observation(self):
+        t = self.step_count
+        reserve_in = self.episode["reserves"][t + 1, :, 0]
+        depth = reserve_in / reserve_in.max() if reserve_in.max() > 0 else np.zeros(self.n_routes)
+        return np.concatenate([
+            [min(float(self.episode["volatility"][t + 1]), 1.0), self.previous_slippage],
+            depth,
+            self.episode["slippage"][t],
+        ]).astype(np.float32)
 
     def reset(self):
+        if self.dataset is not None:
+            self.episode = self.prefetcher.next_episode()
+            self.previous_slippage = 0.0
+            self.step_count = 0
+            self.state = self._dataset_observation()
+            return self.state
+
         # Initialize state with random values within a plausible range.
         self.state = np.array([
             np.random.uniform(100, 900),  # liquidity
@@ -48,6 +94,8 @@ class SwapEnv(gym.Env):
         return self.state
 
     def step(self, action):
+        if self.dataset is not None:
+            return self._dataset_step(action)
         liquidity, volatility, prev_slippage = self.state
         # Simulate the effect of different routing strategies:
         if action == 0:
@@ -73,18 +121,43 @@ class SwapEnv(gym.Env):
         info = {}
         return self.state, reward, done, info
 
+    def _dataset_step(self, action):
+        # Realized slippage of the chosen route on the step the agent just observed.
+        slippage = float(self.episode["slippage"][self.step_count + 1, action])
+        reward = -slippage
+        self.previous_slippage = slippage
+        self.step_count += 1
+        done = self.step_count >= self.max_steps
+        if not done:
+            self.state = self._dataset_observation()
+        return self.state, reward, done, {}
+
     def render(self, mode='human'):
         print(f"State: {self.state}")
 
+    def close(self):
+        if self.prefetcher is not None:
+            self.prefetcher.close()
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the PPO routing model.")
+    parser.add_argument("--dataset", type=str, default=None,
+                        help="Market dataset directory (see data/market_dataset.py); synthetic states if omitted")
+    parser.add_argument("--n_routes", type=int, default=None, help="Number of routes (dataset mode)")
+    parser.add_argument("--episode_length", type=int, default=50, help="Steps per episode")
+    parser.add_argument("--timesteps", type=int, default=10000, help="Total training timesteps")
+    parser.add_argument("--model_path", type=str, default="swap_model", help="Where to save the model")
+    args = parser.parse_args()
+
     # Create the environment and verify its compliance with Gym's API.
-    env = SwapEnv()
+    env = SwapEnv(dataset_path=args.dataset, n_routes=args.n_routes, episode_length=args.episode_length)
     check_env(env)
     
     # Create and train the PPO agent.
     model = PPO("MlpPolicy", env, verbose=1)
-    model.learn(total_timesteps=10000)
+    model.learn(total_timesteps=args.timesteps)
     
     # Save the trained model.
-    model.save("swap_model")
-    print("Model saved as 'swap_model.zip'.")
+    model.save(args.model_path)
+    print(f"Model saved as '{args.model_path}.zip'.")
+    env.close()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# tests/test_batch.py
+
+import io
+import json
+from core.batch import BatchLiquidity, iter_orders, run_batch
+from core.pools import Pool
+
+def make_pools():
+    return [
+        Pool(pool="Uniswap", chain="Ethereum", token0=10**6, token1=10**6),
+        Pool(pool="SushiSwap", chain="Ethereum", token0=8 * 10**5, token1=8 * 10**5),
+        Pool(pool="PancakeSwap", chain="BSC", token0=10**6, token1=10**6),
+    ]
+
+def run(lines, execute=None, dry_run=True, fetch=None, **kwargs):
+    out = io.StringIO()
+    liquidity = BatchLiquidity(fetch or make_pools, **kwargs)
+    summary = run_batch(iter_orders(io.StringIO("\n".join(lines)), {"from_address": "0xabc", "private_key": "k"}),
+                        liquidity, execute=execute, out=out, iterations=200, dry_run=dry_run)
+    return summary, [json.loads(line) for line in out.getvalue().splitlines()], liquidity
+
+def test_later_orders_see_reserve_impact_of_earlier_ones():
+    orders = [json.dumps({"id": i, "swap_input": 10**5}) for i in range(2)]
+    summary, results, liquidity = run(orders)
+    assert summary == {"processed": 2, "succeeded": 2, "failed": 0}
+    # The first order drains Uniswap enough that SushiSwap is now the better route.
+    assert [r["pool"] for r in results] == ["Uniswap", "SushiSwap"]
+    uniswap = next(p for p in liquidity.pools() if p.pool == "Uniswap")
+    assert uniswap.token0 == 10**6 + 10**5
+    assert uniswap.token1 == 10**6 - results[0]["expected_output"]
+
+def test_malformed_lines_are_reported_and_skipped():
+    summary, results, _ = run(["not json", "", json.dumps({"swap_input": -1}), json.dumps({"swap_input": 10})])
+    assert summary["failed"] == 2 and summary["succeeded"] == 1
+    assert [r["line"] for r in results] == [1, 3, 4]
+
+def test_orders_route_only_on_their_chain():
+    _, results, _ = run([json.dumps({"swap_input": 10**4, "chain": "BSC"})])
+    assert results[0]["pool"] == "PancakeSwap"
+
+def test_failed_execution_does_not_move_reserves():
+    calls = []
+
+    def execute(route, swap_input, from_address, private_key, chain="Ethereum"):
+        calls.append((route.pool, from_address))
+        return "Transaction failed: reverted"
+
+    summary, results, liquidity = run([json.dumps({"swap_input": 10**5})], execute=execute, dry_run=False)
+    assert calls == [("Uniswap", "0xabc")]
+    assert results[0]["status"] == "error"
+    assert liquidity.pools() == make_pools()
+
+def test_snapshot_refreshes_after_interval():
+    fetches = []
+
+    def fetch():
+        fetches.append(1)
+        return make_pools()
+
+    clock = iter([0.0, 1.0, 20.0])
+    liquidity = BatchLiquidity(fetch, refresh_interval=12.0, clock=lambda: next(clock))
+    liquidity.pools()
+    liquidity.apply_swap(make_pools()[0], 10, 9)
+    assert liquidity.pools()[0].token0 == 10**6 + 10
+    assert liquidity.pools()[0].token0 == 10**6
+    assert len(fetches) == 2
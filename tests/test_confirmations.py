@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+# tests/test_confirmations.py
+
+import asyncio
+import time
+from collections import Counter
+import pytest
+from core.confirmations import (ConfirmationTracker, PENDING, INCLUDED, CONFIRMED, FAILED,
+                                REPLACED, DROPPED)
+
+ALICE = "0x" + "aa" * 20
+BOB = "0x" + "bb" * 20
+
+def tx_hash(i):
+    return "0x" + f"{i:064x}"
+
+class FakeChain:
+    """
+    Minimal JSON-RPC node: blocks of full transactions, receipts and a mempool.
+    """
+    def __init__(self):
+        self.blocks = [{"number": "0x0", "hash": tx_hash(10**9), "transactions": []}]
+        self.mempool = {}
+        self.receipts = {}
+        self.nonces = Counter()
+        self.calls = Counter()
+
+    def send(self, h, sender, nonce):
+        self.mempool[h] = {"hash": h, "from": sender, "nonce": hex(nonce), "blockNumber": None, "blockHash": None}
+
+    def mine(self, hashes=(), reverted=(), block_hash=None):
+        number = len(self.blocks)
+        block_hash = block_hash or tx_hash(10**9 + number)
+        txs = []
+        for h in hashes:
+            tx = self.mempool.pop(h)
+            tx.update(blockNumber=hex(number), blockHash=block_hash)
+            txs.append(tx)
+            self.receipts[h] = {"status": "0x0" if h in reverted else "0x1"}
+            self.nonces[tx["from"]] = max(self.nonces[tx["from"]], int(tx["nonce"], 16) + 1)
+        self.blocks.append({"number": hex(number), "hash": block_hash, "transactions": txs})
+
+    def call(self, method, params):
+        self.calls[method] += 1
+        if method == "eth_blockNumber":
+            return hex(len(self.blocks) - 1)
+        if method == "eth_getBlockByNumber":
+            number = int(params[0], 16)
+            return self.blocks[number] if number < len(self.blocks) else None
+        if method == "eth_getTransactionByHash":
+            if params[0] in self.mempool:
+                return self.mempool[params[0]]
+            for block in self.blocks:
+                for tx in block["transactions"]:
+                    if tx["hash"] == params[0]:
+                        return tx
+            return None
+        if method == "eth_getTransactionReceipt":
+            return self.receipts.get(params[0])
+        if method == "eth_getTransactionCount":
+            return hex(self.nonces[params[0]])
+        raise AssertionError(method)
+
+def test_thousands_of_pending_transactions_cost_one_block_fetch_per_block():
+    chain = FakeChain()
+    tracker = ConfirmationTracker(chain, confirmations=2)
+    hashes = [tx_hash(i) for i in range(2000)]
+    for i, h in enumerate(hashes):
+        chain.send(h, ALICE, i)
+        tracker.track(h, sender=ALICE, nonce=i)
+    tracker.poll()
+    chain.mine(hashes[:1000])
+    chain.mine(hashes[1000:], reverted={hashes[-1]})
+    tracker.poll()
+    assert tracker.get(hashes[0]).status == CONFIRMED
+    assert tracker.get(hashes[1500]).status == INCLUDED
+    chain.mine()
+    tracker.poll()
+    assert tracker.get(hashes[1500]).status == CONFIRMED and tracker.get(hashes[-1]).status == FAILED
+    assert chain.calls["eth_getBlockByNumber"] == 4 + 2  # 4 new blocks + canonical checks of 2 blocks
+    assert chain.calls["eth_getTransactionByHash"] == 0
+    assert tracker.pending_count == 0
+
+def test_replacement_detected_by_sender_and_nonce():
+    chain = FakeChain()
+    tracker = ConfirmationTracker(chain)
+    seen = []
+    chain.send(tx_hash(1), ALICE, 7)
+    tracker.track(tx_hash(1), callback=seen.append)  # sender/nonce looked up from the node
+    tracker.poll()
+    chain.mempool.pop(tx_hash(1))
+    chain.send(tx_hash(2), ALICE, 7)  # speed-up with the same nonce
+    chain.mine([tx_hash(2)])
+    tracker.poll()
+    tx = tracker.get(tx_hash(1))
+    assert tx.status == REPLACED and tx.replaced_by == tx_hash(2)
+    assert seen == [tx]
+
+def test_dropped_versus_replaced_by_unseen_transaction():
+    chain = FakeChain()
+    tracker = ConfirmationTracker(chain, drop_after=3)
+    chain.send(tx_hash(1), ALICE, 0)
+    chain.send(tx_hash(2), BOB, 0)
+    tracker.track(tx_hash(1), sender=ALICE, nonce=0)
+    tracker.track(tx_hash(2), sender=BOB, nonce=0)
+    tracker.poll()
+    chain.mempool.clear()
+    chain.nonces[BOB] = 1  # Bob's nonce was consumed in a block the tracker skipped
+    for _ in range(3):
+        chain.mine()
+        tracker.poll()
+    assert tracker.get(tx_hash(1)).status == DROPPED
+    assert tracker.get(tx_hash(2)).status == REPLACED and tracker.get(tx_hash(2)).replaced_by is None
+
+def test_transaction_mined_in_a_skipped_block_is_confirmed_not_replaced():
+    chain = FakeChain()
+    tracker = ConfirmationTracker(chain, drop_after=3, max_catch_up=2)
+    chain.send(tx_hash(1), ALICE, 0)
+    tracker.track(tx_hash(1), sender=ALICE, nonce=0)
+    tracker.poll()
+    chain.mine([tx_hash(1)])
+    for _ in range(4):
+        chain.mine()
+    tracker.poll()  # only the last 2 blocks are fetched; the drop check finds the tx mined
+    tx = tracker.get(tx_hash(1))
+    assert tx.status == INCLUDED and tx.block_number == 1
+    tracker.poll()
+    assert tx.status == CONFIRMED and tx.replaced_by is None and tracker.pending_count == 0
+
+def test_finished_transactions_are_evicted_by_count_and_age():
+    chain = FakeChain()
+    tracker = ConfirmationTracker(chain, max_finished=2)
+    for i in range(3):
+        chain.send(tx_hash(i), ALICE, i)
+        tracker.track(tx_hash(i), sender=ALICE, nonce=i)
+    tracker.poll()
+    chain.mine([tx_hash(0)])
+    tracker.poll()
+    chain.mine([tx_hash(1), tx_hash(2)])
+    tracker.poll()
+    assert tracker.get(tx_hash(0)) is None
+    assert tracker.get(tx_hash(1)).status == tracker.get(tx_hash(2)).status == CONFIRMED
+
+    tracker.finished_ttl = 0.01
+    time.sleep(0.02)
+    chain.mine()
+    tracker.poll()
+    assert tracker.get(tx_hash(1)) is None and tracker.get(tx_hash(2)) is None
+
+def test_reorged_inclusion_returns_to_pending():
+    chain = FakeChain()
+    tracker = ConfirmationTracker(chain, confirmations=2)
+    chain.send(tx_hash(1), ALICE, 0)
+    tracker.track(tx_hash(1), sender=ALICE, nonce=0)
+    tracker.poll()
+    chain.mine([tx_hash(1)])
+    tracker.poll()
+    assert tracker.get(tx_hash(1)).status == INCLUDED
+    # Block 1 is replaced by a block without the transaction.
+    orphaned = chain.blocks.pop()
+    chain.send(tx_hash(1), ALICE, 0)
+    chain.blocks.append({"number": "0x1", "hash": tx_hash(5), "transactions": []})
+    chain.mine()
+    tracker.poll()
+    assert tracker.get(tx_hash(1)).status == PENDING and orphaned["hash"] != tx_hash(5)
+
+def test_futures_resolve_from_the_background_loop():
+    async def scenario():
+        chain = FakeChain()
+        tracker = ConfirmationTracker(chain, poll_interval=0.01)
+        chain.send(tx_hash(1), ALICE, 0)
+        tracker.track(tx_hash(1), sender=ALICE, nonce=0)
+        tracker.start()
+        waiter = asyncio.create_task(tracker.wait(tx_hash(1), timeout=5))
+        await asyncio.sleep(0.05)
+        chain.mine([tx_hash(1)])
+        tx = await waiter
+        await tracker.stop()
+        with pytest.raises(KeyError):
+            await tracker.wait(tx_hash(99))
+        return tx
+
+    tx = asyncio.run(scenario())
+    assert tx.status == CONFIRMED and tx.block_number == 1
+
+def test_stop_cancels_a_start_scheduled_from_another_thread():
+    tracker = ConfirmationTracker(FakeChain(), poll_interval=0.01)
+    loop = asyncio.new_event_loop()
+    try:
+        tracker.start(loop)          # not the running loop: creation is only scheduled
+        asyncio.run(tracker.stop())  # runs before the loop gets to it
+        loop.run_until_complete(asyncio.sleep(0.02))
+        assert tracker._task is None and not asyncio.all_tasks(loop)
+
+        # A start after the stop wins again, and is not started twice.
+        tracker.start(loop)
+        asyncio.run(tracker.stop())
+        tracker.start(loop)
+        tracker.start(loop)
+        loop.run_until_complete(asyncio.sleep(0.02))
+        assert len(asyncio.all_tasks(loop)) == 1 and not tracker._task.done()
+        loop.run_until_complete(tracker.stop())
+        assert not asyncio.all_tasks(loop)
+    finally:
+        loop.close()
+
+def test_submitted_swaps_are_tracked_with_their_nonce(monkeypatch):
+    pytest.importorskip("fastapi")
+    monkeypatch.setenv("SWAP_ROUTER_ABI", "[]")
+    from core.execution import SubmittedTx
+    from interfaces import api
+
+    tracker = ConfirmationTracker(FakeChain())
+    monkeypatch.setattr(api, "get_tracker", lambda chain: tracker)
+    monkeypatch.setattr(api, "_event_loop", object())
+    monkeypatch.setattr(tracker, "start", lambda loop: None)
+    submitted = SubmittedTx(tx_hash(1), nonce=7)
+    assert submitted == tx_hash(1) and submitted.nonce == 7
+    api.track_submitted(submitted, "Ethereum", ALICE.upper())
+    api.track_submitted("Transaction failed: reverted", "Ethereum", ALICE)
+    assert tracker.get(tx_hash(1)).nonce == 7 and tracker.pending_count == 1
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# tests/test_cross_chain.py
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from core.cross_chain import (BridgeModel, StaticBridgeModel, BridgeLane, plan_routes, best_route,
+                              solve_chain)
+from core.pools import Pool
+
+POOLS = [
+    Pool(pool="Uniswap", chain="Ethereum", token0=10**21, token1=10**21),
+    Pool(pool="SushiSwap", chain="Ethereum", token0=2 * 10**21, token1=2 * 10**21),
+    Pool(pool="PancakeSwap", chain="BSC", token0=5 * 10**21, token1=5 * 10**21),
+    Pool(pool="Helix", chain="Injective", token0=10**22, token1=10**22),
+]
+
+BRIDGES = StaticBridgeModel({
+    ("Ethereum", "BSC"): BridgeLane(fee_bps=10, latency=600.0),
+    ("Ethereum", "Injective"): BridgeLane(fee_bps=10, latency=600.0, capacity=10**19),
+})
+
+def test_static_bridge_model_fees_capacity_and_same_chain():
+    quote = BRIDGES.quote("Ethereum", "BSC", 10**20)
+    assert quote.amount_out == 10**20 - 10**17 and quote.fee == 10**17 and quote.latency == 600.0
+    assert BRIDGES.quote("Ethereum", "Injective", 10**20) is None  # over capacity
+    assert BRIDGES.quote("BSC", "Ethereum", 10**20) is None        # no lane
+    same = BRIDGES.quote("BSC", "BSC", 10**20)
+    assert same.amount_out == 10**20 and same.latency == 0
+
+def test_solve_chain_only_uses_pools_of_that_chain():
+    pool = solve_chain("Ethereum", POOLS, 10**20, iterations=50)
+    assert pool.pool == "SushiSwap" and pool.chain == "Ethereum"
+    assert solve_chain("Solana", POOLS, 10**20) is None
+
+def test_plan_combines_chains_with_bridge_costs():
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        routes = plan_routes(POOLS, 10**20, "Ethereum", bridge_model=BRIDGES, iterations=50, executor=executor)
+    # Injective is over the lane capacity; BSC's deeper pool beats Ethereum despite the fee.
+    assert [route.chain for route in routes] == ["BSC", "Ethereum"]
+    bsc = routes[0]
+    assert bsc.requires_bridge and bsc.pool.chain == bsc.chain
+    assert bsc.amount_in == 10**20 - 10**17
+    assert bsc.expected_output == bsc.pool.expected_output
+    assert bsc.score < bsc.expected_output  # latency discount
+
+def test_latency_weight_can_favour_the_source_chain():
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        route = best_route(POOLS, 10**20, "Ethereum", bridge_model=BRIDGES, iterations=50,
+                           latency_weight=1e-3, executor=executor)
+    assert route.chain == "Ethereum" and not route.requires_bridge
+
+def test_plan_solves_chains_in_worker_processes():
+    routes = plan_routes(POOLS, 10**19, "Ethereum", bridge_model=BRIDGES, iterations=50, timeout=120)
+    assert {route.chain for route in routes} == {"Ethereum", "BSC", "Injective"}
+    assert all(route.pool.chain == route.chain for route in routes)
+
+def test_plan_restricted_to_one_chain():
+    routes = plan_routes(POOLS, 10**19, "Ethereum", bridge_model=BRIDGES, chains=["Ethereum"], iterations=50)
+    assert [route.chain for route in routes] == ["Ethereum"]
+
+def test_bridge_model_is_abstract():
+    with pytest.raises(TypeError):
+        BridgeModel()
+
+def test_timed_out_solves_release_their_workers():
+    assert solve_chain("Ethereum", POOLS, 10**20, iterations=50, deadline=time.time() - 1) is None
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        start = time.perf_counter()
+        routes = plan_routes(POOLS, 10**19, "Ethereum", bridge_model=BRIDGES, iterations=10**8,
+                             executor=executor, timeout=0.2)
+        assert routes == []
+        # The abandoned searches stop at the deadline, so the workers are free again.
+        assert executor.submit(lambda: "free").result(timeout=5) == "free"
+        assert time.perf_counter() - start < 5
+
+def test_single_chain_plan_honours_the_timeout():
+    start = time.perf_counter()
+    routes = plan_routes(POOLS, 10**19, "Ethereum", bridge_model=BRIDGES, chains=["Ethereum"],
+                         iterations=10**8, timeout=0.2)
+    assert routes == [] and time.perf_counter() - start < 5
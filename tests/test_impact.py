@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+# tests/test_impact.py
+
+import pytest
+from core.impact import QuoteCurve, CurveCache
+from core.pools import Pool
+from core.quoting import get_amount_out
+from core.mcts_router import MCTSNode, mcts
+
+RESERVE_IN = 10**21
+RESERVE_OUT = 3 * 10**21
+
+def test_interpolated_output_within_error_bound():
+    curve = QuoteCurve(RESERVE_IN, RESERVE_OUT, fee_bps=30)
+    assert 0 <= curve.error_bound < 0.005
+    for amount in (10**16 + 12345, 7 * 10**18 + 1, 3 * 10**20 + 17, 5 * 10**21):
+        exact = get_amount_out(amount, RESERVE_IN, RESERVE_OUT, fee_bps=30)
+        approx = curve.output(amount)
+        # Concave curve: interpolation never overshoots, and stays within the bound.
+        assert approx <= exact * (1 + 1e-12)
+        assert (exact - approx) / exact <= curve.error_bound + 1e-9
+
+def test_depth_matches_closed_form():
+    curve = QuoteCurve(RESERVE_IN, RESERVE_OUT)
+    # Without fees the CPMM impact is a / (x + a), so depth(p) = x * p / (1 - p).
+    expected = RESERVE_IN * 0.01 / 0.99
+    assert curve.depth(0.01) == pytest.approx(expected, rel=0.01)
+    assert curve.price_impact(curve.depth(0.01)) == pytest.approx(0.01, rel=0.02)
+
+@pytest.mark.parametrize("reserve", [10**6, 10**7, 10**21])
+def test_depth_with_fee_is_not_poisoned_by_truncated_small_quotes(reserve):
+    curve = QuoteCurve(reserve, reserve, fee_bps=30)
+    # With fee factor g the impact is g*a / (x + g*a), so depth(p) = x * p / (g * (1 - p)).
+    expected = reserve * 0.01 / (0.997 * 0.99)
+    assert curve.depth(0.01) == pytest.approx(expected, rel=0.02)
+    assert all(curve.outputs > 0)
+
+def test_marginal_price():
+    curve = QuoteCurve(RESERVE_IN, RESERVE_OUT)
+    assert curve.marginal_price() == pytest.approx(3.0)
+    assert curve.marginal_price(RESERVE_IN) == pytest.approx(3.0 / 4, rel=0.01)
+
+def test_curve_cache_rebuilds_only_on_reserve_change():
+    cache = CurveCache()
+    pool = Pool(pool="Uniswap", chain="Ethereum", token0=RESERVE_IN, token1=RESERVE_OUT)
+    first = cache.get(pool)
+    assert cache.get(pool) is first
+    moved = Pool(pool="Uniswap", chain="Ethereum", token0=RESERVE_IN + 1, token1=RESERVE_OUT)
+    assert cache.get(moved) is not first
+    assert cache.get(Pool(pool="Injective", chain="Injective", error="down")) is None
+
+def test_depth_report_and_router_use_curves():
+    cache = CurveCache()
+    pools = [
+        Pool(pool="Uniswap", chain="Ethereum", token0=10**6, token1=10**6),
+        Pool(pool="PancakeSwap", chain="BSC", token0=2 * 10**6, token1=2 * 10**6),
+    ]
+    report = cache.depth_report(pools, 0.01)
+    assert [entry["pool"] for entry in report] == ["Uniswap", "PancakeSwap"]
+    assert report[1]["depth"] > report[0]["depth"]
+    best = mcts(MCTSNode(), iterations=100, swap_input=10**5, available_pools=pools, curves=cache)
+    assert best.pool.pool == "PancakeSwap"
@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+# tests/test_market_dataset.py
+
+import numpy as np
+import pytest
+from data.market_dataset import (MarketDataset, EpisodePrefetcher, write_dataset,
+                                 generate_synthetic_dataset)
+
+def test_write_and_memory_map_round_trip(tmp_path):
+    steps, routes = 10, 2
+    reserves = np.arange(steps * routes * 2, dtype=np.float64).reshape(steps, routes, 2)
+    volatility = np.linspace(0, 1, steps)
+    slippage = np.ones((steps, routes))
+    write_dataset(tmp_path, reserves, volatility, slippage)
+
+    dataset = MarketDataset(tmp_path)
+    assert (dataset.steps, dataset.routes) == (steps, routes)
+    assert isinstance(dataset.reserves, np.memmap)
+    window = dataset.read(3, 4, routes=1)
+    assert window["reserves"].shape == (4, 1, 2)
+    assert not isinstance(window["reserves"], np.memmap)
+    np.testing.assert_array_equal(window["reserves"], reserves[3:7, :1])
+
+def test_write_dataset_rejects_mismatched_shapes(tmp_path):
+    with pytest.raises(ValueError):
+        write_dataset(tmp_path, np.zeros((5, 2, 2)), np.zeros(4), np.zeros((5, 2)))
+
+def test_prefetcher_yields_contiguous_episodes(tmp_path):
+    generate_synthetic_dataset(tmp_path, steps=2000, routes=4, seed=1)
+    dataset = MarketDataset(tmp_path)
+    prefetcher = EpisodePrefetcher(dataset, episode_length=20, routes=3, chunk_episodes=8, seed=0)
+    try:
+        for _ in range(50):
+            episode = prefetcher.next_episode()
+            assert episode["reserves"].shape == (21, 3, 2)
+            assert episode["slippage"].shape == (21, 3)
+            assert np.all((episode["slippage"] >= 0) & (episode["slippage"] <= 100))
+            # Each episode is a contiguous window of the dataset.
+            start = int(np.flatnonzero(dataset.volatility == episode["volatility"][0])[0])
+            np.testing.assert_array_equal(episode["volatility"], dataset.volatility[start:start + 21])
+    finally:
+        prefetcher.close()
+
+def test_prefetcher_requires_enough_steps(tmp_path):
+    generate_synthetic_dataset(tmp_path, steps=10, routes=2)
+    with pytest.raises(ValueError):
+        EpisodePrefetcher(MarketDataset(tmp_path), episode_length=50)
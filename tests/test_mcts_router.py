@@ -1,8 +1,14 @@
 #!/usr/bin/env python
 # tests/test_mcts_router.py
 
+import random
+import threading
 import pytest
-from core.mcts_router import MCTSNode, mcts, simulate
+from core.mcts_router import (MCTSNode, mcts, mcts_puct, simulate, QuoteEvaluator,
+                              UniformEvaluator, ReserveEvaluator, get_evaluator,
+                              iterations_to_converge, benchmark_convergence,
+                              NodePool, mcts_bounded, mev_safe_outputs, candidate_routes)
+from core.pools import Pool
 
 def test_mcts_returns_best_route():
     # Create dummy liquidity pools as test data.
@@ -18,3 +24,196 @@ def test_mcts_returns_best_route():
     # Check that simulation returns a numerical output.
     output = simulate(best_node, 10)
     assert isinstance(output, (int, float))
+
+def make_pools(n, seed=0):
+    rng = random.Random(seed)
+    return [
+        Pool(pool=f"Pool{i}", chain="Ethereum",
+             token0=rng.randint(10**20, 10**22), token1=rng.randint(10**20, 10**22))
+        for i in range(n)
+    ]
+
+def test_puct_finds_exact_best_route():
+    pools = make_pools(50)
+    best_output = max(QuoteEvaluator().quote_pools(pools, 10**19))
+    best_node = mcts_puct(MCTSNode(), iterations=64, swap_input=10**19, available_pools=pools,
+                          evaluator=QuoteEvaluator())
+    assert simulate(best_node, 10**19) == best_output
+
+def test_puct_requires_an_explicit_evaluator():
+    with pytest.raises(TypeError):
+        mcts_puct(MCTSNode(), iterations=8, swap_input=10**19, available_pools=make_pools(5))
+
+def test_benchmark_uses_priors_that_do_not_contain_the_answer():
+    result = benchmark_convergence(make_pools(50, 1), 10**19, max_iterations=2**11, seeds=4)
+    assert set(result) == {"uct", "puct_uniform", "puct_reserve"}
+    assert all(value is not None for value in result.values())
+
+def test_benchmark_ranks_searches_by_prior_quality():
+    # Stable convergence averaged over candidate orders: the exact-quote prior beats UCT,
+    # and a uniform prior (PUCT without knowledge) needs more iterations than UCT.
+    result = benchmark_convergence(make_pools(50, 1), 10**19, max_iterations=2**11, seeds=4,
+                                   evaluators={"quote": QuoteEvaluator(), "uniform": UniformEvaluator()})
+    assert result["puct_quote"] < result["uct"] < result["puct_uniform"]
+
+def test_convergence_requires_staying_correct():
+    calls = []
+
+    def flaky(root, iterations, swap_input, pools):
+        calls.append(iterations)
+        best = max(pools, key=lambda pool: simulate(MCTSNode(pool=pool), swap_input))
+        return MCTSNode(pool=best if iterations in (1, 8, 16) else pools[0] if pools[0] is not best else pools[1])
+
+    assert iterations_to_converge(flaky, make_pools(5), 10**19, max_iterations=16) == 8
+    assert calls == [1, 2, 4, 8, 16]
+
+def test_reserve_prior_ignores_swap_size_and_input_reserve():
+    pools = [Pool(pool="Shallow", chain="Ethereum", token0=10, token1=10**20),
+             Pool(pool="Deep", chain="Ethereum", token0=10**30, token1=10**21)]
+    priors = ReserveEvaluator().priors(pools, [0, 0], 10**19)
+    assert priors[1] > priors[0] and sum(priors) == pytest.approx(1.0)
+
+def test_puct_converges_with_uninformative_priors():
+    pools = make_pools(20)
+    assert iterations_to_converge(mcts_puct, pools, 10**19, max_iterations=2**14,
+                                  evaluator=UniformEvaluator()) is not None
+
+def test_get_evaluator_falls_back_to_quotes_only_when_allowed(tmp_path):
+    missing = str(tmp_path / "no_model")
+    assert type(get_evaluator("policy", model_path=missing)) is QuoteEvaluator
+    with pytest.raises((ImportError, FileNotFoundError, OSError)):
+        get_evaluator("policy", model_path=missing, fallback=False)
+    assert isinstance(get_evaluator("uniform"), UniformEvaluator)
+    with pytest.raises(ValueError):
+        get_evaluator("oracle")
+
+def test_policy_evaluator_supplies_puct_priors(tmp_path):
+    pytest.importorskip("gym")
+    sb3 = pytest.importorskip("stable_baselines3")
+    import numpy as np
+    from data.market_dataset import generate_synthetic_dataset
+    from models.train_model import SwapEnv
+    from models.predict import PolicyEvaluator
+
+    generate_synthetic_dataset(str(tmp_path / "market"), steps=500, routes=4)
+    env = SwapEnv(dataset_path=str(tmp_path / "market"), episode_length=20, seed=0)
+    model = sb3.PPO("MlpPolicy", env, n_steps=64, batch_size=32, seed=0)
+    model.learn(total_timesteps=64)
+    path = str(tmp_path / "swap_model")
+    model.save(path)
+    env.close()
+
+    evaluator = get_evaluator("policy", model_path=path, fallback=False)
+    assert isinstance(evaluator, PolicyEvaluator) and evaluator.n_routes == 4
+    pools = make_pools(10)
+    outputs = evaluator.quote_pools(pools, 10**19)
+    observations = evaluator.observations(pools, outputs, 10**19)
+    assert observations.shape == (3, 2 + 2 * 4)  # 10 candidates in groups of 4 routes
+    assert np.all(observations[2, 4:6] == 0)  # unused route slots of the last group are empty
+    priors = evaluator.priors(pools, outputs, 10**19)
+    assert len(priors) == 10 and sum(priors) == pytest.approx(1.0)
+    best_node = mcts_puct(MCTSNode(), iterations=256, swap_input=10**19, available_pools=pools,
+                          evaluator=evaluator)
+    assert simulate(best_node, 10**19) == max(outputs)
+
+    # A policy trained on the synthetic environment has abstract actions, not routes.
+    synthetic = sb3.PPO("MlpPolicy", SwapEnv(), n_steps=64, batch_size=32, seed=0)
+    synthetic.save(str(tmp_path / "synthetic_model"))
+    with pytest.raises(ValueError):
+        get_evaluator("policy", model_path=str(tmp_path / "synthetic_model"), fallback=False)
+    assert type(get_evaluator("policy", model_path=str(tmp_path / "synthetic_model"))) is QuoteEvaluator
+
+def test_puct_batches_leaf_evaluations_and_reverts_virtual_loss():
+    calls = []
+
+    class CountingEvaluator(QuoteEvaluator):
+        def evaluate(self, nodes, swap_input, candidate_pools=None):
+            calls.append(len(nodes))
+            return super().evaluate(nodes, swap_input, candidate_pools)
+
+    root = MCTSNode()
+    mcts_puct(root, iterations=32, swap_input=10**19, available_pools=make_pools(10),
+              evaluator=CountingEvaluator(), batch_size=8)
+    assert calls == [1, 8, 8, 8, 8]  # root priors, then four batches of leaves
+    assert root.visits == 32
+    assert sum(child.visits for child in root.children) == 32
+
+def test_node_pool_recycles_released_subtrees():
+    node_pool = NodePool(3)
+    parent = node_pool.acquire()
+    child = node_pool.acquire(parent=parent)
+    parent.children.append(child)
+    assert node_pool.acquire() is not None and node_pool.acquire() is None
+    node_pool.release(parent)
+    assert node_pool.in_use == 1
+    recycled = node_pool.acquire(pool="p")
+    assert recycled in (parent, child) and recycled.visits == 0 and recycled.children == []
+    assert node_pool.allocated == 3
+
+def test_bounded_search_stays_within_node_budget():
+    pools = make_pools(10)
+    node_pool = NodePool(100)
+    allocation, output = mcts_bounded(MCTSNode(), 3000, 10**20, pools, splits=4,
+                                      node_budget=100, node_pool=node_pool, rng=random.Random(0))
+    assert node_pool.allocated <= 100 and node_pool.in_use <= 100
+    assert sum(amount for _, amount in allocation) == 10**20
+    single_best = max(simulate(MCTSNode(pool=pool), 10**20) for pool in pools)
+    assert output >= single_best
+
+def _live_nodes(root):
+    count, stack = 0, list(root.children)
+    while stack:
+        node = stack.pop()
+        count += 1
+        stack.extend(node.children)
+    return count
+
+def test_bounded_search_pruning_never_recycles_the_selection_path():
+    for seed in range(12):
+        root, node_pool, result = MCTSNode(), NodePool(100), []
+        worker = threading.Thread(target=lambda: result.append(mcts_bounded(
+            root, 3000, 10**20, make_pools(10), splits=4, node_budget=100, node_pool=node_pool,
+            rng=random.Random(seed))), daemon=True)
+        worker.start()
+        worker.join(timeout=30)
+        assert not worker.is_alive(), f"bounded search did not finish for seed {seed}"
+        assert result and sum(amount for _, amount in result[0][0]) == 10**20
+        # Every node counted as in use is still attached to the tree.
+        assert _live_nodes(root) == node_pool.in_use <= 100
+
+def test_bounded_search_splits_across_equal_pools():
+    pools = [Pool(pool="A", chain="Ethereum", token0=10**6, token1=10**6),
+             Pool(pool="B", chain="Ethereum", token0=10**6, token1=10**6)]
+    allocation, output = mcts_bounded(MCTSNode(), 200, 10**6, pools, splits=2,
+                                      node_budget=16, rng=random.Random(0))
+    assert sorted((pool.pool, amount) for pool, amount in allocation) == [("A", 5 * 10**5), ("B", 5 * 10**5)]
+    assert output > simulate(MCTSNode(pool=pools[0]), 10**6)
+
+def test_bounded_search_rejects_budget_below_one_expansion():
+    with pytest.raises(ValueError):
+        mcts_bounded(MCTSNode(), 10, 10, make_pools(10), node_budget=5)
+
+def test_mev_adjusted_rewards_prefer_the_route_with_the_higher_safe_output():
+    e = 10**18
+    swap_input, gas_cost = 10 * e, 5 * 10**16
+    # The shallow pool quotes slightly less, but leaves less headroom to a sandwich.
+    shallow = Pool(pool="Shallow", chain="Ethereum", token0=100 * e, token1=326_700 * e)
+    deep = Pool(pool="Deep", chain="Ethereum", token0=1000 * e, token1=3_000_000 * e)
+    pools = [shallow, deep]
+    quotes = [simulate(MCTSNode(pool=pool), swap_input) for pool in pools]
+    safe = mev_safe_outputs(pools, swap_input, gas_cost)
+    assert quotes[0] < quotes[1] and safe[0] > safe[1] and all(s < q for s, q in zip(safe, quotes))
+    assert mcts(MCTSNode(), 200, swap_input, pools).pool.pool == "Deep"
+    assert mcts(MCTSNode(), 200, swap_input, pools, gas_cost=gas_cost).pool.pool == "Shallow"
+    evaluator = get_evaluator("quote", gas_cost=gas_cost)
+    assert mcts_puct(MCTSNode(), 50, swap_input, pools, evaluator).pool.pool == "Shallow"
+    assert mev_safe_outputs([{"pool": "X", "chain": "Ethereum", "error": "down"}], swap_input, gas_cost) == [0]
+
+def test_candidate_routes_rank_the_best_node_and_its_siblings():
+    pools = make_pools(10)
+    outputs = QuoteEvaluator().quote_pools(pools, 10**19)
+    best_node = mcts(MCTSNode(), 500, 10**19, pools)
+    routes = candidate_routes(best_node, 10**19, k=3)
+    assert len(routes) == 3 and routes[0].pool == best_node.pool.pool
+    assert [route.expected_output for route in routes] == sorted(outputs, reverse=True)[:3]
+    assert candidate_routes(MCTSNode(pool=pools[0]), 10**19) == [pools[0].with_expected_output(outputs[0])]
@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+# tests/test_metrics.py
+
+import pytest
+from core.metrics import (
+    MetricsRegistry,
+    Counter,
+    Histogram,
+    time_stage,
+    rpc_call,
+    record_cache,
+    render_metrics,
+)
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    hist = Histogram("test_latency_seconds", "Test latency.", ["stage"], registry=registry, buckets=(0.1, 1.0))
+    hist.observe(0.05, stage="mcts")
+    hist.observe(0.5, stage="mcts")
+    hist.observe(5.0, stage="mcts")
+    text = registry.render()
+    assert '# TYPE test_latency_seconds histogram' in text
+    assert 'test_latency_seconds_bucket{stage="mcts",le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{stage="mcts",le="1"} 2' in text
+    assert 'test_latency_seconds_bucket{stage="mcts",le="+Inf"} 3' in text
+    assert 'test_latency_seconds_count{stage="mcts"} 3' in text
+
+def test_counter_requires_all_labels():
+    registry = MetricsRegistry()
+    counter = Counter("test_calls_total", "Test calls.", ["chain", "method"], registry=registry)
+    counter.labels("Ethereum", "eth_call").inc()
+    counter.labels(chain="Ethereum", method="eth_call").inc(2)
+    assert 'test_calls_total{chain="Ethereum",method="eth_call"} 3' in registry.render()
+    with pytest.raises(ValueError):
+        counter.labels("Ethereum")
+
+def test_rpc_call_counts_errors():
+    with pytest.raises(RuntimeError):
+        with rpc_call("TestChain", "eth_boom"):
+            raise RuntimeError("boom")
+    text = render_metrics()
+    assert 'defai_rpc_calls_total{chain="TestChain",method="eth_boom"} 1' in text
+    assert 'defai_rpc_errors_total{chain="TestChain",method="eth_boom"} 1' in text
+
+def test_stage_and_cache_metrics_are_exposed():
+    with time_stage("test_stage"):
+        pass
+    record_cache("test_cache", True)
+    text = render_metrics()
+    assert 'defai_stage_latency_seconds_count{stage="test_stage"} 1' in text
+    assert 'defai_cache_requests_total{cache="test_cache",result="hit"} 1' in text
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# tests/test_mev.py
+
+import time
+import numpy as np
+from core.mev import (max_front_run, sandwich_profit, max_extractable_value, safe_min_output,
+                      safe_min_output_batch, route_min_output, gas_token_price_for, WRAPPED_NATIVE)
+from core.pools import Pool
+from core.quoting import get_amount_out
+
+X, Y = 1000 * 10**18, 3_000_000 * 10**18
+V = 10 * 10**18
+GAS = 5 * 10**15
+
+def test_max_front_run_leaves_victim_exactly_at_min_output():
+    for fee_bps in (0, 30):
+        g = 1 - fee_bps / 10000
+        expected = g * V * Y / (X + g * V)
+        m = expected * 0.99
+        a = float(max_front_run(V, X, Y, m, fee_bps))
+        y1 = X * Y / (X + g * a)
+        assert abs(g * V * y1 / (X + a + g * V) - m) / m < 1e-9
+    assert max_front_run(V, X, Y, 10**30) == 0
+
+def test_mev_grows_with_slippage_tolerance_and_matches_direct_simulation():
+    expected = get_amount_out(V, X, Y)
+    tolerances = [expected * (1 - bps / 10000) for bps in (10, 50, 100, 300)]
+    mev = max_extractable_value(V, X, Y, tolerances, gas_cost=GAS)
+    assert np.all(np.diff(mev) > 0) and mev[-1] > 0
+    a = max_front_run(V, X, Y, tolerances[-1])
+    assert mev[-1] >= sandwich_profit(a, V, X, Y, gas_cost=GAS) - 1e-6 * abs(mev[-1])
+    assert max_extractable_value(V, X, Y, expected, gas_cost=GAS) <= 0
+
+def test_safe_min_output_is_the_profitability_threshold():
+    expected = get_amount_out(V, X, Y)
+    safe = safe_min_output(V, X, Y, gas_cost=GAS)
+    assert safe < expected
+    assert max_extractable_value(V, X, Y, safe, gas_cost=GAS) <= 0
+    assert max_extractable_value(V, X, Y, safe * 0.999, gas_cost=GAS) > 0
+    # More expensive attacks leave more slippage headroom; free gas allows none.
+    assert safe_min_output(V, X, Y, gas_cost=10 * GAS) < safe
+    assert safe_min_output(V, X, Y) >= expected * (1 - 1e-9)
+    assert safe_min_output(V, X, Y, gas_cost=10**30, max_slippage_bps=50) >= expected * 0.995 - 1
+
+def test_batch_handles_invalid_rows_and_is_fast():
+    assert safe_min_output_batch([V, 0, V], [X, X, 0], [Y, Y, Y], gas_cost=GAS)[1:] == [0, 0]
+    rng = np.random.default_rng(0)
+    n = 10_000
+    start = time.perf_counter()
+    result = safe_min_output_batch(rng.uniform(1e17, 1e20, n), rng.uniform(1e20, 1e22, n),
+                                   rng.uniform(1e22, 1e25, n), gas_cost=GAS)
+    assert len(result) == n and time.perf_counter() - start < 5.0
+
+def test_route_min_output_is_capped_by_expected_output():
+    expected = get_amount_out(V, X, Y)
+    route = Pool(pool="Uniswap", chain="Ethereum", token0=X, token1=Y, expected_output=expected)
+    bound = route_min_output(route, V, gas_price=30 * 10**9, gas_token_price=1)
+    assert 0 < bound < expected
+    assert route_min_output(route, V) <= expected
+    assert route_min_output({"expected_output": 95}, 10) == 95
+
+def test_gas_token_price_is_derived_from_routes_trading_the_native_token():
+    weth = WRAPPED_NATIVE["Ethereum"]
+    sell_eth = Pool(pool="Uniswap", chain="Ethereum", token0=X, token1=Y, expected_output=get_amount_out(V, X, Y))
+    buy_eth = Pool(pool="Uniswap", chain="Ethereum", token0=Y, token1=X)
+    assert gas_token_price_for(sell_eth, token_in=weth.upper()) == 1.0
+    assert gas_token_price_for(buy_eth, token_out=weth) == Y / X
+    assert gas_token_price_for(sell_eth, token_in="0x" + "11" * 20) is None
+    # Callers passing the pair get a bound that leaves gas-priced headroom.
+    derived = route_min_output(sell_eth, V, gas_price=30 * 10**9, token_in=weth)
+    assert derived == route_min_output(sell_eth, V, gas_price=30 * 10**9, gas_token_price=1.0)
+    assert derived < route_min_output(sell_eth, V, gas_price=30 * 10**9)
+
+def test_interior_optimal_front_run_is_found():
+    # With a 99% tolerance the best front-run is about a quarter of the largest feasible
+    # one, between grid points; a dense scan bounds the true optimum from below.
+    expected = get_amount_out(V, X, Y)
+    m = expected * 0.01
+    fronts = np.linspace(0, float(max_front_run(V, X, Y, m, 30)), 200_001)
+    profits = sandwich_profit(fronts, V, X, Y, fee_bps=30)
+    assert 0.1 < profits.argmax() / 200_000 < 0.9
+    assert float(max_extractable_value(V, X, Y, m, fee_bps=30)) >= profits.max() * (1 - 1e-9)
+
+def test_unknown_gas_token_price_is_logged(caplog):
+    route = Pool(pool="Uniswap", chain="Ethereum", token0=X, token1=Y, expected_output=get_amount_out(V, X, Y))
+    with caplog.at_level("WARNING", logger="core.mev"):
+        route_min_output(route, V, gas_price=30 * 10**9, gas_token_price=1)
+        assert not caplog.records
+        route_min_output(route, V, gas_price=30 * 10**9)
+    assert "GAS_TOKEN_PRICE" in caplog.text
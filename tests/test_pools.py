@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+# tests/test_pools.py
+
+import dataclasses
+import json
+import pytest
+from core.pools import Pool, PoolTable, as_pool, encode_json
+
+def test_pool_is_immutable_and_compact():
+    pool = Pool(pool="Uniswap", chain="Ethereum", token0=100, token1=100)
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        pool.token0 = 1
+    assert not hasattr(pool, "__dict__")
+    assert hash(pool) == hash(Pool(pool="Uniswap", chain="Ethereum", token0=100, token1=100))
+
+def test_with_expected_output_does_not_mutate_shared_pool():
+    pool = Pool(pool="Uniswap", chain="Ethereum", token0=100, token1=100)
+    route = pool.with_expected_output(9)
+    assert route.expected_output == 9
+    assert pool.expected_output is None
+    assert "expected_output" not in pool
+
+def test_pool_mapping_compatibility():
+    pool = as_pool({"token0": 100, "token1": 50, "pool": "Uniswap", "chain": "Ethereum", "extra": 1})
+    assert pool["token0"] == 100 and pool.get("token1") == 50
+    assert "error" not in pool
+    assert pool.get("expected_output", 0) == 0
+    with pytest.raises(KeyError):
+        pool["extra"]
+    broken = as_pool({"error": "Unable to fetch data", "pool": "Injective", "chain": "Injective"})
+    assert "error" in broken and broken.token0 == 0
+    assert pool.to_dict() == {"pool": "Uniswap", "chain": "Ethereum", "token0": 100, "token1": 50}
+
+def test_pool_table_quotes_and_best():
+    table = PoolTable.from_pools([
+        {"token0": 100, "token1": 100, "pool": "Uniswap", "chain": "Ethereum"},
+        {"token0": 150, "token1": 150, "pool": "PancakeSwap", "chain": "BSC"},
+        {"error": "down", "pool": "Injective", "chain": "Injective"},
+    ])
+    assert len(table) == 3
+    assert table.quote(10) == [10, 10, 0]
+    best, output = table.best(50)
+    assert best.pool == "PancakeSwap" and output == best.expected_output
+    assert [pool.pool for pool in table.where_chain("BSC")] == ["PancakeSwap"]
+
+def test_encode_json_handles_pools_and_big_ints():
+    pools = [Pool(pool="Uniswap", chain="Ethereum", token0=10**24, token1=5)]
+    decoded = json.loads(encode_json({"liquidity": pools}))
+    assert decoded == {"liquidity": [{"pool": "Uniswap", "chain": "Ethereum", "token0": 10**24, "token1": 5}]}
+    assert json.loads(encode_json(PoolTable.from_pools(pools))) == decoded["liquidity"]
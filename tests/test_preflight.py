@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# tests/test_preflight.py
+
+import os
+import time
+import pytest
+from eth_abi import encode
+from core.preflight import (
+    ERROR_STRING_SELECTOR,
+    encode_swap_exact_tokens,
+    preflight_transactions,
+    filter_executable,
+)
+
+ZERO = "0x0000000000000000000000000000000000000000"
+ROUTER = "0x00000000000000000000000000000000000000aa"
+
+def _revert_data(reason):
+    return "0x" + (ERROR_STRING_SELECTOR + encode(["string"], [reason])).hex()
+
+def test_encode_swap_exact_tokens_selector():
+    data = encode_swap_exact_tokens(ZERO, ZERO, 10, 9, ZERO, 1)
+    assert data.startswith("0x243a8c09")
+    # Selector plus six 32-byte arguments.
+    assert len(data) == 2 + 8 + 6 * 64
+
+def test_preflight_sends_one_batch_and_drops_reverts():
+    calls = []
+
+    class FakeTransport:
+        def post(self, payload):
+            return fake_post(payload)
+
+    def fake_post(payload):
+        calls.append(payload)
+        responses = []
+        for request in payload:
+            tx_index = request["id"] // 2
+            if tx_index == 1:
+                responses.append({"id": request["id"], "error": {"code": 3, "message": "execution reverted", "data": _revert_data("SwapRouter: transaction expired")}})
+            elif request["method"] == "eth_call":
+                responses.append({"id": request["id"], "result": "0x" + (95).to_bytes(32, "big").hex()})
+            else:
+                responses.append({"id": request["id"], "result": hex(100000)})
+        # Nodes may answer batch members in any order.
+        return list(reversed(responses))
+
+    txs = [
+        {"to": ROUTER, "from": ZERO, "data": encode_swap_exact_tokens(ZERO, ZERO, 10, 9, ZERO, int(time.time()) + 300)},
+        {"to": ROUTER, "from": ZERO, "data": encode_swap_exact_tokens(ZERO, ZERO, 10, 9, ZERO, 0)},
+    ]
+    results = preflight_transactions(FakeTransport(), txs, gas_margin=0.1)
+
+    assert len(calls) == 1
+    assert [r["method"] for r in calls[0]] == ["eth_call", "eth_estimateGas"] * 2
+    assert results[0].ok and results[0].gas_limit == 110000 and results[0].output_amount == 95
+    assert not results[1].ok and results[1].error == "SwapRouter: transaction expired"
+
+    executable, dropped = filter_executable(results)
+    assert len(executable) == 1 and executable[0]["gas"] == 110000
+    assert dropped[0].tx is txs[1]
+
+def test_preflight_rejected_batch_raises():
+    class RejectingTransport:
+        def post(self, payload):
+            return {"error": {"message": "batch not supported"}}
+
+    with pytest.raises(RuntimeError):
+        preflight_transactions(RejectingTransport(), [{"to": ROUTER, "data": "0x"}])
+
+@pytest.mark.skipif(
+    not (os.getenv("DEV_CHAIN_RPC") and os.getenv("DEV_SWAP_ROUTER_ADDRESS")),
+    reason="requires a local dev chain with SwapRouter deployed (DEV_CHAIN_RPC, DEV_SWAP_ROUTER_ADDRESS)",
+)
+def test_preflight_drops_expired_swap_on_dev_chain():
+    data = encode_swap_exact_tokens(ZERO, ZERO, 10, 9, ZERO, 1)
+    tx = {"to": os.getenv("DEV_SWAP_ROUTER_ADDRESS"), "data": data}
+    result = preflight_transactions(os.getenv("DEV_CHAIN_RPC"), [tx])[0]
+    assert not result.ok
+    assert "expired" in result.error
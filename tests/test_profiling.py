@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+# tests/test_profiling.py
+
+import os
+import time
+import pytest
+from core.profiling import profile_request, ContinuousSampler
+
+def _busy(seconds):
+    end = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < end:
+        total += sum(range(100))
+    return total
+
+def _read_folded(path):
+    with open(path) as f:
+        lines = [line.rsplit(" ", 1) for line in f.read().splitlines()]
+    return {stack: int(weight) for stack, weight in lines}
+
+@pytest.mark.parametrize("mode", ["sample", "trace"])
+def test_profile_request_writes_collapsed_stacks(tmp_path, mode):
+    with profile_request(mode, output_dir=str(tmp_path), label="test") as profile:
+        _busy(0.05)
+    assert profile.path is not None
+    assert os.path.exists(profile.path)
+    stacks = _read_folded(profile.path)
+    assert stacks
+    assert any("_busy" in stack for stack in stacks)
+
+def test_profiles_written_in_quick_succession_do_not_overwrite(tmp_path):
+    paths = set()
+    for _ in range(3):
+        with profile_request("sample", output_dir=str(tmp_path), label="test") as profile:
+            _busy(0.005)
+        paths.add(profile.path)
+    assert len(paths) == 3 and len(os.listdir(tmp_path)) == 3
+
+def test_profile_request_disabled(tmp_path):
+    with profile_request(None, output_dir=str(tmp_path)) as profile:
+        _busy(0.001)
+    assert profile.path is None
+    assert os.listdir(tmp_path) == []
+
+def test_profile_request_rejects_unknown_mode(tmp_path):
+    with pytest.raises(ValueError):
+        with profile_request("flame", output_dir=str(tmp_path)):
+            pass
+
+def test_continuous_sampler_keeps_bounded_ring(tmp_path):
+    sampler = ContinuousSampler(str(tmp_path), hz=500, window=3600, max_files=2)
+    sampler.start()
+    try:
+        for _ in range(4):
+            _busy(0.03)
+            sampler.flush()
+    finally:
+        sampler.stop()
+    profiles = [f for f in os.listdir(tmp_path) if f.endswith(".folded")]
+    assert 1 <= len(profiles) <= 2
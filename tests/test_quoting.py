@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# tests/test_quoting.py
+
+import random
+import pytest
+from core.quoting import get_amount_out, quote_batch, UINT256_MAX
+from core.mcts_router import MCTSNode, simulate
+
+def _contract_execute_swap(input_amount, reserve_in, reserve_out):
+    # Direct transcription of LiquidityAggregator.executeSwap.
+    new_reserve_in = reserve_in + input_amount
+    new_reserve_out = (reserve_in * reserve_out) // new_reserve_in
+    return reserve_out - new_reserve_out
+
+def test_get_amount_out_matches_contract():
+    rng = random.Random(42)
+    for _ in range(500):
+        reserve_in = rng.randrange(1, 10**27)
+        reserve_out = rng.randrange(1, 10**27)
+        amount = rng.randrange(0, 10**25)
+        assert get_amount_out(amount, reserve_in, reserve_out) == _contract_execute_swap(amount, reserve_in, reserve_out)
+
+def test_get_amount_out_fee_models():
+    # UniswapV2 0.3% fee: 1000 in against (10000, 10000) reserves.
+    assert get_amount_out(1000, 10000, 10000, fee_bps=30, fee_model="uniswap_v2") == 906
+    # Aggregator model with a fee deducts it from the input before the contract formula.
+    assert get_amount_out(1000, 10000, 10000, fee_bps=30) == _contract_execute_swap(997, 10000, 10000)
+    with pytest.raises(ValueError):
+        get_amount_out(1000, 10000, 10000, fee_model="curve")
+
+def test_get_amount_out_reverts_like_contract():
+    with pytest.raises(ValueError):
+        get_amount_out(10, 0, 100)
+    with pytest.raises(ValueError):
+        get_amount_out(10, UINT256_MAX, 2)
+
+@pytest.mark.parametrize("fee_model", ["aggregator", "uniswap_v2"])
+@pytest.mark.parametrize("scale", [10**3, 10**24])
+def test_quote_batch_matches_single_quotes(fee_model, scale):
+    rng = random.Random(7)
+    reserves_in = [rng.randrange(1, scale) for _ in range(200)] + [0]
+    reserves_out = [rng.randrange(1, scale) for _ in range(200)] + [5]
+    amount = scale // 10
+    outputs = quote_batch(amount, reserves_in, reserves_out, fee_bps=30, fee_model=fee_model)
+    expected = [
+        get_amount_out(amount, x, y, fee_bps=30, fee_model=fee_model) if x else 0
+        for x, y in zip(reserves_in, reserves_out)
+    ]
+    assert outputs == expected
+    assert all(isinstance(o, int) for o in outputs)
+
+@pytest.mark.parametrize("scale", [10**3, 10**24])
+def test_quote_batch_rejects_bad_input_like_get_amount_out(scale):
+    for kwargs in ({"fee_bps": -1}, {"fee_bps": 10000}):
+        with pytest.raises(ValueError):
+            get_amount_out(10, scale, scale, **kwargs)
+        with pytest.raises(ValueError):
+            quote_batch(10, [scale], [scale], **kwargs)
+    with pytest.raises(ValueError):
+        quote_batch([10, -1], [scale, scale], [scale, scale])
+    with pytest.raises(ValueError):
+        quote_batch(-1, [scale], [scale])
+
+def test_simulate_uses_exact_quote_for_integer_reserves():
+    node = MCTSNode(pool={"token0": 100, "token1": 100, "pool": "Uniswap", "chain": "Ethereum"})
+    assert simulate(node, 10) == _contract_execute_swap(10, 100, 100)
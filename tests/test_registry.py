@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# tests/test_registry.py
+
+import time
+import pytest
+from core.registry import (PoolRegistry, PoolEntry, PAIR_CREATED_TOPIC, decode_pair_created,
+                           scan_pair_created, main as registry_main)
+from core.liquidity import fetch_all_liquidity
+
+WETH = "0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2"
+USDC = "0xA0b86991c6218b36c1d19D4a2e9Eb0cE3606eB48"
+DAI = "0x6B175474E89094C44Da98b954EedeAC495271d0F"
+
+def make_registry():
+    return PoolRegistry([
+        PoolEntry("Ethereum", "0xPool1", WETH, USDC, dex="Uniswap", tvl=5e6),
+        PoolEntry("Ethereum", "0xPool2", USDC, WETH, dex="SushiSwap", tvl=10.0),
+        PoolEntry("Ethereum", "0xPool3", WETH, DAI, dex="Uniswap", tvl=1e6),
+        PoolEntry("BSC", "0xPool4", WETH, USDC, dex="PancakeSwap", tvl=2e6),
+    ])
+
+def test_pair_lookup_is_order_independent_and_per_chain():
+    registry = make_registry()
+    assert {e.address for e in registry.pools_for_pair(WETH, USDC)} == {"0xpool1", "0xpool2", "0xpool4"}
+    assert {e.address for e in registry.pools_for_pair(USDC.lower(), WETH, chain="Ethereum")} == {"0xpool1", "0xpool2"}
+    assert {e.address for e in registry.pools_for_token(DAI)} == {"0xpool3"}
+    assert registry.pools_for_pair(USDC, DAI) == []
+
+def test_prune_removes_dust_and_unindexes():
+    registry = make_registry()
+    assert registry.prune(1000.0) == 1
+    assert registry.get("Ethereum", "0xPool2") is None
+    assert {e.address for e in registry.pools_for_pair(WETH, USDC, chain="Ethereum")} == {"0xpool1"}
+    assert registry.prune(3e6, tvl_of=lambda entry: 0 if entry.dex == "Uniswap" else 1e7) == 2
+    assert len(registry) == 1
+
+def test_prune_keeps_pools_whose_tvl_was_never_measured():
+    registry = make_registry()
+    pair = "0x" + "ab" * 20
+    scanned = registry.add(decode_pair_created(_log(WETH, DAI, pair, 100), "Ethereum"))
+    assert scanned.tvl is None
+    assert registry.prune(1000.0) == 1 and registry.get("Ethereum", pair) is not None
+    assert registry.prune(1000.0, tvl_of=lambda entry: None) == 0
+    assert registry.prune(1000.0, tvl_of=lambda entry: 5.0 if entry.address == pair else entry.tvl) == 1
+    assert registry.get("Ethereum", pair) is None
+
+@pytest.mark.parametrize("filename", ["pools.json", "pools.db"])
+def test_save_and_load_round_trip(tmp_path, filename):
+    registry = make_registry()
+    registry.add(PoolEntry("Ethereum", "0xPool5", DAI, USDC, dex="Uniswap"))  # TVL never measured
+    registry.scan_cursors[("Ethereum", "0xfactory")] = 123
+    path = str(tmp_path / filename)
+    registry.save(path)
+    registry.save(path)  # overwriting keeps a single copy of every pool
+    loaded = PoolRegistry.load(path)
+    assert sorted(loaded, key=lambda e: e.key) == sorted(registry, key=lambda e: e.key)
+    assert loaded.scan_cursors == {("Ethereum", "0xfactory"): 123}
+    assert len(loaded.pools_for_pair(WETH, USDC)) == 3
+
+def _log(token0, token1, pair, block):
+    return {
+        "topics": [PAIR_CREATED_TOPIC, "0x" + "0" * 24 + token0[2:], "0x" + "0" * 24 + token1[2:]],
+        "data": "0x" + "0" * 24 + pair[2:] + "0" * 63 + "1",
+        "blockNumber": hex(block),
+    }
+
+def test_decode_pair_created():
+    pair = "0x" + "ab" * 20
+    entry = decode_pair_created(_log(WETH, USDC, pair, 100), "Ethereum", dex="Uniswap")
+    assert (entry.address, entry.token0, entry.token1, entry.block) == (pair, WETH.lower(), USDC.lower(), 100)
+
+def test_scan_pair_created_chunks_and_retries_smaller_ranges():
+    class FakeRpc:
+        def __init__(self):
+            self.ranges = []
+
+        def call(self, method, params):
+            start, end = int(params[0]["fromBlock"], 16), int(params[0]["toBlock"], 16)
+            assert method == "eth_getLogs" and params[0]["topics"] == [PAIR_CREATED_TOPIC]
+            if end - start + 1 > 50:
+                raise RuntimeError("query returned more than 10000 results")
+            self.ranges.append((start, end))
+            return [_log(WETH, USDC, "0x" + f"{b:040x}", b) for b in range(start, end + 1) if b % 10 == 0]
+
+    registry = PoolRegistry()
+    rpc = FakeRpc()
+    added = scan_pair_created(registry, rpc, "Ethereum", "0xFactory", 0, 199, chunk=100)
+    assert added == 20 and len(registry.pools_for_pair(USDC, WETH)) == 20
+    assert rpc.ranges[0] == (0, 49) and rpc.ranges[-1][1] == 199
+    assert registry.scan_cursors[("Ethereum", "0xfactory")] == 199
+
+def test_prune_cli_measures_tvl_from_reserves(tmp_path, monkeypatch, capsys):
+    import core.transport
+    reserves = {
+        "0xdust": (10**18, 100 * 10**6),           # 100 USDC -> TVL 200
+        "0xdeep": (10**21, 5 * 10**6 * 10**6),     # 5M USDC -> TVL 10M
+        "0xdaipool": (3000 * 10**18, 10**18),      # 3000 DAI as token0 -> TVL 6000
+        "0xunpriced": (10**18, 10**18),
+    }
+
+    class FakeRpc:
+        def call(self, method, params):
+            assert method == "eth_call" and params[0]["data"] == "0x0902f1ac"
+            r0, r1 = reserves[params[0]["to"]]
+            return "0x" + f"{r0:064x}{r1:064x}" + "0" * 64
+
+    monkeypatch.setattr(core.transport, "get_transport", lambda chain: FakeRpc() if chain == "Ethereum" else None)
+    path = str(tmp_path / "pools.db")
+    registry = PoolRegistry([
+        PoolEntry("Ethereum", "0xdust", WETH, USDC),
+        PoolEntry("Ethereum", "0xdeep", WETH, USDC),
+        PoolEntry("Ethereum", "0xdaipool", DAI, WETH),
+        PoolEntry("Ethereum", "0xunpriced", WETH, "0x" + "12" * 20),  # no quote token: kept
+        PoolEntry("BSC", "0xnorpc", WETH, USDC),                       # no BSC endpoint: kept
+    ])
+    registry.save(path)
+    registry_main(["--registry", path, "prune", "--min_tvl", "10000"])
+    assert "Removed 2 pools" in capsys.readouterr().out
+    loaded = PoolRegistry.load(path)
+    assert {e.address for e in loaded} == {"0xdeep", "0xunpriced", "0xnorpc"}
+    assert loaded.get("Ethereum", "0xdeep").tvl == 10**7 and loaded.get("Ethereum", "0xunpriced").tvl is None
+
+    # An explicit quote token (here WETH at 3000) prices the pool without a stablecoin.
+    registry_main(["--registry", path, "prune", "--min_tvl", "10000", "--quote_token", f"{WETH}:18:3000"])
+    loaded = PoolRegistry.load(path)
+    assert {e.address for e in loaded} == {"0xdeep", "0xnorpc"}  # 1 WETH pool -> TVL 6000
+    assert loaded.get("Ethereum", "0xdeep").tvl == 2 * 1000 * 3000
+
+def test_lookup_cost_does_not_grow_with_registry_size():
+    registry = PoolRegistry(
+        PoolEntry("Ethereum", f"0x{i:040x}", f"0x{i:040x}", f"0x{i + 1:040x}") for i in range(200_000)
+    )
+    registry.add(PoolEntry("Ethereum", "0xtarget", WETH, USDC))
+    start = time.perf_counter()
+    for _ in range(1000):
+        pools = registry.pools_for_pair(USDC, WETH)
+    assert [e.address for e in pools] == ["0xtarget"]
+    assert time.perf_counter() - start < 0.5
+
+def test_fetch_all_liquidity_uses_registry_candidates_only():
+    registry = make_registry()
+    pools = fetch_all_liquidity(USDC, WETH, registry=registry)
+    assert sorted((p.pool, p.chain, p.address) for p in pools) == [
+        ("PancakeSwap", "BSC", "0xpool4"),
+        ("SushiSwap", "Ethereum", "0xpool2"),
+        ("Uniswap", "Ethereum", "0xpool1"),
+    ]
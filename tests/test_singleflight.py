@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+# tests/test_singleflight.py
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from core.singleflight import SingleFlight, amount_bucket, block_epoch
+
+def test_concurrent_identical_calls_run_once():
+    flight = SingleFlight("test_route")
+    calls = []
+    started = threading.Event()
+
+    def search():
+        calls.append(1)
+        started.set()
+        time.sleep(0.1)
+        return {"pool": "Uniswap"}
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        leader = executor.submit(flight.do, ("ETH", "USDC"), search)
+        started.wait()
+        followers = [executor.submit(flight.do, ("ETH", "USDC"), search) for _ in range(7)]
+        results = [leader.result()] + [f.result() for f in followers]
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert flight.in_flight() == 0
+
+def test_distinct_keys_and_sequential_calls_are_not_coalesced():
+    flight = SingleFlight("test_keys")
+    assert flight.do("a", lambda: 1) == 1
+    assert flight.do("a", lambda: 2) == 2
+    assert flight.do("b", lambda: 3) == 3
+
+def test_exception_is_shared_with_waiters():
+    flight = SingleFlight("test_errors")
+    started = threading.Event()
+
+    def failing():
+        started.set()
+        time.sleep(0.05)
+        raise RuntimeError("rpc down")
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        leader = executor.submit(flight.do, "k", failing)
+        started.wait()
+        follower = executor.submit(flight.do, "k", failing)
+        for future in (leader, follower):
+            with pytest.raises(RuntimeError):
+                future.result()
+
+def test_amount_bucket_and_block_epoch():
+    assert amount_bucket(1100) == amount_bucket(1200)
+    assert amount_bucket(1000) != amount_bucket(2000)
+    assert amount_bucket(0) == 0
+    assert block_epoch("Ethereum", now=120) == block_epoch("Ethereum", now=131)
+    assert block_epoch("Ethereum", now=120) != block_epoch("Ethereum", now=132)
@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# tests/test_snapshot.py
+
+import multiprocessing
+import os
+import time
+import pytest
+from core.pools import Pool
+from core.snapshot import SnapshotPublisher, SnapshotReader, SnapshotError, SnapshotSource, run_ingestion
+
+POOLS = [
+    Pool(pool="Uniswap", chain="Ethereum", token0=10**24, token1=3 * 10**27, address="0xabc"),
+    Pool(pool="PancakeSwap", chain="BSC", token0=150, token1=150),
+    {"pool": "Injective", "chain": "Injective", "error": "timeout"},
+]
+
+@pytest.fixture
+def publisher():
+    publisher = SnapshotPublisher(f"test_liq_{os.getpid()}", capacity=8)
+    yield publisher
+    publisher.close()
+
+def test_round_trip_preserves_uint256_reserves(publisher):
+    version = publisher.publish(POOLS)
+    reader = SnapshotReader(publisher.name)
+    read_version, published_at, pools = reader.read()
+    assert read_version == version and version % 2 == 0
+    assert published_at > 0
+    assert pools[0] == POOLS[0]
+    assert pools[1].token0 == 150 and pools[1].address is None
+    assert pools[2].error is not None
+    reader.close()
+
+def test_reader_decodes_once_per_version(publisher):
+    publisher.publish(POOLS)
+    reader = SnapshotReader(publisher.name)
+    first = reader.pools()
+    assert reader.pools() is first
+    publisher.publish(POOLS[:1])
+    second = reader.pools()
+    assert second is not first and len(second) == 1
+    reader.close()
+
+def test_reader_retries_while_write_in_progress(publisher):
+    publisher.publish(POOLS)
+    reader = SnapshotReader(publisher.name, max_retries=5)
+    # Simulate a writer stuck mid-publish (odd sequence).
+    from core.snapshot import SEQUENCE, SEQUENCE_OFFSET
+    SEQUENCE.pack_into(publisher.shm.buf, SEQUENCE_OFFSET, publisher.sequence + 1)
+    with pytest.raises(SnapshotError):
+        reader.read()
+    reader.close()
+
+def test_capacity_is_enforced(publisher):
+    with pytest.raises(ValueError):
+        publisher.publish([POOLS[1]] * 9)
+
+def _count_pools(name, queue):
+    reader = SnapshotReader(name)
+    queue.put(len(reader.pools()))
+    reader.close()
+
+def test_reader_in_another_process_does_not_unlink_segment(publisher):
+    publisher.publish(POOLS)
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_count_pools, args=(publisher.name, queue))
+    process.start()
+    process.join(timeout=30)
+    assert queue.get(timeout=5) == len(POOLS)
+    # The segment must survive the worker's exit.
+    reader = SnapshotReader(publisher.name)
+    assert len(reader.pools()) == len(POOLS)
+    reader.close()
+
+def test_run_ingestion_publishes_and_unlinks():
+    name = f"test_ingest_{os.getpid()}"
+    run_ingestion(name, interval=0, capacity=4, fetch=lambda: POOLS[:2], iterations=2)
+    with pytest.raises(FileNotFoundError):
+        SnapshotReader(name)
+
+def test_reader_attach_leaves_resource_tracker_untouched(publisher, monkeypatch):
+    from multiprocessing import resource_tracker
+
+    def fail(*args, **kwargs):
+        raise AssertionError("reader registered the segment with the resource tracker")
+
+    monkeypatch.setattr(resource_tracker, "register", fail)
+    publisher.publish(POOLS)
+    reader = SnapshotReader(publisher.name)
+    try:
+        assert len(reader.pools()) == 3
+    finally:
+        reader.close()
+
+def test_source_reattaches_after_the_publisher_restarts():
+    name = f"test_restart_{os.getpid()}"
+    first = SnapshotPublisher(name, capacity=8)
+    first.publish(POOLS[:1])
+    source = SnapshotSource(name, max_age=0.2)
+    assert [pool.pool for pool in source.pools()] == ["Uniswap"]
+    first.close()  # the ingestion process exits and unlinks its segment
+    second = SnapshotPublisher(name, capacity=8)
+    try:
+        time.sleep(0.3)
+        assert source.pools() is None  # the old mapping went stale: dropped
+        second.publish(POOLS[:2])
+        assert [pool.pool for pool in source.pools()] == ["Uniswap", "PancakeSwap"]
+        second.publish(POOLS[1:2])
+        assert [pool.pool for pool in source.pools()] == ["PancakeSwap"]
+    finally:
+        second.close()
@@ -0,0 +1,34 @@
+#!/usr/bin/env python
+# tests/test_train_model.py
+
+import numpy as np
+import pytest
+from data.market_dataset import write_dataset
+
+def test_swap_env_replays_dataset_episodes(tmp_path):
+    pytest.importorskip("gym")
+    pytest.importorskip("stable_baselines3")
+    from models.train_model import SwapEnv
+
+    steps, routes = 200, 3
+    reserves = np.ones((steps, routes, 2))
+    reserves[:, :, 0] = [1.0, 2.0, 4.0]
+    volatility = np.full(steps, 0.25)
+    # slippage[t, r] = t / 10 + r / 100, so a reward identifies the step and route it came from.
+    slippage = np.arange(steps)[:, None] / 10 + np.arange(routes)[None, :] / 100
+    write_dataset(tmp_path, reserves, volatility, slippage)
+
+    env = SwapEnv(dataset_path=str(tmp_path), n_routes=2, episode_length=5, seed=0)
+    try:
+        assert env.action_space.n == 2
+        observation = env.reset()
+        assert observation.shape == (2 + 2 * 2,)
+        assert env.observation_space.contains(observation)
+        np.testing.assert_allclose(observation[2:4], [0.5, 1.0])  # depth relative to the deepest route
+        for step in range(5):
+            last_slippage = observation[4:6]
+            observation, reward, done, _ = env.step(1)
+            assert reward == pytest.approx(-(last_slippage[1] + 0.1), rel=1e-5)
+            assert done == (step == 4)
+    finally:
+        env.close()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+# tests/test_transport.py
+
+import random
+import threading
+import time
+import pytest
+from core.transport import HedgedTransport, CircuitBreaker, RpcTransportError, Endpoint, parse_endpoints
+
+class SimulatedEndpoints:
+    """
+    Local stand-ins for RPC providers: each URL answers after a latency drawn from its
+    own distribution, or raises to simulate an outage.
+    """
+    def __init__(self, profiles, seed=1):
+        self.profiles = profiles
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.calls = {url: 0 for url in profiles}
+
+    def __call__(self, url, payload):
+        with self.lock:
+            self.calls[url] += 1
+            fast, slow, slow_probability, down = self.profiles[url]
+            latency = slow if self.rng.random() < slow_probability else fast
+        if down:
+            raise ConnectionError(f"{url} is down")
+        time.sleep(latency)
+        return {"jsonrpc": "2.0", "id": payload["id"], "result": url}
+
+def _p99(latencies):
+    latencies = sorted(latencies)
+    return latencies[int(0.99 * (len(latencies) - 1))]
+
+def _measure(transport, n):
+    latencies = []
+    for _ in range(n):
+        start = time.perf_counter()
+        transport.request("eth_getReserves")
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+def test_hedging_reduces_tail_latency():
+    # Three providers: usually 2ms, but 5% of requests stall for 150ms.
+    profiles = {url: (0.002, 0.15, 0.05, False) for url in ("a", "b", "c")}
+    unhedged = HedgedTransport(list(profiles), send=SimulatedEndpoints(profiles), max_hedges=0)
+    hedged = HedgedTransport(list(profiles), send=SimulatedEndpoints(profiles), max_hedges=2,
+                             hedge_percentile=0.8, initial_hedge_delay=0.01)
+    unhedged_p99 = _p99(_measure(unhedged, 80))
+    hedged_p99 = _p99(_measure(hedged, 80))
+    assert unhedged_p99 >= 0.1
+    assert hedged_p99 < unhedged_p99 / 2
+
+def test_reads_prefer_fastest_endpoint():
+    profiles = {"slow": (0.02, 0.02, 0.0, False), "fast": (0.001, 0.001, 0.0, False)}
+    send = SimulatedEndpoints(profiles)
+    transport = HedgedTransport(list(profiles), send=send, max_hedges=0)
+    for _ in range(20):
+        transport.request("eth_blockNumber")
+    assert transport.ranked_endpoints()[0].url == "fast"
+    assert send.calls["fast"] > send.calls["slow"]
+
+def test_failover_and_circuit_breaker():
+    profiles = {"down": (0.001, 0.001, 0.0, True), "up": (0.001, 0.001, 0.0, False)}
+    send = SimulatedEndpoints(profiles)
+    transport = HedgedTransport(list(profiles), send=send, max_hedges=0)
+    for _ in range(10):
+        assert transport.request("eth_blockNumber")["result"] == "up"
+    assert transport.endpoints[0].breaker.state == CircuitBreaker.OPEN
+    calls_when_opened = send.calls["down"]
+    transport.request("eth_blockNumber")
+    assert send.calls["down"] == calls_when_opened
+
+def test_all_endpoints_down_raises():
+    profiles = {"a": (0.001, 0.001, 0.0, True)}
+    transport = HedgedTransport(list(profiles), send=SimulatedEndpoints(profiles))
+    with pytest.raises(RpcTransportError):
+        transport.request("eth_blockNumber")
+
+def test_submissions_are_broadcast_to_all_endpoints():
+    profiles = {url: (0.001, 0.001, 0.0, False) for url in ("a", "b", "c")}
+    send = SimulatedEndpoints(profiles)
+    transport = HedgedTransport(list(profiles), send=send)
+    transport.request("eth_sendRawTransaction", ["0x00"])
+    deadline = time.time() + 1
+    while sum(send.calls.values()) < 3 and time.time() < deadline:
+        time.sleep(0.005)
+    assert send.calls == {"a": 1, "b": 1, "c": 1}
+
+def test_circuit_breaker_half_open_recovery():
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=lambda: now[0])
+    breaker.record_failure()
+    breaker.record_failure()
+    assert not breaker.allow()
+    now[0] = 11
+    assert breaker.allow() and breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_half_open_breaker_admits_a_single_probe_under_concurrency():
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=lambda: now[0])
+    breaker.record_failure()
+    now[0] = 11
+    barrier = threading.Barrier(16)
+    admitted = []
+
+    def caller():
+        barrier.wait()
+        admitted.append(breaker.allow())
+
+    threads = [threading.Thread(target=caller) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert admitted.count(True) == 1 and breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.available() is False
+    now[0] = 22  # a probe whose result never arrives is given up
+    assert breaker.allow() and not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN and not breaker.allow()
+
+def test_recovering_endpoint_receives_one_probe_under_load():
+    now = [0.0]
+    recovering = Endpoint("recovering", breaker=CircuitBreaker(failure_threshold=1, reset_timeout=10,
+                                                                 clock=lambda: now[0]))
+    recovering.breaker.record_failure()
+    now[0] = 11
+    calls = {"recovering": 0, "backup": 0}
+    lock = threading.Lock()
+
+    def send(url, payload):
+        with lock:
+            calls[url] += 1
+        if url == "recovering":
+            time.sleep(0.2)
+        return {"jsonrpc": "2.0", "id": payload["id"], "result": url}
+
+    transport = HedgedTransport([recovering, "backup"], send=send, max_hedges=0)
+    barrier = threading.Barrier(12)
+    results = []
+
+    def caller():
+        barrier.wait()
+        results.append(transport.request("eth_blockNumber")["result"])
+
+    threads = [threading.Thread(target=caller) for _ in range(12)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert calls["recovering"] == 1 and len(results) == 12
+    assert results.count("recovering") == 1 and recovering.breaker.state == CircuitBreaker.CLOSED
+
+def test_parse_endpoints():
+    assert parse_endpoints("https://a, https://b,,") == ["https://a", "https://b"]
+    assert parse_endpoints(None) == []